@@ -0,0 +1,112 @@
+#!/usr/bin/python3
+
+
+"""
+Description
+-----------
+
+GnuCash accounts, as defined in bankaccounts.def
+
+Accounts are looked up by account number (IBAN) for every transaction,
+and by GnuCash account name for categories and internal transfers.
+Both lookups use indexes which are built when an account is added.
+
+
+        This program is free software: you can redistribute it and/or modify
+        it under the terms of the GNU General Public License as published by
+        the Free Software Foundation, either version 3 of the License, or
+        (at your option) any later version.
+
+        This program is distributed in the hope that it will be useful,
+        but WITHOUT ANY WARRANTY; without even the implied warranty of
+        MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+        GNU General Public License for more details.
+
+        You should have received a copy of the GNU General Public License
+        along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+class BankAccounts(dict):
+  """
+  Dictionary of account number (IBAN):{"gnuaccountname", "priority", "accounttype", "qifaccount"}
+
+  Reverse indexes by GnuCash account name:
+    ibans: account name:list of account numbers, in order of bankaccounts.def
+    priorities: account name:priority; if an account name has multiple
+                account numbers, the priority of the last one
+
+  Use add() to add accounts; indexes are not updated when the dictionary
+  is modified directly
+  """
+
+  def __init__(self):
+    super().__init__()
+    self.ibans = {}
+    self.priorities = {}
+    self.__nextpriority = 0
+
+  def add(self, iban, accountname, accounttype, qifaccount=None):
+    """
+    Add an account; priority is order of adding (0 = highest priority)
+
+    Keyword arguments:
+    :param str iban: account number; lowercase
+    :param str accountname: GnuCash account name
+    :param str accounttype: QIF account type (eg Bank, Invst)
+    :param quiffen.Account qifaccount: quiffen account of this account
+    """
+
+    priority = self.__nextpriority
+    self.__nextpriority += 1
+
+    self[iban] = {"gnuaccountname": accountname,
+                  "priority": priority,
+                  "accounttype": accounttype,
+                  "qifaccount": qifaccount}
+
+    self.ibans.setdefault(accountname, []).append(iban)
+    self.priorities[accountname] = priority
+
+  def accountName(self, iban):
+    """
+    Return GnuCash account name of an account number
+
+    Keyword arguments:
+    :param str iban: account number
+    :return GnuCash account name; "" if account number is not defined
+    :rtype str
+    """
+
+    account = self.get(iban)
+    if account is None:
+      return ""
+    return account["gnuaccountname"]
+
+  def getIBAN(self, accountname):
+    """
+    Return (first) account number of a GnuCash account name
+
+    Keyword arguments:
+    :param str accountname: GnuCash account name
+    :return account number; None if account name is not defined
+    :rtype str
+    """
+
+    ibans = self.ibans.get(accountname)
+    if ibans is None:
+      return None
+    return ibans[0]
+
+  def priority(self, accountname):
+    """
+    Return priority of a GnuCash account name
+
+    Keyword arguments:
+    :param str accountname: GnuCash account name
+    :return priority; None if account name is not defined
+    :rtype int
+    """
+
+    return self.priorities.get(accountname)
@@ -0,0 +1,184 @@
+#!/usr/bin/python3
+
+
+"""
+Description
+-----------
+
+Exact (fixed point) parsing and formatting of amounts
+
+Bank csv files use decimal comma or decimal point notation, optionally
+with thousand separators, signs and suffixes (Rabobank certificaten add
+%). Amounts are parsed in one scan to integer cents; prices and
+quantities, which can have more decimals, to Decimal. No float is
+involved, hence no rounding errors.
+
+
+        This program is free software: you can redistribute it and/or modify
+        it under the terms of the GNU General Public License as published by
+        the Free Software Foundation, either version 3 of the License, or
+        (at your option) any later version.
+
+        This program is distributed in the hope that it will be useful,
+        but WITHOUT ANY WARRANTY; without even the implied warranty of
+        MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+        GNU General Public License for more details.
+
+        You should have received a copy of the GNU General Public License
+        along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+
+
+# Characters kept in an amount; all others are removed
+DIGITS = "0123456789.-"
+
+
+class TranslationTable(dict):
+  """
+  str.translate() table which removes all characters not in DIGITS
+  The table is filled on first use of a character
+  """
+
+  def __missing__(self, key):
+    value = key if chr(key) in DIGITS else None
+    self[key] = value
+    return value
+
+
+DIGITSONLY = TranslationTable()
+
+
+def normalize(amount, decimalcomma=True):
+  """
+  Convert amount to decimal point notation
+  25.400,05 --> 25400.05 (decimalcomma)
+  +12,5% --> 12.5 (decimalcomma)
+  25,400.05 --> 25400.05
+
+  Keyword arguments:
+  :param str amount: amount as in csv file
+  :param bool decimalcomma: amount uses decimal comma and thousand points
+  :rtype str
+  """
+
+  # remove thousand separators; decimal comma to decimal point
+  if decimalcomma:
+    text = amount.replace(".", "").replace(",", ".")
+  else:
+    text = amount.replace(",", "")
+
+  text = text.lstrip("+")
+
+  # common case: only sign, digits and decimal point
+  if text.isascii() and text.lstrip("-").replace(".", "", 1).isdigit():
+    return text
+
+  # remove any other character, eg % or spaces (str.translate is slower)
+  return text.translate(DIGITSONLY)
+
+
+def parseCents(amount, decimalcomma=True):
+  """
+  Convert amount to integer cents
+  25.400,05 --> 2540005 (decimalcomma)
+  -1,7 --> -170 (decimalcomma)
+
+  Keyword arguments:
+  :param str amount: amount as in csv file
+  :param bool decimalcomma: amount uses decimal comma and thousand points
+  :return cents
+  :rtype int
+  :raise ValueError: no amount, or more than 2 (non zero) decimals
+  """
+
+  # common case: exactly 2 decimals, eg -1.234,56; int() handles the sign
+  if decimalcomma:
+    (whole, point, fraction) = amount.partition(",")
+    whole = whole.replace(".", "")
+  else:
+    (whole, point, fraction) = amount.partition(".")
+    whole = whole.replace(",", "")
+
+  if len(fraction) == 2 and fraction.isdigit():
+    try:
+      return int(whole + fraction)
+    except ValueError:
+      pass
+
+  text = normalize(amount, decimalcomma)
+
+  negative = text.startswith("-")
+  (whole, point, fraction) = text.lstrip("-").partition(".")
+
+  if not (whole or fraction):
+    raise ValueError(f"No amount in {amount!r}")
+
+  # trailing zeros are fine, eg 1.2300
+  if len(fraction) > 2:
+    if fraction[2:].strip("0"):
+      raise ValueError(f"Amount {amount!r} has more than 2 decimals")
+    fraction = fraction[:2]
+
+  cents = int(whole or "0") * 100 + int(fraction.ljust(2, "0"))
+  return -cents if negative else cents
+
+
+def roundCents(amount, decimalcomma=True):
+  """
+  Convert amount to integer cents; more than 2 decimals are rounded half even
+  -123.4567 --> -12346
+  0.125 --> 12
+
+  Keyword arguments:
+  :param str amount: amount as in csv file
+  :param bool decimalcomma: amount uses decimal comma and thousand points
+  :return cents
+  :rtype int
+  :raise ValueError: no amount
+  """
+
+  try:
+    return parseCents(amount, decimalcomma)
+  except ValueError:
+    # no amount, or more than 2 decimals
+    cents = parseDecimal(amount, decimalcomma).scaleb(2)
+    return int(cents.to_integral_value(rounding=ROUND_HALF_EVEN))
+
+
+def parseDecimal(amount, decimalcomma=True):
+  """
+  Convert amount (eg price, quantity) to Decimal; all decimals are kept
+  0,06277 --> Decimal('0.06277') (decimalcomma)
+
+  Keyword arguments:
+  :param str amount: amount as in csv file
+  :param bool decimalcomma: amount uses decimal comma and thousand points
+  :rtype Decimal
+  :raise ValueError: no amount
+  """
+
+  try:
+    return Decimal(normalize(amount, decimalcomma))
+  except InvalidOperation:
+    raise ValueError(f"No amount in {amount!r}") from None
+
+
+def formatCents(cents):
+  """
+  Format cents in decimal point notation, as written to QIF file
+  -170 --> -1.70
+  A missing amount ("") is passed on as is
+
+  Keyword arguments:
+  :param int cents:
+  :rtype str
+  """
+
+  if cents == "":
+    return ""
+
+  (whole, fraction) = divmod(abs(cents), 100)
+  return f"{'-' if cents < 0 else ''}{whole}.{fraction:02d}"
@@ -0,0 +1,911 @@
+#!/usr/bin/python3
+
+
+"""
+Description
+-----------
+
+Benchmark csv2qif with synthetic csv files
+
+Writes a synthetic csv file for every supported bank format (ING
+checking/saving, Rabobank checking/beleggen, DeGiro account/transactions)
+and a synthetic categories.csv, and reports the throughput of every
+stage separately:
+- detection: determine bank of a csv file (BankRegistry.determineBank)
+- parsing: bank parser, per bank format
+- categorization: account names and categories (categories.csv)
+- writing: QIF file, with quiffen and with the built-in writer (--native)
+
+Account numbers of the csv files are the ones of bankaccounts.def.
+
+With --startup, the startup time of csv2qif.py is reported instead: wall
+time of csv2qif.py --help (imports and argument parsing) and the import
+time per module (python -X importtime).
+
+With --logging, the time to log a "TRANSACTION without category" record
+is reported, with the queue of log.py and with handlers called directly.
+Console output is discarded.
+
+With --amounts, the time to parse amounts is reported: the former regex
+and float conversion, amount.parseCents(), amount.parseDecimal() and
+columnar.toCents() (numpy).
+
+With --chunks, every synthetic csv file is parsed serially, and split in
+--jobs chunks which are parsed in parallel (as csv2qif.py --jobs does for
+large files).
+
+With --dates, the time to parse dates is reported, per DATEFORMAT layout of
+the bank definition files: datetime.strptime (with a fallback to the
+second format, as before), dates.DateParser without and with cache.
+
+With --columnar, every synthetic csv file with a columnar parser is parsed
+row wise (bank parser) and column wise (numpy); as batch, and passed on
+as transactions (csv2qif.py --columnar).
+
+With --memory, the memory per parsed transaction is reported: allocated
+while parsing (tracemalloc), and the size of a slotted Transaction against
+a dictionary with the same fields (the former representation).
+
+usage:
+  benchmark.py [--rows N] [--rules N] [--seed N] [--keep DIR] [--no-quiffen]
+  benchmark.py --startup [--runs N]
+  benchmark.py --logging [--rows N]
+  benchmark.py --amounts [--rows N] [--seed N]
+  benchmark.py --chunks [--jobs N] [--rows N] [--seed N] [--keep DIR]
+  benchmark.py --dates [--rows N] [--seed N]
+  benchmark.py --columnar [--rows N] [--seed N] [--keep DIR]
+  benchmark.py --memory [--rows N] [--seed N] [--keep DIR]
+
+
+        This program is free software: you can redistribute it and/or modify
+        it under the terms of the GNU General Public License as published by
+        the Free Software Foundation, either version 3 of the License, or
+        (at your option) any later version.
+
+        This program is distributed in the hope that it will be useful,
+        but WITHOUT ANY WARRANTY; without even the implied warranty of
+        MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+        GNU General Public License for more details.
+
+        You should have received a copy of the GNU General Public License
+        along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import argparse
+import concurrent.futures
+import csv
+import itertools
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# local imports
+import csv2qif
+import parsebank
+import dates
+import amount
+import columnar
+import categories
+import ingest
+import log
+from log import logger
+import logging
+
+BASEPATH = os.path.dirname(os.path.realpath(__file__))
+
+# Default number of rows per csv file
+ROWS = 100000
+
+# Default number of rules in synthetic categories.csv
+RULES = 2000
+
+# Fraction of transactions with a payee of a rule in categories.csv
+HITRATE = 0.8
+
+# Number of times every csv file is detected; detection only reads the header
+DETECTIONS = 100
+
+# Synthetic transactions span this number of days
+DAYS = 3650
+
+# Number of runs of csv2qif.py --help; fastest is reported
+STARTUPRUNS = 10
+
+# Modules which take less time to import are not reported
+IMPORTTIME = 0.0005
+
+# Account numbers of bankaccounts.def
+INGCHECKING = "NL12INGB1234567890"
+INGSAVING = "H 123-45678"
+RABOCHECKING = "NL12RABO1234567890"
+RABOBELEGGEN = "31234567"
+
+# Words of synthetic payees and memos
+WORDS = ["Bakkerij", "Slagerij", "Garage", "Apotheek", "Tankstation", "Restaurant", "Drogisterij",
+         "Boekhandel", "Bouwmarkt", "Kapper", "Fietsen", "Bloemen", "Zwembad", "Camping"]
+
+# Securities (name, ISIN, stock market) of investment accounts
+SECURITIES = [("VANGUARD FTSE AW", "IE00B3RBWM25", "EAM"),
+              ("ISHARES CORE MSCI WORLD", "IE00B4L5Y983", "EAM"),
+              ("ASML HOLDING", "NL0010273215", "EAM"),
+              ("iShares NASDAQ 100", "DE000A0F5UF5", "XETRA - REGULIERTER MARKT"),
+              ("Rabobank Certificaten", "XS1002121454", "Rabobank")]
+
+# Memos of DeGiro account csv file which are converted (see parsebank.readDeGiroAccountCSV)
+DEGIROMEMOS = ["DEGIRO Aansluitingskosten 2020 (Euronext Amsterdam - EAM)", "DEGIRO Corporate Action Kosten",
+               "Dividend", "DeGiro Geldmarktfondsen Compensatie", "Valuta Creditering", "Valuta Debitering"]
+
+
+def merchant(i):
+  """
+  Name of synthetic payee i; rule i of synthetic categories.csv matches this payee
+
+  Keyword arguments:
+  :param int i: number of payee
+  :rtype str
+  """
+
+  return f"{WORDS[i % len(WORDS)]} {i:05d}"
+
+
+class Generator:
+  """
+  Random values of synthetic transactions
+  """
+
+  def __init__(self, rows, rules, seed):
+    """
+    Keyword arguments:
+    :param int rows: number of rows per csv file
+    :param int rules: number of rules in synthetic categories.csv
+    :param int seed: seed of random generator; same seed gives same csv files
+    """
+
+    self.rows = rows
+    self.rules = rules
+    self.random = random.Random(seed)
+    self.start = datetime(2015, 1, 1)
+
+  def date(self, i):
+    """
+    Date of row i; rows are in order of date
+    """
+
+    return self.start + timedelta(days=i * DAYS // self.rows)
+
+  def payee(self):
+    """
+    Payee which matches a rule (HITRATE), or an unknown payee
+    """
+
+    if self.random.random() < HITRATE:
+      return merchant(self.random.randrange(self.rules))
+    return f"Onbekend {self.random.randrange(1000000)}"
+
+  def reference(self):
+    """
+    Memo reference which matches a rule (HITRATE), or an unknown reference
+    """
+
+    if self.random.random() < HITRATE:
+      return f"Kenmerk {self.random.randrange(self.rules):05d}"
+    return f"Kenmerk X{self.random.randrange(1000000)}"
+
+  def iban(self):
+    """
+    Random counter account; not in bankaccounts.def
+    """
+
+    return f"NL{self.random.randrange(10, 100)}ABNA{self.random.randrange(10**10):010d}"
+
+  def cents(self, maximum=100000):
+    """
+    Random positive amount in cents
+    """
+
+    return self.random.randrange(1, maximum)
+
+
+def formatAmount(cents, decimalcomma=True, thousands=False, sign=False):
+  """
+  Format cents like a bank csv file
+
+  Keyword arguments:
+  :param int cents: amount in cents
+  :param bool decimalcomma: 1,00 iso 1.00
+  :param bool thousands: 1.234,56 iso 1234,56 (decimal comma only)
+  :param bool sign: +1,00 for positive amounts
+  :rtype str
+  """
+
+  text = f"{abs(cents) // 100:,}" if thousands else f"{abs(cents) // 100}"
+  text = text.replace(",", ".") + (f",{abs(cents) % 100:02d}" if decimalcomma else f".{abs(cents) % 100:02d}")
+  if cents < 0:
+    return "-" + text
+  return "+" + text if sign else text
+
+
+def writeINGChecking(filename, generator):
+  """
+  Write synthetic ING checking csv file
+
+  Keyword arguments:
+  :param str filename: Path + Filename of csv file
+  :param Generator generator: random values
+  """
+
+  with open(filename, mode='w', newline='', encoding='latin1') as fp:
+    csvOut = csv.writer(fp, delimiter=";", quoting=csv.QUOTE_ALL, lineterminator="\n")
+    csvOut.writerow(["Datum", "Naam / Omschrijving", "Rekening", "Tegenrekening", "Code", "Af Bij", "Bedrag (EUR)",
+                     "Mutatiesoort", "Mededelingen", "Saldo na mutatie", "Tag"])
+    balance = 0
+    for i in range(generator.rows):
+      cents = generator.cents()
+      sign = generator.random.choice(("Af", "Af", "Af", "Bij"))
+      balance += -cents if sign == "Af" else cents
+      csvOut.writerow([f"{generator.date(i):%Y%m%d}", generator.payee(), INGCHECKING, generator.iban(), "BA", sign,
+                       formatAmount(cents), "Betaalautomaat",
+                       f"Pasvolgnr: 001 {generator.date(i):%d-%m-%Y} {generator.reference()} Term: {i % 997}",
+                       formatAmount(balance), ""])
+
+
+def writeINGSaving(filename, generator):
+  """
+  Write synthetic ING saving csv file
+
+  Keyword arguments:
+  :param str filename: Path + Filename of csv file
+  :param Generator generator: random values
+  """
+
+  with open(filename, mode='w', newline='', encoding='latin1') as fp:
+    csvOut = csv.writer(fp, delimiter=";", quoting=csv.QUOTE_ALL, lineterminator="\n")
+    csvOut.writerow(["Datum", "Omschrijving", "Rekening", "Rekening naam", "Tegenrekening", "Af Bij", "Bedrag",
+                     "Valuta", "Mutatiesoort", "Mededelingen", "Saldo na mutatie"])
+    balance = 0
+    for i in range(generator.rows):
+      cents = generator.cents(1000000)
+      if generator.random.random() < 0.1:
+        (memo, sign, toiban, kind) = ("Rente", "Bij", "", "Rente")
+      else:
+        sign = generator.random.choice(("Af", "Bij"))
+        (memo, toiban, kind) = (f"Overboeking {'naar' if sign == 'Af' else 'van'} betaalrekening {INGCHECKING}", INGCHECKING,
+                                "Opname" if sign == "Af" else "Inleg")
+      balance += -cents if sign == "Af" else cents
+      csvOut.writerow([f"{generator.date(i):%Y-%m-%d}", memo, INGSAVING, "Oranje Spaarrekening", toiban, sign,
+                       formatAmount(cents), "EUR", kind, "", formatAmount(balance, decimalcomma=False)])
+
+
+def writeRabobankChecking(filename, generator):
+  """
+  Write synthetic Rabobank checking csv file
+
+  Keyword arguments:
+  :param str filename: Path + Filename of csv file
+  :param Generator generator: random values
+  """
+
+  with open(filename, mode='w', newline='', encoding='latin1') as fp:
+    csvOut = csv.writer(fp, delimiter=",", quoting=csv.QUOTE_ALL, lineterminator="\n")
+    csvOut.writerow(["IBAN/BBAN", "Munt", "BIC", "Volgnr", "Datum", "Rentedatum", "Bedrag", "Saldo na trn",
+                     "Tegenrekening IBAN/BBAN", "Naam tegenpartij", "Naam uiteindelijke partij", "Naam initi\xebrende partij",
+                     "BIC tegenpartij", "Code", "Batch ID", "Transactiereferentie", "Machtigingskenmerk", "Incassant ID",
+                     "Betalingskenmerk", "Omschrijving-1", "Omschrijving-2", "Omschrijving-3", "Reden retour",
+                     "Oorspr bedrag", "Oorspr munt", "Koers"])
+    balance = 0
+    for i in range(generator.rows):
+      cents = generator.cents() * generator.random.choice((-1, -1, -1, 1))
+      balance += cents
+      date = f"{generator.date(i):%Y-%m-%d}"
+      csvOut.writerow([RABOCHECKING, "EUR", "RABONL2U", f"{i:018d}", date, date, formatAmount(cents, sign=True),
+                       formatAmount(balance, sign=True), generator.iban(), generator.payee(), "", "", "ABNANL2A", "bc",
+                       "", "", "", "", "", f"Betaalautomaat {i % 24:02d}:{i % 60:02d} pasnr. 001", " ", "", "", "", "", ""])
+
+
+def writeRabobankBeleggen(filename, generator):
+  """
+  Write synthetic Rabobank beleggen csv file
+  Like the real csv files, empty last columns are truncated
+
+  Keyword arguments:
+  :param str filename: Path + Filename of csv file
+  :param Generator generator: random values
+  """
+
+  with open(filename, mode='w', newline='', encoding='utf-8') as fp:
+    fp.write("\ufeffPortefeuille;Titel;Datum;Opdracht;Aantal/Bedrag €;Koers;Valuta;Valutakosten €;"
+             "Waarde €;Mutatie-bedrag €;ISIN code;Tijd;Beurs\n")
+    for i in range(generator.rows):
+      (name, isin, market) = generator.random.choice(SECURITIES)
+      date = f"{generator.date(i):%d-%m-%Y}"
+      if generator.random.random() < 0.1:
+        # cash transaction; ignored by parser
+        fp.write(f"{RABOBELEGGEN}; ;{date};Tarieven en services;0;0,00000;EUR;;0,00;{formatAmount(-generator.cents(1000))}\n")
+        continue
+
+      quantity = generator.random.randrange(1, 200)
+      price = generator.random.randrange(1000, 50000)
+      value = quantity * price
+      total = value + generator.random.randrange(0, 1000)
+      action = generator.random.choice(("Koop Internet", "Koop Internet", "Verkoop Internet"))
+      fp.write(f"{RABOBELEGGEN};{name};{date};{action};{quantity};{price // 100},{price % 100:02d}000;EUR;;"
+               f"{formatAmount(value, thousands=True)};{formatAmount(-total, thousands=True)};{isin};"
+               f"{i % 24:02d}:{i % 60:02d}:00.000;{market}\n")
+
+
+def writeDeGiroAccount(filename, generator):
+  """
+  Write synthetic DeGiro account csv file
+
+  Keyword arguments:
+  :param str filename: Path + Filename of csv file
+  :param Generator generator: random values
+  """
+
+  with open(filename, mode='w', newline='', encoding='latin1') as fp:
+    csvOut = csv.writer(fp, delimiter=",", lineterminator="\n")
+    csvOut.writerow(["Datum", "Tijd", "Valutadatum", "Product", "ISIN", "Omschrijving", "FX", "Mutatie", "", "Saldo", "", "Order Id"])
+    balance = 0
+    for i in range(generator.rows):
+      (name, isin, market) = generator.random.choice(SECURITIES)
+      memo = generator.random.choice(DEGIROMEMOS)
+      cents = generator.cents(10000) * (1 if memo in ("Dividend", "Valuta Creditering") else -1)
+      balance += cents
+      date = f"{generator.date(i):%d-%m-%Y}"
+      csvOut.writerow([date, f"{i % 24}:{i % 60:02d}", date, name, isin, memo, "", "EUR",
+                       formatAmount(cents), "EUR", formatAmount(balance), ""])
+
+
+def writeDeGiroTransactions(filename, generator):
+  """
+  Write synthetic DeGiro transactions csv file
+
+  Keyword arguments:
+  :param str filename: Path + Filename of csv file
+  :param Generator generator: random values
+  """
+
+  with open(filename, mode='w', newline='', encoding='latin1') as fp:
+    csvOut = csv.writer(fp, delimiter=",", lineterminator="\n")
+    csvOut.writerow(["Datum", "Tijd", "Product", "ISIN", "Beurs", "Uitvoeringsplaats", "Aantal", "Koers", "",
+                     "Lokale waarde", "", "Waarde", "", "Wisselkoers", "Transactiekosten", "", "Totaal", "", "Order ID"])
+    for i in range(generator.rows):
+      (name, isin, market) = generator.random.choice(SECURITIES)
+      quantity = generator.random.randrange(1, 200) * generator.random.choice((1, 1, -1))
+      price = generator.random.randrange(1000, 50000)
+      value = -quantity * price
+      commission = -generator.random.randrange(0, 300)
+      csvOut.writerow([f"{generator.date(i):%d-%m-%Y}", f"{i % 24}:{i % 60:02d}", name, isin, market, "XAMS", quantity,
+                       f"{price // 100}.{price % 100:02d}", "EUR", formatAmount(value, decimalcomma=False), "EUR",
+                       formatAmount(value, decimalcomma=False), "EUR", "", formatAmount(commission, decimalcomma=False) if commission else "",
+                       "EUR" if commission else "", formatAmount(value + commission, decimalcomma=False), "EUR",
+                       f"{generator.random.getrandbits(64):016x}"])
+
+
+def writeCategories(filename, generator):
+  """
+  Write synthetic categories.csv
+  Rule i matches payee merchant(i), or memo reference i (see
+  Generator.reference); rules are a mix of payee and memo regexes, with
+  and without literal prefix. Catch all rules of
+  categories.csv are at the end.
+
+  Keyword arguments:
+  :param str filename: Path + Filename of categories.csv
+  :param Generator generator: random values
+  """
+
+  with open(filename, mode='w', newline='', encoding='latin1') as fp:
+    csvOut = csv.writer(fp, delimiter=",", lineterminator="\n")
+    csvOut.writerow(["New Payee", "Category", "Payee  pattern (regex)", "Memo pattern (regex)", " == ignore regex"])
+    for i in range(generator.rules):
+      name = merchant(i)
+      category = f"Expenses:{WORDS[i % len(WORDS)]}:{i % 50}"
+      kind = i % 10
+      if kind < 4:
+        csvOut.writerow([name, category, f"^.*{name}.*$", "", ""])
+      elif kind < 7:
+        csvOut.writerow([name, category, f"^{name}.*$", "", ""])
+      elif kind < 8:
+        csvOut.writerow([name, category, f"^.*({name}|{name.upper()}).*$", "", ""])
+      else:
+        csvOut.writerow([name, category, "", f"^.*Kenmerk {i:05d} Term: [0-9]+$", ""])
+
+    csvOut.writerow(["", "Income:Interest", "", "^.*Rente.*$", "# Put at end, catch all"])
+    csvOut.writerow([" ", "Expenses:Imbalance-EUR", "^.*$", "", "# LAST ENTRY"])
+    csvOut.writerow([" ", "Expenses:Imbalance-EUR", "", "^.*$", "# LAST ENTRY"])
+
+
+# csv file:writer of synthetic csv file; one for every bank format
+FORMATS = {"INGCHECKING.csv": writeINGChecking,
+           "INGSAVING.csv": writeINGSaving,
+           "RABOCHECKING.csv": writeRabobankChecking,
+           "RABOBELEGGEN.csv": writeRabobankBeleggen,
+           "degiro_account.csv": writeDeGiroAccount,
+           "degiro_transactions.csv": writeDeGiroTransactions}
+
+
+def report(stage, seconds, rows, nbytes=None):
+  """
+  Print throughput of a stage
+
+  Keyword arguments:
+  :param str stage: name of stage
+  :param float seconds: elapsed time
+  :param int rows: number of rows (or files) processed
+  :param int nbytes: number of bytes processed; None if not applicable
+  """
+
+  rate = rows / seconds if seconds > 0 else float("inf")
+  line = f"{stage:<36} {rows:>10} {seconds:>9.3f} s {rate:>12,.0f} /s"
+  if nbytes is not None:
+    line += f" {nbytes / seconds / 1e6 if seconds > 0 else float('inf'):>8.1f} MB/s"
+  print(line)
+
+
+def generateFiles(directory, generator):
+  """
+  Write a synthetic csv file for every bank format
+
+  Keyword arguments:
+  :param str directory: directory of synthetic csv files
+  :param Generator generator: random values
+  :return Path + Filename of csv files, in order of FORMATS
+  :rtype list of str
+  """
+
+  files = []
+  for (name, writer) in FORMATS.items():
+    files.append(os.path.join(directory, name))
+    writer(files[-1], generator)
+  return files
+
+
+def benchmark(directory, rows, rules, seed, quiffen_=True):
+  """
+  Generate synthetic csv files in directory and run every stage
+
+  Keyword arguments:
+  :param str directory: directory of synthetic csv files, categories.csv and QIF files
+  :param int rows: number of rows per csv file
+  :param int rules: number of rules in synthetic categories.csv
+  :param int seed: seed of random generator
+  :param bool quiffen_: benchmark writing with quiffen as well
+  """
+
+  generator = Generator(rows, rules, seed)
+
+  # generate
+  start = time.perf_counter()
+  files = generateFiles(directory, generator)
+  categoriesfile = os.path.join(directory, "categories.csv")
+  writeCategories(categoriesfile, generator)
+  print(f"Generated {len(files)} csv files of {rows} rows and {rules} rules in {directory} "
+        f"({time.perf_counter() - start:.1f} s)")
+  print()
+
+  # detection; header is read DETECTIONS times
+  bankregistry = parsebank.BankRegistry()
+  banks = {}
+  start = time.perf_counter()
+  for file in files:
+    for i in range(DETECTIONS):
+      with ingest.CsvFile(file) as csvfile:
+        matches = bankregistry.determineBank(csvfile)
+    if len(matches) != 1:
+      raise RuntimeError(f"{file} matches {len(matches)} bank definitions")
+    banks[file] = matches[0]
+  report("detection (files)", time.perf_counter() - start, len(files) * DETECTIONS)
+
+  # parsing, per bank format
+  csvlist = []
+  for file in files:
+    bank = banks[file]
+    csvparser = getattr(parsebank, bank.csvparser)
+    start = time.perf_counter()
+    with ingest.CsvFile(file) as csvfile:
+      transactions = list(csvparser(csvfile, bank))
+    report(f"parsing {os.path.basename(file)}", time.perf_counter() - start, rows, os.path.getsize(file))
+    csvlist.extend(transactions)
+
+  # categorization
+  account_dict = csv2qif.readBankAccounts(BASEPATH + "/bankaccounts.def")
+  start = time.perf_counter()
+  category_regex = categories.readCategory(categoriesfile)
+  report("reading categories.csv (rules)", time.perf_counter() - start, rules)
+
+  start = time.perf_counter()
+  categories.determineAccountNames(account_dict, csvlist)
+  categories.determineCategories(csvlist, category_regex)
+  categories.determineAccountNames(account_dict, csvlist)
+  report("categorization", time.perf_counter() - start, len(csvlist))
+
+  # writing; accounts are read again, quiffen accounts hold transactions
+  writers = [("writing QIF (native)", True)]
+  if quiffen_:
+    writers.append(("writing QIF (quiffen)", False))
+  for (stage, native_) in writers:
+    account_dict = csv2qif.readBankAccounts(BASEPATH + "/bankaccounts.def")
+    outfile = os.path.join(directory, "native.qif" if native_ else "quiffen.qif")
+    start = time.perf_counter()
+    csv2qif.writeQIF(account_dict, csvlist, outfile, native_=native_)
+    report(stage, time.perf_counter() - start, len(csvlist), os.path.getsize(outfile))
+
+
+def startup(runs):
+  """
+  Report startup time of csv2qif.py --help, and import time per module
+
+  Keyword arguments:
+  :param int runs: number of runs; fastest is reported
+  """
+
+  script = os.path.join(BASEPATH, "csv2qif.py")
+
+  def fastest(command):
+    best = None
+    for i in range(runs):
+      start = time.perf_counter()
+      subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+      seconds = time.perf_counter() - start
+      best = seconds if best is None else min(best, seconds)
+    return best
+
+  interpreter = fastest([sys.executable, "-c", "pass"])
+  total = fastest([sys.executable, script, "--help"])
+  print(f"{'python -c pass':<36} {interpreter * 1000:>9.1f} ms")
+  print(f"{'csv2qif.py --help':<36} {total * 1000:>9.1f} ms")
+  print(f"{'csv2qif.py --help - python':<36} {(total - interpreter) * 1000:>9.1f} ms")
+  print()
+
+  # import time: self [us] | cumulative | imported package; nesting is indented
+  result = subprocess.run([sys.executable, "-X", "importtime", script, "--help"],
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=False)
+  imports = []
+  for line in result.stderr.splitlines():
+    fields = line.split("|")
+    if not line.startswith("import time:") or len(fields) != 3 or not fields[1].strip().isdigit():
+      continue
+
+    # top level imports only; cumulative time includes nested imports
+    if not fields[2].startswith("  "):
+      imports.append((int(fields[1]) / 1e6, fields[2].strip()))
+
+  print(f"{'import (python -X importtime)':<36} {'cumulative':>12}")
+  for (seconds, module) in sorted(imports, reverse=True):
+    if seconds >= IMPORTTIME:
+      print(f"{module:<36} {seconds * 1000:>9.1f} ms")
+  print(f"{'total':<36} {sum(seconds for (seconds, module) in imports) * 1000:>9.1f} ms")
+
+
+def logOverhead(records):
+  """
+  Report time to log records, with queue (background thread) and with handlers called directly
+
+  Keyword arguments:
+  :param int records: number of records
+  """
+
+  level = logger.level
+  logger.setLevel(logging.INFO)
+
+  with open(os.devnull, mode='w') as devnull:
+    stream = log.c_handler.setStream(devnull)
+
+    def logRecords():
+      start = time.perf_counter()
+      for i in range(records):
+        logger.info(f"TRANSACTION without category: nl12ingb1234567890|{merchant(i)}||Kenmerk {i:05d}")
+      return time.perf_counter() - start
+
+    # first record creates the queue and the syslog handler
+    logger.info("Start")
+
+    seconds = logRecords()
+    report("logging (queue)", seconds, records)
+    start = time.perf_counter()
+    log.stop()
+    report("logging (queue) until handled", seconds + time.perf_counter() - start, records)
+
+    # log.stop() switches to handlers called directly
+    report("logging (direct)", logRecords(), records)
+
+    log.c_handler.setStream(stream)
+
+  logger.setLevel(level)
+
+
+def convertDecimalComma(text):
+  """
+  Former parsebank.convertDecimalComma(); baseline of --amounts
+  The result was converted with float()
+  """
+
+  text = text.replace(".", "", 1)
+  text = text.replace(",", ".", 1)
+  return re.sub(r"[^\d|.|-]", "", text)
+
+
+def parseAmounts(rows, seed):
+  """
+  Report time to parse amounts, as in bank csv files
+
+  Keyword arguments:
+  :param int rows: number of amounts
+  :param int seed: seed of random generator
+  """
+
+  generator = Generator(rows, RULES, seed)
+  # mix of withdrawals, deposits with sign and thousand separators
+  amounts = [formatAmount(generator.cents(10**7) * (-1 if i % 5 == 0 else 1), thousands=(i % 3 == 0), sign=(i % 2 == 0))
+             for i in range(rows)]
+
+  def timed(stage, parse):
+    start = time.perf_counter()
+    result = parse()
+    report(stage, time.perf_counter() - start, rows)
+    return result
+
+  timed("convertDecimalComma + float", lambda: [float(convertDecimalComma(text)) for text in amounts])
+  cents = timed("amount.parseCents", lambda: [amount.parseCents(text) for text in amounts])
+  timed("amount.parseDecimal", lambda: [amount.parseDecimal(text) for text in amounts])
+
+  if columnar.loadNumpy():
+    batch = timed("columnar.toCents (numpy)", lambda: columnar.toCents(amounts))
+    if batch.tolist() != cents:
+      raise RuntimeError("columnar.toCents differs from amount.parseCents")
+
+
+def parseDates(rows, seed):
+  """
+  Report time to parse dates, per layout of DATEFORMAT1 and DATEFORMAT2
+
+  Keyword arguments:
+  :param int rows: number of dates
+  :param int seed: seed of random generator
+  """
+
+  generator = Generator(rows, RULES, seed)
+
+  # (DATEFORMAT1, DATEFORMAT2, format of dates in csv file); DeGiro uses both
+  layouts = [("%Y%m%d", None, "%Y%m%d"),
+             ("%Y-%m-%d", None, "%Y-%m-%d"),
+             ("%d-%m-%Y", "%d/%m/%Y", "%d-%m-%Y"),
+             ("%d-%m-%Y", "%d/%m/%Y", "%d/%m/%Y")]
+
+  for (dateformat1, dateformat2, layout) in layouts:
+    dateformats = [dateformat for dateformat in (dateformat1, dateformat2) if dateformat is not None]
+    texts = [generator.date(generator.random.randrange(rows)).strftime(layout) for i in range(rows)]
+
+    # former parsing; second format if first does not match
+    def strptime(text):
+      try:
+        return datetime.strptime(text, dateformat1)
+      except ValueError:
+        return datetime.strptime(text, dateformat2)
+
+    start = time.perf_counter()
+    expected = [strptime(text) for text in texts]
+    report(f"strptime {layout}", time.perf_counter() - start, rows)
+
+    for (stage, cachesize) in (("DateParser", 0), ("DateParser (cache)", dates.CACHESIZE)):
+      parser = dates.DateParser(*dateformats, cachesize=cachesize)
+      start = time.perf_counter()
+      parsed = [parser.parse(text) for text in texts]
+      report(f"{stage} {layout}", time.perf_counter() - start, rows)
+      if parsed != expected:
+        raise RuntimeError(f"DateParser{tuple(dateformats)} differs from strptime")
+
+
+def parseChunk(chunk, bank):
+  """
+  Parse a chunk of a csv file in a worker process
+
+  Keyword arguments:
+  :param FileChunk chunk: part of csv file
+  :param BankDefinition bank: definition file of bank
+  :rtype list of Transaction
+  """
+
+  return list(getattr(parsebank, bank.csvparser)(chunk, bank))
+
+
+def parseChunks(directory, rows, seed, jobs):
+  """
+  Report time to parse every synthetic csv file serially, and in jobs chunks in parallel
+
+  Keyword arguments:
+  :param str directory: directory of synthetic csv files
+  :param int rows: number of rows per csv file
+  :param int seed: seed of random generator
+  :param int jobs: number of worker processes and chunks per file
+  """
+
+  files = generateFiles(directory, Generator(rows, RULES, seed))
+  bankregistry = parsebank.BankRegistry()
+
+  with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+    # start worker processes before timing
+    list(executor.map(abs, range(jobs)))
+
+    for file in files:
+      bank = bankregistry.determineBank(file)[0]
+      if bank.csvparser not in parsebank.CHUNKPARSERS:
+        continue
+      size = os.path.getsize(file)
+
+      start = time.perf_counter()
+      serial = list(getattr(parsebank, bank.csvparser)(file, bank))
+      report(f"serial {os.path.basename(file)}", time.perf_counter() - start, len(serial), size)
+
+      # chunks of (approximately) equal size; one per worker process
+      start = time.perf_counter()
+      chunks = parsebank.splitFile(file, bank, chunksize=-(-size // jobs))
+      chunked = list(itertools.chain.from_iterable(executor.map(parseChunk, chunks, itertools.repeat(bank))))
+      report(f"{len(chunks)} chunks {os.path.basename(file)}", time.perf_counter() - start, len(chunked), size)
+
+      if len(chunked) != len(serial):
+        raise RuntimeError(f"{file}: {len(chunked)} transactions in chunks, {len(serial)} in file")
+
+
+def parseColumnar(directory, rows, seed):
+  """
+  Report time to parse synthetic csv files row wise and column wise
+
+  Keyword arguments:
+  :param str directory: directory of synthetic csv files
+  :param int rows: number of rows per csv file
+  :param int seed: seed of random generator
+  """
+
+  if not columnar.loadNumpy():
+    print("numpy is not installed")
+    return
+
+  files = generateFiles(directory, Generator(rows, RULES, seed))
+  bankregistry = parsebank.BankRegistry()
+
+  for file in files:
+    bank = bankregistry.determineBank(file)[0]
+    if bank.csvparser not in columnar.BATCHPARSERS:
+      continue
+    name = os.path.basename(file)
+    size = os.path.getsize(file)
+
+    start = time.perf_counter()
+    transactions = list(getattr(parsebank, bank.csvparser)(file, bank))
+    report(f"rows {name}", time.perf_counter() - start, len(transactions), size)
+
+    start = time.perf_counter()
+    batch = columnar.BATCHPARSERS[bank.csvparser](file, bank)
+    report(f"batch {name}", time.perf_counter() - start, len(batch.amounts), size)
+
+    start = time.perf_counter()
+    batched = list(columnar.readColumnar(file, bank))
+    report(f"columnar {name}", time.perf_counter() - start, len(batched), size)
+
+    if [transaction.amount for transaction in batched] != [transaction.amount for transaction in transactions]:
+      raise RuntimeError(f"{file}: columnar parser differs from {bank.csvparser}")
+
+
+def measureMemory(directory, rows, seed):
+  """
+  Report memory per transaction of every synthetic csv file
+
+  Keyword arguments:
+  :param str directory: directory of synthetic csv files
+  :param int rows: number of rows per csv file
+  :param int seed: seed of random generator
+  """
+
+  files = generateFiles(directory, Generator(rows, RULES, seed))
+  bankregistry = parsebank.BankRegistry()
+
+  print(f"{'bytes per transaction':<36} {'rows':>10} {'parsed':>9} {'slots':>9} {'dict':>9}")
+  for file in files:
+    bank = bankregistry.determineBank(file)[0]
+
+    # everything allocated by parsing that is still in use; fields and record
+    tracemalloc.start()
+    transactions = list(getattr(parsebank, bank.csvparser)(file, bank))
+    parsed = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # record only; field values are shared by both
+    n = max(len(transactions), 1)
+    slotted = sum(sys.getsizeof(transaction) for transaction in transactions)
+    fields = [name for cls in type(transactions[0]).__mro__ for name in getattr(cls, "__slots__", ())] if transactions else []
+    dicts = sum(sys.getsizeof({name: getattr(transaction, name) for name in fields}) for transaction in transactions)
+
+    print(f"{os.path.basename(file):<36} {len(transactions):>10} {parsed / n:>9.0f} {slotted / n:>9.0f} {dicts / n:>9.0f}")
+    del transactions
+
+
+def run(directory, args):
+  """
+  Run the benchmark selected on the command line with synthetic files in directory
+
+  Keyword arguments:
+  :param str directory: directory of synthetic files
+  :param Namespace args: command line arguments
+  """
+
+  if args.chunks:
+    parseChunks(directory, args.rows, args.seed, args.jobs)
+  elif args.columnar:
+    parseColumnar(directory, args.rows, args.seed)
+  elif args.memory:
+    measureMemory(directory, args.rows, args.seed)
+  else:
+    benchmark(directory, args.rows, args.rules, args.seed, quiffen_=not args.no_quiffen)
+
+
+"""
+------------------------------------------------------------------------------------
+ Entry point
+------------------------------------------------------------------------------------
+"""
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description="Benchmark csv2qif with synthetic csv files")
+  parser.add_argument("--rows", type=int, default=ROWS, metavar="N",
+                      help=f"number of rows per csv file (default {ROWS})")
+  parser.add_argument("--rules", type=int, default=RULES, metavar="N",
+                      help=f"number of rules in synthetic categories.csv (default {RULES})")
+  parser.add_argument("--seed", type=int, default=1, metavar="N",
+                      help="seed of random generator (default 1)")
+  parser.add_argument("--keep", metavar="DIR",
+                      help="write synthetic files to DIR and keep them; default is a temporary directory")
+  parser.add_argument("--no-quiffen", action="store_true",
+                      help="skip writing QIF file with quiffen (slow for large files)")
+  parser.add_argument("--startup", action="store_true",
+                      help="report startup time and import time per module of csv2qif.py instead")
+  parser.add_argument("--logging", action="store_true",
+                      help="report time to log --rows records, with and without queue, instead")
+  parser.add_argument("--amounts", action="store_true",
+                      help="report time to parse --rows amounts, per amount parser, instead")
+  parser.add_argument("--dates", action="store_true",
+                      help="report time to parse --rows dates, with strptime and DateParser, instead")
+  parser.add_argument("--chunks", action="store_true",
+                      help="report time to parse every csv file serially and in --jobs chunks in parallel, instead")
+  parser.add_argument("--jobs", type=int, default=os.cpu_count(), metavar="N",
+                      help=f"number of worker processes and chunks per file with --chunks (default {os.cpu_count()})")
+  parser.add_argument("--columnar", action="store_true",
+                      help="report time to parse csv files row wise and column wise (numpy), instead")
+  parser.add_argument("--memory", action="store_true",
+                      help="report memory per parsed transaction, slotted record against dictionary, instead")
+  parser.add_argument("--runs", type=int, default=STARTUPRUNS, metavar="N",
+                      help=f"number of runs of csv2qif.py --help with --startup (default {STARTUPRUNS})")
+  args = parser.parse_args()
+
+  if args.startup:
+    startup(args.runs)
+    sys.exit(0)
+
+  if args.logging:
+    logOverhead(args.rows)
+    sys.exit(0)
+
+  if args.amounts:
+    parseAmounts(args.rows, args.seed)
+    sys.exit(0)
+
+  if args.dates:
+    parseDates(args.rows, args.seed)
+    sys.exit(0)
+
+  # results are printed; only log warnings and errors (eg transactions without category)
+  logger.setLevel(logging.WARNING)
+
+  if args.keep:
+    os.makedirs(args.keep, exist_ok=True)
+    run(args.keep, args)
+  else:
+    with tempfile.TemporaryDirectory(prefix="csv2qif-benchmark-") as directory:
+      run(directory, args)
@@ -29,8 +29,24 @@ script=os.path.splitext(script)[0]
 logger = logging.getLogger(script + "." +  __name__)
 
 import re
-import quiffen
 import csv
+import functools
+import itertools
+import hashlib
+import json
+import time
+
+# Max number of (payee, memo, to account) results kept in memory
+CACHESIZE = 8192
+
+# Max number of results in cache file; results not used in the last runs are dropped first
+STORESIZE = 100000
+
+# Number of most expensive rules in rule statistics report (see RuleStatistics)
+RULEREPORTSIZE = 20
+
+# Escape sequences with a character code: number of hexadecimal digits
+ESCAPEDIGITS = {"x": 2, "u": 4, "U": 8}
 
 
 def determineAccountNames(account_dict_, csvlist_):
@@ -39,49 +55,83 @@ def determineAccountNames(account_dict_, csvlist_):
   For total list of transactions
 
   Keyword arguments:
-  :param dict account_dict_: key:value -->  iban:(gnucash account name, priority, qif account)
-  :param list of dictionaries csvlist: list of dictionaries of transactions
+  :param BankAccounts account_dict_: key:value -->  iban:(gnucash account name, priority, qif account)
+  :param list of Transaction csvlist_: list of transactions
   """
 
   for transaction in csvlist_:
-    try:
-      transaction['fromaccountname'] = account_dict_[ transaction['iban'] ]['gnuaccountname']
-    except:
-      transaction['fromaccountname'] = ""
+    determineAccountName(account_dict_, transaction)
 
-    try:
-      transaction['toaccountname'] = account_dict_[ transaction['to_iban'] ]['gnuaccountname']
-    except:
-      transaction['toaccountname'] = ""
-
-    # Check if a category is defined
-    # Check if category matches a GnuCash account
-    # Copy to iban_to and accounttoname
-    if transaction['category'] != "":
-      to_iban = getIBAN(account_dict_, transaction['category'].name)
-      if to_iban != 0:
-        transaction['to_iban'] = to_iban
-        transaction['toaccountname'] = transaction['category'].name
+  return 0
+
+
+def determineAccountName(account_dict_, transaction):
+  """
+  Determine GnuCashAccountName from account number (typically IBAN)
+  For one transaction
+
+  Keyword arguments:
+  :param BankAccounts account_dict_: key:value -->  iban:(gnucash account name, priority, qif account)
+  :param Transaction transaction: transaction; updated
+  """
+
+  transaction.fromaccountname = account_dict_.accountName(transaction.iban)
+  transaction.toaccountname = account_dict_.accountName(transaction.to_iban)
+
+  # Check if a category is defined
+  # Check if category matches a GnuCash account
+  # Copy to iban_to and accounttoname
+  if transaction.category != "":
+    to_iban = getIBAN(account_dict_, transaction.category.name)
+    if to_iban != 0:
+      transaction.to_iban = to_iban
+      transaction.toaccountname = transaction.category.name
 
   return 0
 
 
+def processTransactions(account_dict_, transactions, category_regex):
+  """
+  Streaming version of determineAccountNames, determineCategories, determineAccountNames
+  Transactions are processed and passed on one at a time
+
+  Keyword arguments:
+  :param BankAccounts account_dict_: key:value -->  iban:(gnucash account name, priority, qif account)
+  :param iterable of Transaction transactions: transactions
+  :param CategoryMatcher category_regex: compiled regular expressions for payee and memo
+  :return processed transactions
+  :rtype generator of Transaction
+  """
+
+  for transaction in transactions:
+    # translate IBAN's to GnuCash account names
+    determineAccountName(account_dict_, transaction)
+
+    # Try to determine category when to account is not a GnuCash account
+    if transaction.toaccountname == "":
+      determineCategory(transaction, category_regex)
+
+    # A category can be same as accounttoname, hence needs to be copied back
+    determineAccountName(account_dict_, transaction)
+
+    yield transaction
+
+
 def getIBAN(account_dict_, gnucashaccountname_):
   """
   Return account number (typically IBAN) for a given GnuCashAccountName
 
   Keyword arguments:
-  :param dict account_dict_: key:value -->  iban:(gnucash account name, priority, qif account)
+  :param BankAccounts account_dict_: key:value -->  iban:(gnucash account name, priority, qif account)
   :param str gnucashaccountname_:
   :return account number (IBAN)
   :rtype str
   """
 
-  for account in account_dict_:
-    if account_dict_[account]['gnuaccountname'] == gnucashaccountname_:
-      return account
-
-  return 0
+  iban = account_dict_.getIBAN(gnucashaccountname_)
+  if iban is None:
+    return 0
+  return iban
 
 
 def determineCategories(csvlist_, category_regex):
@@ -89,13 +139,13 @@ def determineCategories(csvlist_, category_regex):
   Determine category for all transactions, based on regex defined in accounts.csv
 
   Keyword arguments:
-  :param list of dictionaries csvlist: list of dictionaries of transactions
-  :param list of dictionaries category_regex: list of dictionaries regular expressions for payee and memo
+  :param list of Transaction csvlist_: list of transactions
+  :param CategoryMatcher category_regex: compiled regular expressions for payee and memo
   """
 
   for transaction in csvlist_:
     # Try to determine category when to account is not a GnuCash account
-    if transaction['toaccountname'] == "":
+    if transaction.toaccountname == "":
       determineCategory(transaction, category_regex)
 
   return 0
@@ -106,49 +156,710 @@ def determineCategory(csv, category_regex):
   Determine category for one transactions, based on regex defined in accounts.csv
 
   Keyword arguments:
-  :param dictionary csv: transaction
-  :param list of dictionaries category_regex: list of dictionaries regular expressions for payee and memo
+  :param Transaction csv: transaction
+  :param CategoryMatcher category_regex: compiled regular expressions for payee and memo
   :return updated transaction (csv)
-  :rtype dictionary
+  :rtype Transaction
   """
 
 # TODO
 # also add check regex payee AND MEMO
 
-  for dict in category_regex:
-    # only try to match of there is a payee
+  result = category_regex.categorize(csv.payee, csv.memo, csv.to_iban)
+
+  # no match has been made
+  if result is None:
+    return csv
 
-    regex = dict["payeeregex"].lower()
-    # check if payee is defined and regex is defined
-    if len(csv["payee"]) > 0 and len(regex) > 0 and re.match(regex, csv["payee"].lower()):
-      # append payee to memo before payee is modified
-      csv["memo"] = csv["payee"] + "||" + csv["memo"]
-      csv["payee"] = dict["payee"]
+  (csv.payee, category, csv.memo) = result
 
-      # add quiffen category
-      csv["category"] = quiffen.Category(dict["category"])
+  # add quiffen category; quiffen is imported when it is needed first (see csv2qif)
+  import quiffen
+  csv.category = quiffen.Category(category)
+
+  return csv
 
-      # break from loop as a match has been made
-      break
 
-    # only try to match of there is a memo
-    regex = dict["memoregex"].lower()
-    # check if memo is defined and regex is defined
-    if len(csv["memo"]) > 0 and len(regex) > 0 and re.match(regex, csv["memo"].lower()):
-      # append payee to memo before payee is modified
-      csv["memo"] = csv["payee"] + "||" + csv["memo"]
+def extractLiteral(regex):
+  """
+  Extract the longest literal string which must occur in any text matched by regex
+  Most rules are of the form ^.*Albert Heijn.*$ or ^Jumbo.*$
 
-      # Update payee if one is prescribed
-      if len(dict["payee"]) > 0:
-        csv["payee"] = dict["payee"]
+  Keyword arguments:
+  :param str regex: regular expression as in categories file; escape sequences are case sensitive
+  :return required literal, lowercase, or "" if there is none
+  :rtype str
+  """
 
-      # add quiffen category
-      csv["category"] = quiffen.Category( dict["category"] )
+  return max(extractLiterals(regex), key=len, default="").lower()
 
-      # break from loop as a match has been made
-      break
 
-  return csv
+def skipEscape(regex, i):
+  """
+  Skip an alphanumeric escape sequence, including its arguments,
+  eg d, x61, u0061, N{DIGIT ONE}, 141 or 12 after the backslash
+
+  Keyword arguments:
+  :param str regex: regular expression
+  :param int i: index of character after backslash
+  :return index of first character after escape sequence
+  :rtype int
+  """
+
+  n = len(regex)
+  if i >= n:
+    return i
+
+  c = regex[i]
+  i += 1
+
+  # hexadecimal character code
+  if c in ESCAPEDIGITS:
+    return min(i + ESCAPEDIGITS[c], n)
+
+  # named character
+  if c == "N" and i < n and regex[i] == "{":
+    end = regex.find("}", i)
+    return n if end < 0 else end + 1
+
+  # octal character code or group reference; at most 3 digits
+  if c.isdigit():
+    start = i - 1
+    while i < n and i - start < 3 and regex[i].isdigit():
+      i += 1
+
+  return i
+
+
+def extractLiterals(regex):
+  """
+  Extract all literal strings which must occur, in this order, in any text matched by regex
+  eg ^.*makro.*benzine.*$ --> ["makro", "benzine"]
+
+  Parsing is conservative; any construct which is not understood ends the
+  current literal. If the regex contains a top level alternation or
+  verbose flag, no literals are returned. Literals of a group are only
+  used if the group is required and has no alternation, eg (?>.*?makro)
+
+  Keyword arguments:
+  :param str regex: regular expression
+  :return required literals, in case of regex; empty if there are none
+  :rtype list of str
+  """
+
+  # verbose flag ignores whitespace in regex; do not try to be clever
+  if re.search(r"\(\?[a-z]*x", regex):
+    return []
+
+  literals = []
+  current = ""
+  i = 0
+  n = len(regex)
+
+  while i < n:
+    c = regex[i]
+    i += 1
+
+    if c == "\\":
+      # \d, \s, \b, \1, \x61 etc are not literals; \. \- \  etc are
+      if i >= n or regex[i].isalnum():
+        literals.append(current)
+        current = ""
+        i = skipEscape(regex, i)
+        continue
+      c = regex[i]
+      i += 1
+
+    elif c == "|":
+      # top level alternation; no single required literal
+      return []
+
+    elif c == "[":
+      # skip character class, including []...] and [^]...]
+      if i < n and regex[i] == "^": i += 1
+      if i < n and regex[i] == "]": i += 1
+      while i < n and regex[i] != "]":
+        if regex[i] == "\\": i += 1
+        i += 1
+      i += 1
+      literals.append(current)
+      current = ""
+      continue
+
+    elif c == "(":
+      # skip group (may contain alternations)
+      start = i
+      depth = 1
+      while i < n and depth > 0:
+        if regex[i] == "\\": i += 1
+        elif regex[i] == "[":
+          i += 1
+          if i < n and regex[i] == "^": i += 1
+          if i < n and regex[i] == "]": i += 1
+          while i < n and regex[i] != "]":
+            if regex[i] == "\\": i += 1
+            i += 1
+        elif regex[i] == "(": depth += 1
+        elif regex[i] == ")": depth -= 1
+        i += 1
+      literals.append(current)
+      current = ""
+
+      # capturing, non capturing or atomic group which is not optional
+      group = regex[start:i - 1]
+      if group[:2] in ("?:", "?>"):
+        group = group[2:]
+      if not group.startswith("?") and (i >= n or regex[i] not in "*?{"):
+        literals.extend(extractLiterals(group))
+      continue
+
+    elif c in ".^$*+?{})":
+      # skip repetition count, eg {2,5}; digits are not literals
+      if c == "{":
+        while i < n and regex[i] != "}": i += 1
+        i += 1
+      literals.append(current)
+      current = ""
+      continue
+
+    # c is a literal character; check if it is followed by a quantifier
+    if i < n and regex[i] in "*?{":
+      # character is optional
+      literals.append(current)
+      current = ""
+    elif i < n and regex[i] == "+":
+      # character is required, but can be repeated
+      literals.append(current + c)
+      current = ""
+    else:
+      current += c
+
+  literals.append(current)
+  return [literal for literal in literals if len(literal) > 0]
+
+
+class AhoCorasick:
+  """
+  Aho-Corasick automaton; find all literals occurring in a text in one pass
+  """
+
+  def __init__(self, literals):
+    """
+    Keyword arguments:
+    :param list of str literals:
+    """
+
+    self.literals = literals
+
+    # state 0 is root; per state: transitions, failure link and output (literal ids)
+    self.__goto = [{}]
+    self.__fail = [0]
+    self.__output = [()]
+
+    for (id, literal) in enumerate(literals):
+      state = 0
+      for c in literal:
+        if c not in self.__goto[state]:
+          self.__goto.append({})
+          self.__fail.append(0)
+          self.__output.append(())
+          self.__goto[state][c] = len(self.__goto) - 1
+        state = self.__goto[state][c]
+      self.__output[state] += (id,)
+
+    # breadth first; determine failure links and merge output of failure state
+    queue = list(self.__goto[0].values())
+    for state in queue:
+      for (c, nextstate) in self.__goto[state].items():
+        queue.append(nextstate)
+        fail = self.__fail[state]
+        while fail and c not in self.__goto[fail]:
+          fail = self.__fail[fail]
+        fail = self.__goto[fail].get(c, 0)
+        self.__fail[nextstate] = fail
+        self.__output[nextstate] += self.__output[fail]
+
+  def search(self, text):
+    """
+    Return ids of all literals occurring in text
+
+    Keyword arguments:
+    :param str text:
+    :rtype set of int
+    """
+
+    goto = self.__goto
+    fail = self.__fail
+    output = self.__output
+
+    found = set()
+    state = 0
+    for c in text:
+      while state and c not in goto[state]:
+        state = fail[state]
+      state = goto[state].get(c, 0)
+      if output[state]:
+        found.update(output[state])
+    return found
+
+
+class RuleStatistics:
+  """
+  Per rule of categories.csv, for payee regex and memo regex: number of
+  evaluations, number of matches and cumulative match time
+
+  A regex is only evaluated when its literal occurs in payee/memo (see
+  CategoryMatcher), and rules are evaluated until the first match.
+  """
+
+  def __init__(self, nrofrules):
+    """
+    Keyword arguments:
+    :param int nrofrules: number of rules in categories.csv
+    """
+
+    # payeeregex/memoregex:list per rule of [evaluations, matches, nanoseconds]
+    self.counters = {"payeeregex": [[0, 0, 0] for i in range(nrofrules)],
+                     "memoregex": [[0, 0, 0] for i in range(nrofrules)]}
+
+  def count(self, key, index, matched, nanoseconds):
+    """
+    Count one evaluation of a regex
+
+    Keyword arguments:
+    :param str key: payeeregex or memoregex
+    :param int index: index of rule
+    :param bool matched: regex matched
+    :param int nanoseconds: match time
+    """
+
+    counters = self.counters[key][index]
+    counters[0] += 1
+    counters[1] += matched
+    counters[2] += nanoseconds
+
+  def merge(self, other):
+    """
+    Add statistics of a worker process (csv2qif --jobs)
+
+    Keyword arguments:
+    :param RuleStatistics other: statistics of same categories.csv
+    """
+
+    for (key, counters) in other.counters.items():
+      for (mine, theirs) in zip(self.counters[key], counters):
+        for i in range(3):
+          mine[i] += theirs[i]
+
+  def toDict(self, rules):
+    """
+    Statistics per rule; line is line number in categories.csv
+
+    Keyword arguments:
+    :param list of dict rules: rules as read from categories.csv
+    :rtype list of dict
+    """
+
+    result = []
+    for (index, rule) in enumerate(rules):
+      entry = {"line": index + 2, "payee": rule["payee"], "category": rule["category"]}
+      for key in ("payeeregex", "memoregex"):
+        (evaluations, matches, nanoseconds) = self.counters[key][index]
+        entry[key] = {"regex": rule[key], "evaluations": evaluations, "matches": matches, "seconds": nanoseconds / 1e9}
+      result.append(entry)
+    return result
+
+  def report(self, rules, jsonfile):
+    """
+    Log most expensive rules and rules which never matched; write all statistics to jsonfile
+
+    Keyword arguments:
+    :param list of dict rules: rules as read from categories.csv
+    :param str jsonfile: path + filename of JSON file
+    """
+
+    entries = self.toDict(rules)
+
+    # most expensive regexes first
+    regexes = [(entry, key) for entry in entries for key in ("payeeregex", "memoregex") if entry[key]["regex"]]
+    regexes.sort(key=lambda x: x[0][x[1]]["seconds"], reverse=True)
+
+    total = sum(entry[key]["seconds"] for (entry, key) in regexes)
+    unmatched = [entry["line"] for entry in entries
+                 if entry["payeeregex"]["matches"] + entry["memoregex"]["matches"] == 0]
+
+    logger.info(f"Rule statistics: {len(entries)} rules; {len(unmatched)} rules without match; match time {total:.3f} s")
+    for (entry, key) in regexes[:RULEREPORTSIZE]:
+      stats = entry[key]
+      logger.info(f"Rule line {entry['line']} {key} {stats['regex']} ({entry['category']}): "
+                  f"{stats['evaluations']} evaluations; {stats['matches']} matches; {stats['seconds'] * 1000:.3f} ms")
+    if unmatched:
+      logger.info(f"Rules without match, line: {', '.join(str(line) for line in unmatched)}")
+
+    try:
+      with open(jsonfile, mode='w', encoding='utf-8') as fp:
+        json.dump({"totalseconds": total, "rules": sorted(entries, key=lambda entry: entry["payeeregex"]["seconds"] + entry["memoregex"]["seconds"], reverse=True)},
+                  fp, indent=1)
+      logger.info(f"Rule statistics written to {jsonfile}")
+    except OSError as e:
+      logger.warning(f"Rule statistics file {jsonfile} can not be written: {e}")
+
+
+class CategoryMatcher:
+  """
+  Compiled set of category rules from categories.csv
+
+  Every regex is compiled once. From every regex the required literal
+  is extracted (see extractLiteral()) and all literals are put in an
+  Aho-Corasick index. Per transaction, only rules whose literal occurs in
+  payee/memo, and rules without a literal, are evaluated. Hence cost is
+  roughly independent of number of rules.
+  Rules are processed from top to bottom; first match wins. Within a rule,
+  payee is tested before memo.
+
+  Bank exports are dominated by recurring payees; results of categorize()
+  are kept in a LRU cache. Optionally, results are also kept in a cache file
+  (see loadCache()), which is only valid for the categories file it was
+  created with (see rulehash).
+
+  Optionally, evaluations, matches and match time are recorded per rule
+  (see enableStatistics()).
+  """
+
+  def __init__(self, category_regex, cachesize=CACHESIZE):
+    """
+    Keyword arguments:
+    :param list of dictionaries category_regex: rules as read from categories file
+    :param int cachesize: max number of cached categorize() results
+    """
+
+    self.rules = category_regex
+
+    # hash of the categories file; set by readCategory()
+    self.rulehash = ""
+
+    # results of previous runs; key:value --> transaction text:(payee, category, memo)
+    # None if no cache file is used
+    self.__store = None
+    self.storehits = 0
+    self.storemisses = 0
+
+    # results of __store used since last call of takeResults(), in order of first use
+    self.__used = {}
+
+    # per literal; list of rule indexes which require this literal
+    literals = {}
+
+    self.__payeeregex = self.__compile("payeeregex", literals)
+    self.__memoregex = self.__compile("memoregex", literals)
+
+    self.__index = AhoCorasick(list(literals))
+    self.__literalrules = list(literals.values())
+
+    self.categorize = functools.lru_cache(maxsize=cachesize)(self.__categorize)
+
+    # per rule statistics; None if disabled
+    self.statistics = None
+
+  def enableStatistics(self):
+    """
+    Record evaluations, matches and match time per rule (see RuleStatistics)
+    Results are not cached; every transaction is matched against the rules
+    """
+
+    self.statistics = RuleStatistics(len(self.rules))
+    self.categorize = functools.lru_cache(maxsize=0)(self.__categorizeUncached)
+
+  def takeStatistics(self):
+    """
+    Return per rule statistics since previous call
+    Used to collect statistics of worker processes (see csv2qif --jobs)
+
+    :return None if statistics are disabled
+    :rtype RuleStatistics
+    """
+
+    statistics = self.statistics
+    if statistics is not None:
+      self.statistics = RuleStatistics(len(self.rules))
+    return statistics
+
+  def mergeStatistics(self, statistics):
+    """
+    Add per rule statistics of another CategoryMatcher (worker process)
+
+    Keyword arguments:
+    :param RuleStatistics statistics: as returned by takeStatistics()
+    """
+
+    if self.statistics is not None and statistics is not None:
+      self.statistics.merge(statistics)
+
+  def __compile(self, key, literals):
+    """
+    Compile regex of all rules for key, and index their required literal
+
+    Keyword arguments:
+    :param str key: payeeregex or memoregex
+    :param dict literals: literal:[(key, index of rule)]; updated
+    :return (dictionary index of rule:compiled regex, list of index of rules without literal)
+    :rtype tuple
+    """
+
+    compiled = {}
+    noliteral = []
+
+    for (index, rule) in enumerate(self.rules):
+      # payee/memo is lowercased (see match()); regex is not, as escape sequences are case sensitive
+      regex = rule[key]
+      if len(regex) == 0: continue
+
+      compiled[index] = re.compile(regex, re.IGNORECASE)
+
+      literal = extractLiteral(regex)
+      if len(literal) > 0:
+        literals.setdefault(literal, []).append((key, index))
+      else:
+        noliteral.append(index)
+
+    return (compiled, noliteral)
+
+  def __candidates(self, text, regex, key):
+    """
+    Return index of all rules which might match text
+
+    Keyword arguments:
+    :param str text: lowercase payee or memo
+    :param tuple regex: as returned by __compile()
+    :param str key: payeeregex or memoregex
+    :rtype sorted list of int
+    """
+
+    candidates = set(regex[1])
+    for id in self.__index.search(text):
+      for (rulekey, index) in self.__literalrules[id]:
+        if rulekey == key:
+          candidates.add(index)
+    return sorted(candidates)
+
+  def __categorize(self, payee, memo, toaccount):
+    """
+    Resolve payee, category and memo of a transaction
+    Use categorize(), which is the cached version of this method
+
+    Keyword arguments:
+    :param str payee: sanitized payee
+    :param str memo: sanitized memo
+    :param str toaccount: to account of transaction
+    :return (new payee, category name, new memo) or None if there is no match
+    :rtype tuple
+    """
+
+    if self.__store is not None:
+      key = "\x1f".join((payee, memo, toaccount))
+      if key in self.__store:
+        self.storehits += 1
+        result = self.__store[key]
+        self.__used[key] = result
+        return tuple(result) if result is not None else None
+      self.storemisses += 1
+      result = self.__resolve(payee, memo)
+      self.__store[key] = result
+      self.__used[key] = result
+      return result
+
+    return self.__resolve(payee, memo)
+
+  def __categorizeUncached(self, payee, memo, toaccount):
+    """
+    Resolve payee, category and memo of a transaction; results of previous runs are not used
+    See __categorize()
+    """
+
+    return self.__resolve(payee, memo)
+
+  def __resolve(self, payee, memo):
+    """
+    Resolve payee, category and memo of a transaction with the category rules
+
+    Keyword arguments:
+    :param str payee: sanitized payee
+    :param str memo: sanitized memo
+    :return (new payee, category name, new memo) or None if there is no match
+    :rtype tuple
+    """
+
+    (rule, field) = self.match(payee, memo)
+    if rule is None:
+      return None
+
+    # append payee to memo before payee is modified
+    newmemo = payee + "||" + memo
+
+    # Update payee; for a memo match only if one is prescribed
+    if field == "payee" or len(rule["payee"]) > 0:
+      payee = rule["payee"]
+
+    return (payee, rule["category"], newmemo)
+
+  def cacheInfo(self):
+    """
+    Return statistics of the categorize() cache
+
+    :return (hits, misses, maxsize, currsize)
+    :rtype namedtuple
+    """
+
+    return self.categorize.cache_info()
+
+  def loadCache(self, cachefile):
+    """
+    Load categorization results of previous runs.
+    Results are discarded when the categories file has changed since.
+
+    Keyword arguments:
+    :param str cachefile: path + filename of cache file
+    """
+
+    self.__store = {}
+
+    try:
+      with open(cachefile, mode='r', encoding='utf-8') as fp:
+        cache = json.load(fp)
+    except FileNotFoundError:
+      logger.debug(f"Cache file {cachefile} does not exist")
+      return
+    except (OSError, ValueError) as e:
+      logger.warning(f"Cache file {cachefile} can not be read, ignored: {e}")
+      return
+
+    if cache.get("rulehash") != self.rulehash:
+      logger.info(f"Categories changed; cache file {cachefile} is invalidated")
+      return
+
+    self.__store = cache.get("results", {})
+    logger.debug(f"Loaded {len(self.__store)} results from cache file {cachefile}")
+
+  def takeResults(self):
+    """
+    Return results of the cache used since previous call; new results and results of previous runs
+    Used to collect results of worker processes (see csv2qif --jobs)
+
+    :return key:value --> transaction text:(payee, category, memo)
+    :rtype dict
+    """
+
+    used = self.__used
+    self.__used = {}
+    return used
+
+  def mergeResults(self, results, storehits=0, storemisses=0):
+    """
+    Add results of another CategoryMatcher (worker process) to the cache
+
+    Keyword arguments:
+    :param dict results: as returned by takeResults()
+    :param int storehits: cache hits in worker
+    :param int storemisses: cache misses in worker
+    """
+
+    if self.__store is None:
+      return
+
+    self.__store.update(results)
+    self.__used.update(results)
+    self.storehits += storehits
+    self.storemisses += storemisses
+
+  def saveCache(self, cachefile):
+    """
+    Save categorization results for next runs
+    Not written if there are no new results; at most STORESIZE results are kept,
+    results used in this run last
+
+    Keyword arguments:
+    :param str cachefile: path + filename of cache file
+    """
+
+    if self.__store is None:
+      return
+
+    logger.info(f"Category cache file: {self.storehits} hits; {self.storemisses} misses")
+
+    if self.storemisses == 0:
+      logger.debug(f"No new results; cache file {cachefile} is not written")
+      return
+
+    # order of cache file is order of use; results of this run follow unused results of previous runs
+    results = {key: result for (key, result) in self.__store.items() if key not in self.__used}
+    results.update(self.__used)
+    if len(results) > STORESIZE:
+      results = dict(itertools.islice(results.items(), len(results) - STORESIZE, None))
+
+    # write to temporary file first; never leave a truncated cache file
+    try:
+      with open(cachefile + ".tmp", mode='w', encoding='utf-8') as fp:
+        json.dump({"rulehash": self.rulehash, "results": results}, fp)
+      os.replace(cachefile + ".tmp", cachefile)
+    except OSError as e:
+      logger.warning(f"Cache file {cachefile} can not be written: {e}")
+
+  def match(self, payee, memo):
+    """
+    Find first rule matching payee or memo
+
+    Keyword arguments:
+    :param str payee:
+    :param str memo:
+    :return (rule, "payee" or "memo") or (None, None) if there is no match
+    :rtype tuple
+    """
+
+    payeeindex = None
+    memoindex = None
+
+    # only try to match if there is a payee / memo
+    if len(payee) > 0:
+      payee = payee.lower()
+      for index in self.__candidates(payee, self.__payeeregex, "payeeregex"):
+        if self.__test(self.__payeeregex[0][index], payee, "payeeregex", index):
+          payeeindex = index
+          break
+
+    if len(memo) > 0:
+      memo = memo.lower()
+      for index in self.__candidates(memo, self.__memoregex, "memoregex"):
+        # payee regex of a rule is tested before memo regex of same rule
+        if payeeindex is not None and index >= payeeindex: break
+        if self.__test(self.__memoregex[0][index], memo, "memoregex", index):
+          memoindex = index
+          break
+
+    if memoindex is not None:
+      return (self.rules[memoindex], "memo")
+    if payeeindex is not None:
+      return (self.rules[payeeindex], "payee")
+    return (None, None)
+
+  def __test(self, regex, text, key, index):
+    """
+    Match regex of a rule; counted if statistics are enabled
+
+    Keyword arguments:
+    :param re.Pattern regex: compiled regex of rule
+    :param str text: lowercase payee or memo
+    :param str key: payeeregex or memoregex
+    :param int index: index of rule
+    :rtype bool
+    """
+
+    if self.statistics is None:
+      return regex.match(text) is not None
+
+    start = time.perf_counter_ns()
+    matched = regex.match(text) is not None
+    self.statistics.count(key, index, matched, time.perf_counter_ns() - start)
+    return matched
 
 
 
@@ -162,13 +873,17 @@ def readCategory(categoryscv):
 
   Keyword arguments:
   :param str categoryscv: filename csv file with all category regex-es.
-  :return list of dictionaries regular expressions for payee and memo
-  :rtype list of dictionaries
+  :return compiled regular expressions for payee and memo
+  :rtype CategoryMatcher
   """
 
   category_regex = []
   category_dict = {}
 
+  # hash of content; to invalidate results cached with older categories
+  with open(categoryscv, mode='rb') as fp:
+    rulehash = hashlib.sha256(fp.read()).hexdigest()
+
   with open(categoryscv, newline='', mode='r', encoding='latin1') as csvfp:
     csvIn = csv.reader(csvfp, delimiter=",")  # create csv object using the given separator
 
@@ -183,7 +898,7 @@ def readCategory(categoryscv):
       category_dict["memoregex"] = row[3]
       category_regex.append(category_dict.copy())
 
-  return category_regex
-
-
+  category_matcher = CategoryMatcher(category_regex)
+  category_matcher.rulehash = rulehash
+  return category_matcher
 
@@ -0,0 +1,658 @@
+#!/usr/bin/python3
+
+
+"""
+Description
+-----------
+
+Static analysis of categories.csv
+
+Rules are matched from top to bottom against payee and memo of every
+transaction; first match wins (see categories.CategoryMatcher). This
+script reports rules which are slow or which can never apply:
+- backtracking: every regex is timed against adversarial payees/memos of
+  growing length (required literals in the wrong order, repeated partial
+  matches). A regex is reported when its match time grows faster than
+  linear, eg ^.*Makro.*Benzine.*$, or exceeds TIMEOUT
+- duplicate: same regex as an earlier rule
+- shadowed: every payee/memo matched by the regex is also matched by the
+  regex of an earlier rule, eg ^.*AH Filiaal.*$ after ^.*AH.*$
+- suggestion: an equivalent, cheaper form of a regex. Every suggestion is
+  checked against sample payees/memos and timed
+
+Shadowing is detected for regex of the form ^P0.*P1.* ... .*Pn$, with
+literal P0..Pn (most rules), and for exact payees/memos (^Pn$); other
+regex are only checked for duplicates.
+
+usage:
+  checkcategories.py [--categories FILE] [--length N] [--timeout SECONDS] [--json FILE]
+
+Exit status is 1 if a rule backtracks, is duplicate, shadowed or empty; 0 otherwise.
+
+
+        This program is free software: you can redistribute it and/or modify
+        it under the terms of the GNU General Public License as published by
+        the Free Software Foundation, either version 3 of the License, or
+        (at your option) any later version.
+
+        This program is distributed in the hope that it will be useful,
+        but WITHOUT ANY WARRANTY; without even the implied warranty of
+        MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+        GNU General Public License for more details.
+
+        You should have received a copy of the GNU General Public License
+        along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+
+# local imports
+import categories
+from log import logger
+import logging
+
+BASEPATH = os.path.dirname(os.path.realpath(__file__))
+
+# Length of adversarial payees/memos; ING memos are up to a few hundred characters
+LENGTH = 1024
+
+# Lengths are increased until a single match takes longer than TIMEOUT seconds
+TIMEOUT = 0.05
+
+# A regex backtracks if its match time grows with at least length ** GROWTH
+GROWTH = 1.5
+
+# Match times below NOISE seconds are not used to estimate growth
+NOISE = 0.00002
+
+# Number of measurements per adversarial payee/memo; fastest is used
+REPEAT = 3
+
+# A suggestion for a regex which does not backtrack is only printed if it is SPEEDUP times faster
+SPEEDUP = 10.0
+
+# Length of adversarial payees/memos to check suggestions with
+SAMPLELENGTH = 64
+
+# Last character of adversarial payees/memos; makes matches fail at the end
+TAIL = "\x01"
+
+# Atomic groups are supported as of python 3.11
+try:
+  re.compile("(?>a)")
+  ATOMIC = True
+except re.error:
+  ATOMIC = False
+
+
+class Regex:
+  """
+  Payee or memo regex of a rule, compiled as CategoryMatcher does
+  """
+
+  def __init__(self, rules, index, key):
+    """
+    Keyword arguments:
+    :param list of dictionaries rules: rules as read from categories file
+    :param int index: index of rule
+    :param str key: payeeregex or memoregex
+    """
+
+    self.index = index
+    self.key = key
+    self.regex = rules[index][key]
+    self.category = rules[index]["category"]
+
+    # line in categories file; first line is header
+    self.line = index + 2
+
+    # payee/memo is lowercased (see CategoryMatcher.match())
+    self.compiled = re.compile(self.regex, re.IGNORECASE)
+    self.pattern = parsePattern(self.regex.lower())
+
+  def __str__(self):
+    return f"line {self.line} {self.key} {self.regex}"
+
+
+class Timing:
+  """
+  Worst match time of a regex against adversarial payees/memos
+  """
+
+  def __init__(self, length, seconds, growth, text):
+    """
+    Keyword arguments:
+    :param int length: length of adversarial payee/memo
+    :param float seconds: match time
+    :param float growth: match time grows with length ** growth
+    :param str text: adversarial payee/memo
+    """
+
+    self.length = length
+    self.seconds = seconds
+    self.growth = growth
+    self.text = text
+
+  def timedOut(self):
+    return self.seconds > TIMEOUT
+
+  def backtracks(self):
+    return self.timedOut() or self.growth >= GROWTH
+
+  def __lt__(self, other):
+    # timed out at a shorter length is worse
+    return (self.timedOut(), -self.length if self.timedOut() else 0, self.seconds) < \
+           (other.timedOut(), -other.length if other.timedOut() else 0, other.seconds)
+
+  def __str__(self):
+    text = f"{self.seconds * 1000:.3f} ms at {self.length} characters"
+    if self.timedOut():
+      return text + "; timed out"
+    return text + f"; grows with length^{self.growth:.1f}"
+
+
+def escape(literal):
+  """
+  Escape special characters of a literal; unlike re.escape, spaces are not escaped
+
+  :rtype str
+  """
+
+  return re.sub(r"([.^$*+?{}\[\]()|\\])", r"\\\1", literal)
+
+
+def parsePattern(regex):
+  """
+  Parse a regex of the form ^P0.*P1.* ... .*Pn$ with literal P0..Pn
+  re.match() matches at the start; ^ is optional
+
+  Keyword arguments:
+  :param str regex: lowercase regex
+  :return ([P0, ..., Pn], anchored at end) or None if regex has another form
+  :rtype tuple
+  """
+
+  pieces = [""]
+  end = False
+
+  i = 1 if regex.startswith("^") else 0
+  n = len(regex)
+  while i < n:
+    c = regex[i]
+
+    if c == "\\":
+      # \d, \s, \b etc are not literals
+      if i + 1 >= n or regex[i + 1].isalnum():
+        return None
+      pieces[-1] += regex[i + 1]
+      i += 2
+    elif regex.startswith(".*", i):
+      # .*? matches the same payees/memos
+      i += 3 if regex.startswith(".*?", i) else 2
+      pieces.append("")
+    elif c == "$" and i == n - 1:
+      end = True
+      i += 1
+    elif c in ".^$*+?{}[]()|":
+      return None
+    else:
+      pieces[-1] += c
+      i += 1
+
+  # trailing .* matches any end
+  if pieces[-1] == "" and len(pieces) > 1:
+    end = False
+
+  return (pieces, end)
+
+
+def covers(outer, inner):
+  """
+  Check whether every payee/memo matched by inner is matched by outer
+  Result is conservative; False if it can not be determined
+
+  Keyword arguments:
+  :param Regex outer: regex of earlier rule
+  :param Regex inner: regex of later rule
+  :rtype bool
+  """
+
+  if inner.pattern is None:
+    return False
+  (innerpieces, innerend) = inner.pattern
+
+  # inner matches one payee/memo only (^Pn$)
+  if len(innerpieces) == 1 and innerend:
+    return outer.compiled.match(innerpieces[0]) is not None
+
+  if outer.pattern is None:
+    return False
+  (outerpieces, outerend) = outer.pattern
+
+  # last piece of outer has to end the payee/memo; a distinct last piece of inner is needed
+  if outerend:
+    if not innerend or len(outerpieces) == 1 or len(innerpieces) == 1:
+      return False
+    if not innerpieces[-1].endswith(outerpieces[-1]):
+      return False
+    innerpieces = innerpieces[:-1] + [innerpieces[-1][:len(innerpieces[-1]) - len(outerpieces[-1])]]
+    outerpieces = outerpieces[:-1]
+
+  # first piece of outer has to start the payee/memo
+  if not innerpieces[0].startswith(outerpieces[0]):
+    return False
+
+  # other pieces of outer have to occur in pieces of inner, in order
+  j = 0
+  position = len(outerpieces[0])
+  for piece in outerpieces[1:]:
+    if piece == "":
+      continue
+    while j < len(innerpieces):
+      found = innerpieces[j].find(piece, position)
+      if found >= 0:
+        position = found + len(piece)
+        break
+      j += 1
+      position = 0
+    else:
+      return False
+
+  return True
+
+
+def adversarialTexts(regex):
+  """
+  Return generators of payees/memos on which a regex may backtrack
+  Every payee/memo contains the longest required literal of the regex, as
+  otherwise CategoryMatcher does not evaluate the regex
+
+  Keyword arguments:
+  :param str regex: regex as in categories file
+  :return functions which return an adversarial payee/memo of given length
+  :rtype list of function
+  """
+
+  head = categories.extractLiteral(regex)
+
+  # required literals; otherwise words of regex, eg alternatives of a group
+  # payees/memos are lowercase (see CategoryMatcher.match())
+  literals = [literal.lower() for literal in categories.extractLiterals(regex)]
+  if len(literals) == 0:
+    literals = re.findall(r"[a-z0-9]+", re.sub(r"\\.", " ", regex).lower())
+  if len(literals) == 0:
+    literals = ["a"]
+
+  # repeated units: literals without the last one, first literal, partial last literal, single characters
+  units = []
+  if len(literals) > 1:
+    units.append(" ".join(literals[:-1]) + " ")
+  units.append(literals[0] + " ")
+  if len(literals[-1]) > 1:
+    units.append(literals[-1][:-1] + " ")
+  units.extend(sorted(set("a0 " + "".join(literal[0] for literal in literals))))
+
+  # required literal before or after the repeated unit
+  texts = []
+  for unit in dict.fromkeys(units):
+    def before(length, unit=unit):
+      body = unit * (length // len(unit) + 1)
+      if len(head) > 0:
+        body = head + " " + body
+      return body[:length - 1] + TAIL
+    texts.append(before)
+
+    if len(head) > 0:
+      def after(length, unit=unit):
+        body = unit * (length // len(unit) + 1)
+        return body[:max(length - len(head) - 1, 0)] + head + TAIL
+      texts.append(after)
+  return texts
+
+
+def sampleTexts(regex):
+  """
+  Return payees/memos to compare matches of equivalent regex
+  Adversarial payees/memos, and if regex is of the form ^P0.*P1.* ... .*Pn$
+  payees/memos which match
+
+  Keyword arguments:
+  :param Regex regex: original regex
+  :rtype list of str
+  """
+
+  texts = [text(SAMPLELENGTH) for text in adversarialTexts(regex.regex)]
+  texts.extend(text(SAMPLELENGTH)[:-1] for text in adversarialTexts(regex.regex))
+
+  if regex.pattern is not None:
+    (pieces, end) = regex.pattern
+    for separator in ("", " ", " x "):
+      text = separator.join(pieces)
+      texts.extend([text, text + " x", "x " + text, text[:-1], text[1:]])
+
+  return texts
+
+
+def sizes(length):
+  """
+  Lengths of adversarial payees/memos; small steps first, as exponential backtracking explodes quickly
+
+  :rtype list of int
+  """
+
+  sizes = list(range(8, min(length, 32), 2))
+  size = 32
+  while size < length:
+    sizes.append(size)
+    size *= 2
+  sizes.append(length)
+  return sizes
+
+
+def timeMatch(compiled, text):
+  """
+  Return fastest of REPEAT match times
+
+  :rtype float
+  """
+
+  best = None
+  for i in range(REPEAT):
+    start = time.perf_counter()
+    compiled.match(text)
+    seconds = time.perf_counter() - start
+    best = seconds if best is None else min(best, seconds)
+    if seconds > TIMEOUT:
+      break
+  return best
+
+
+def growth(points):
+  """
+  Estimate exponent of match time as function of length
+  Least squares fit of log(seconds) on log(length) of measurements above
+  NOISE; 1.0 if there are not enough measurements
+
+  Keyword arguments:
+  :param list of tuple points: (length, seconds)
+  :rtype float
+  """
+
+  points = [(math.log(length), math.log(seconds)) for (length, seconds) in points if seconds >= NOISE]
+  if len(points) < 3:
+    return 1.0
+
+  meanx = sum(x for (x, y) in points) / len(points)
+  meany = sum(y for (x, y) in points) / len(points)
+  variance = sum((x - meanx) ** 2 for (x, y) in points)
+  if variance == 0:
+    return 1.0
+  return sum((x - meanx) * (y - meany) for (x, y) in points) / variance
+
+
+def timeRegex(regex, compiled, length):
+  """
+  Time a regex against adversarial payees/memos of growing length
+
+  Keyword arguments:
+  :param str regex: regex as in categories file
+  :param re.Pattern compiled: compiled regex
+  :param int length: maximum length of payee/memo
+  :return worst timing
+  :rtype Timing
+  """
+
+  worst = None
+  for text in adversarialTexts(regex):
+    points = []
+    for size in sizes(length):
+      seconds = timeMatch(compiled, text(size))
+      points.append((size, seconds))
+      if seconds > TIMEOUT:
+        break
+
+    timing = Timing(points[-1][0], points[-1][1], growth(points), text(points[-1][0]))
+    if worst is None or worst < timing:
+      worst = timing
+  return worst
+
+
+def suggestions(regex):
+  """
+  Return cheaper forms of a regex, as matched by re.match() on a single line payee/memo
+  - ^.*Makro.*Benzine.*$ --> ^(?>.*?Makro)(?>.*?Benzine); first occurrence of every literal is used, no backtracking
+  - trailing .*$ is not needed, as re.match() does not have to match the whole payee/memo
+
+  Keyword arguments:
+  :param Regex regex: original regex
+  :rtype list of str
+  """
+
+  result = []
+
+  pattern = parsePattern(regex.regex)
+  if ATOMIC and pattern is not None:
+    (pieces, end) = pattern
+    middle = [piece for piece in pieces[1:-1] if piece != ""]
+    if len(middle) >= 2 or (len(middle) == 1 and end):
+      suggestion = "^" + escape(pieces[0]) + "".join(f"(?>.*?{escape(piece)})" for piece in middle)
+      if end:
+        suggestion += f".*{escape(pieces[-1])}$"
+      elif pieces[-1] != "":
+        suggestion += f"(?>.*?{escape(pieces[-1])})"
+      result.append(suggestion)
+
+  # trailing .*$ or .*; the . is not escaped
+  for tail in (".*$", ".*"):
+    if regex.regex.endswith(tail):
+      rest = regex.regex[:-len(tail)]
+      escaped = len(rest) - len(rest.rstrip("\\"))
+      if escaped % 2 == 0 and rest not in ("", "^") and rest[-1] not in "|(":
+        result.append(rest)
+      break
+
+  return [suggestion for suggestion in result if suggestion != regex.regex]
+
+
+def checkSuggestion(regex, suggestion, timing, length):
+  """
+  Check that a suggestion matches the same payees/memos, keeps the required
+  literal (see CategoryMatcher), and time it
+
+  Keyword arguments:
+  :param Regex regex: original regex
+  :param str suggestion: suggested regex
+  :param Timing timing: timing of original regex
+  :param int length: maximum length of payee/memo
+  :return speedup; None if suggestion is not equivalent
+  :rtype float
+  """
+
+  try:
+    compiled = re.compile(suggestion, re.IGNORECASE)
+  except re.error:
+    return None
+
+  for text in sampleTexts(regex):
+    if (regex.compiled.match(text) is None) != (compiled.match(text) is None):
+      logger.debug(f"Suggestion {suggestion} for {regex} differs on {text!r}")
+      return None
+
+  if len(categories.extractLiteral(suggestion)) < len(categories.extractLiteral(regex.regex)):
+    return None
+
+  # time suggestion on the worst payee/memo of the original regex
+  seconds = timeMatch(compiled, timing.text)
+  return timing.seconds / seconds if seconds > 0 else float("inf")
+
+
+def analyze(rules, length):
+  """
+  Analyze all rules
+
+  Keyword arguments:
+  :param list of dictionaries rules: rules as read from categories file
+  :param int length: length of adversarial payees/memos
+  :return findings; key:value --> kind:list of dictionaries
+  :rtype dict
+  """
+
+  findings = {"backtracking": [], "duplicate": [], "shadowed": [], "suggestion": [], "empty": []}
+
+  def finding(kind, regex, **details):
+    findings[kind].append({"line": regex.line, "key": regex.key, "regex": regex.regex,
+                           "category": regex.category, **details})
+
+  regexes = {"payeeregex": [], "memoregex": []}
+  for (index, rule) in enumerate(rules):
+    if len(rule["payeeregex"]) == 0 and len(rule["memoregex"]) == 0:
+      findings["empty"].append({"line": index + 2, "category": rule["category"]})
+    for key in regexes:
+      if len(rule[key]) > 0:
+        regexes[key].append(Regex(rules, index, key))
+
+  for (key, keyregexes) in regexes.items():
+    # duplicates
+    first = {}
+    duplicates = set()
+    for regex in keyregexes:
+      original = first.setdefault(regex.regex.lower(), regex)
+      if original is not regex:
+        duplicates.add(regex.index)
+        finding("duplicate", regex, earlier=original.line, earliercategory=original.category)
+
+    # shadowed; candidates are earlier regex whose required literal occurs in the later regex
+    earlier = [regex for regex in keyregexes if regex.pattern is not None]
+    literals = [categories.extractLiteral(regex.regex) for regex in earlier]
+    index = categories.AhoCorasick(literals)
+    noliteral = [regex for (regex, literal) in zip(earlier, literals) if literal == ""]
+    for regex in keyregexes:
+      if regex.index in duplicates or regex.pattern is None:
+        continue
+
+      (pieces, end) = regex.pattern
+      if len(pieces) == 1 and end:
+        # exact payee/memo; every earlier regex can match it
+        candidates = keyregexes
+      else:
+        candidates = noliteral + [earlier[id] for id in index.search("\x1f".join(pieces))]
+
+      for outer in sorted(candidates, key=lambda outer: outer.index):
+        if outer.index >= regex.index:
+          break
+        if outer.regex.lower() != regex.regex.lower() and covers(outer, regex):
+          finding("shadowed", regex, earlier=outer.line, earlierregex=outer.regex, earliercategory=outer.category)
+          break
+
+    # backtracking and suggestions
+    for regex in keyregexes:
+      timing = timeRegex(regex.regex, regex.compiled, length)
+      if timing.backtracks():
+        finding("backtracking", regex, length=timing.length, seconds=timing.seconds,
+                growth=round(timing.growth, 2), timedout=timing.timedOut(), description=str(timing))
+
+      for suggestion in suggestions(regex):
+        speedup = checkSuggestion(regex, suggestion, timing, length)
+        if speedup is not None and speedup > 1:
+          finding("suggestion", regex, suggestion=suggestion, speedup=round(speedup, 1),
+                  backtracking=timing.backtracks())
+          break
+
+  for kind in findings:
+    findings[kind].sort(key=lambda finding: (finding["line"], finding.get("key", "")))
+  return findings
+
+
+def report(rules, findings):
+  """
+  Print findings
+
+  Keyword arguments:
+  :param list of dictionaries rules: rules as read from categories file
+  :param dict findings: as returned by analyze()
+  """
+
+  print(f"{len(rules)} rules")
+
+  if findings["backtracking"]:
+    print("\nBacktracking; match time grows faster than linear with length of payee/memo:")
+    for finding in findings["backtracking"]:
+      print(f"  line {finding['line']} {finding['key']} {finding['regex']}: {finding['description']}")
+
+  if findings["duplicate"]:
+    print("\nDuplicate; same regex as an earlier rule:")
+    for finding in findings["duplicate"]:
+      conflict = "" if finding["category"] == finding["earliercategory"] else \
+                 f"; never {finding['category']}, line {finding['earlier']} is {finding['earliercategory']}"
+      print(f"  line {finding['line']} {finding['key']} {finding['regex']}: duplicate of line {finding['earlier']}{conflict}")
+
+  if findings["shadowed"]:
+    print("\nShadowed; never applies, as an earlier rule matches first:")
+    for finding in findings["shadowed"]:
+      conflict = "" if finding["category"] == finding["earliercategory"] else \
+                 f"; never {finding['category']}, line {finding['earlier']} is {finding['earliercategory']}"
+      print(f"  line {finding['line']} {finding['key']} {finding['regex']}: "
+            f"line {finding['earlier']} {finding['earlierregex']}{conflict}")
+
+  if findings["empty"]:
+    print("\nEmpty; neither payee regex nor memo regex:")
+    print("  line " + ", ".join(str(finding["line"]) for finding in findings["empty"]))
+
+  # minor suggestions (eg trailing .*$) are counted only
+  major = [finding for finding in findings["suggestion"] if finding["backtracking"] or finding["speedup"] >= SPEEDUP]
+  if major:
+    print("\nSuggestion; equivalent, cheaper regex:")
+    for finding in major:
+      print(f"  line {finding['line']} {finding['key']} {finding['regex']} --> {finding['suggestion']} "
+            f"({finding['speedup']}x faster)")
+
+  minor = [finding for finding in findings["suggestion"] if finding not in major]
+  if minor:
+    print(f"\n{len(minor)} more regex have a cheaper form, less than {SPEEDUP:.0f}x faster (eg trailing .*$ is not needed); "
+          f"eg line {minor[0]['line']} {minor[0]['regex']} --> {minor[0]['suggestion']}")
+
+
+"""
+------------------------------------------------------------------------------------
+ Entry point
+------------------------------------------------------------------------------------
+"""
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description="Report slow, duplicate and shadowed rules of categories.csv")
+  parser.add_argument("--categories", default=BASEPATH + "/categories.csv", metavar="FILE",
+                      help="categories file (default categories.csv)")
+  parser.add_argument("--length", type=int, default=LENGTH, metavar="N",
+                      help=f"length of adversarial payees/memos (default {LENGTH})")
+  parser.add_argument("--timeout", type=float, default=TIMEOUT, metavar="SECONDS",
+                      help=f"report a regex when a single match takes longer (default {TIMEOUT})")
+  parser.add_argument("--json", metavar="FILE",
+                      help="write findings to FILE")
+  args = parser.parse_args()
+
+  # findings are printed; only log warnings and errors
+  logger.setLevel(logging.WARNING)
+
+  TIMEOUT = args.timeout
+
+  try:
+    category_regex = categories.readCategory(args.categories)
+  except re.error as e:
+    logger.error(f"Regex {e.pattern} of {args.categories} can not be compiled: {e}")
+    sys.exit(2)
+
+  findings = analyze(category_regex.rules, args.length)
+  report(category_regex.rules, findings)
+
+  if args.json:
+    with open(args.json, mode='w', encoding='utf-8') as fp:
+      json.dump(findings, fp, indent=2)
+
+  # suggestions only, are not a reason to fail
+  sys.exit(1 if any(findings[kind] for kind in findings if kind != "suggestion") else 0)
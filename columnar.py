@@ -0,0 +1,430 @@
+#!/usr/bin/python3
+
+
+"""
+Description
+-----------
+
+Columnar (batch) parsing of bank csv files, backed by NumPy
+
+A csv file is read column wise: amounts as int64 cents, dates as
+datetime64, account and counterparty as categorical codes. Decimal comma
+conversion, sign flipping and date range filtering run vectorized over
+the whole file, instead of per row string/float round trips.
+
+Only parsers listed in BATCHPARSERS have a columnar version; NumPy is an
+optional dependency, only needed for csv2qif --columnar.
+
+
+        This program is free software: you can redistribute it and/or modify
+        it under the terms of the GNU General Public License as published by
+        the Free Software Foundation, either version 3 of the License, or
+        (at your option) any later version.
+
+        This program is distributed in the hope that it will be useful,
+        but WITHOUT ANY WARRANTY; without even the implied warranty of
+        MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+        GNU General Public License for more details.
+
+        You should have received a copy of the GNU General Public License
+        along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import operator
+
+# optional dependency; imported by loadNumpy(), as importing numpy is slow
+np = None
+
+# logging
+import __main__
+import logging
+import os
+
+script=os.path.basename(__main__.__file__)
+script=os.path.splitext(script)[0]
+logger = logging.getLogger(script + "." +  __name__)
+
+# local imports
+from amount import parseCents, roundCents
+import parsebank
+from transaction import Transaction, Investment
+from dates import DateParser
+
+# Characters of whole part and decimals of an amount converted column wise (see toCents())
+DIGITS = "0123456789"
+
+
+def loadNumpy():
+  """
+  Import numpy, once
+
+  :return False if numpy is not installed
+  :rtype bool
+  """
+
+  global np
+  if np is None:
+    try:
+      import numpy
+    except ImportError:
+      return False
+    np = numpy
+  return True
+
+
+def toCents(amounts, decimalcomma=True, rounded=False):
+  """
+  Convert amounts to integer cents
+  25.400,05 --> 2540005 (decimalcomma)
+  25400.05 --> 2540005
+
+  Keyword arguments:
+  :param list of str amounts: amounts as in csv file
+  :param bool decimalcomma: amounts use decimal comma and thousand points
+  :param bool rounded: round more than 2 decimals half even (see amount.roundCents()) iso raise ValueError
+  :return cents; same as amount.parseCents() per amount
+  :rtype numpy array of int64
+  :raise ValueError: no amount, or more than 2 (non zero) decimals
+  """
+
+  amounts = np.asarray(amounts, dtype=str)
+  # numpy string functions do not accept empty arrays
+  if amounts.size == 0:
+    return np.zeros(0, dtype=np.int64)
+
+  text = np.char.strip(amounts)
+
+  if decimalcomma:
+    # remove thousand separators
+    parts = np.char.partition(np.char.replace(text, ".", ""), ",")
+  else:
+    parts = np.char.partition(np.char.replace(text, ",", ""), ".")
+
+  whole = parts[:, 0]
+  negative = np.char.startswith(whole, "-")
+  unsigned = np.char.lstrip(whole, "+-")
+  fraction = parts[:, 2]
+
+  # common case: one sign at most, digits and at most 2 decimals (trailing zeros are fine, eg 1.2300)
+  # other amounts, eg 12,5% or without amount, are converted one by one; same values and errors
+  simple = ((np.char.str_len(whole) - np.char.str_len(unsigned) <= 1) &
+            (np.char.strip(unsigned, DIGITS) == "") & (np.char.strip(fraction, DIGITS) == "") &
+            ((unsigned != "") | (fraction != "")) &
+            (np.char.str_len(unsigned) <= 16) &  # fits int64 in cents
+            (np.char.str_len(np.char.rstrip(fraction, "0")) <= 2))
+
+  unsigned[~simple | (unsigned == "")] = "0"
+
+  # two decimals; pad with 0
+  fraction[~simple] = ""
+  fraction = np.char.ljust(fraction, 2, "0").astype("<U2")
+
+  cents = unsigned.astype(np.int64) * 100 + fraction.astype(np.int64)
+  cents[negative] *= -1
+
+  convert = roundCents if rounded else parseCents
+  for i in np.nonzero(~simple)[0]:
+    cents[i] = convert(str(amounts[i]), decimalcomma)
+  return cents
+
+
+def toDates(dates, dateformats):
+  """
+  Convert dates to datetime64
+  Every distinct date is parsed once; first matching format is used
+
+  Keyword arguments:
+  :param list of str dates: dates as in csv file
+  :param list of str dateformats: strptime format strings
+  :rtype numpy array of datetime64[D]
+  """
+
+  (unique, inverse) = np.unique(np.asarray(dates, dtype=str), return_inverse=True)
+
+  # no need to remember dates; every distinct date is parsed once already
+  parsedate = DateParser(*dateformats, cachesize=0)
+  parsed = [parsedate.parse(date) for date in unique.tolist()]
+
+  return np.array(parsed, dtype="datetime64[D]")[inverse]
+
+
+def toCategorical(values, sanitize=None):
+  """
+  Convert values to categorical codes
+  Optionally, sanitize every distinct value once
+
+  Keyword arguments:
+  :param list of str values:
+  :param function sanitize: applied to every distinct value
+  :return (categories, codes)
+  :rtype tuple (list of str, numpy array of int)
+  """
+
+  (categories, codes) = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+  categories = list(categories)
+  if sanitize is not None:
+    categories = [sanitize(category) for category in categories]
+  return (categories, codes)
+
+
+class TransactionBatch:
+  """
+  Columnar representation of transactions of one csv file
+
+  Columns are numpy arrays of equal length:
+    dates: datetime64[D]
+    amounts, balances: int64 cents
+    accounts, counterparties: codes into accountnames, counterpartynames
+    text: dictionary of other (str) columns, eg payee, memo
+  """
+
+  def __init__(self, transactiontype, dates, amounts, accounts, counterparties, text, balances=None):
+    """
+    Keyword arguments:
+    :param str transactiontype: Bank or Invst
+    :param numpy array dates: datetime64[D]
+    :param numpy array amounts: int64 cents
+    :param tuple accounts: (accountnames, codes)
+    :param tuple counterparties: (counterpartynames, codes)
+    :param dict text: name:numpy array of str
+    :param numpy array balances: int64 cents; None if csv file has no balance
+    """
+
+    self.transactiontype = transactiontype
+    self.dates = dates
+    self.amounts = amounts
+    (self.accountnames, self.accounts) = accounts
+    (self.counterpartynames, self.counterparties) = counterparties
+    self.text = text
+    self.balances = balances
+
+  def __len__(self):
+    return len(self.dates)
+
+  def select(self, mask):
+    """
+    Return batch with selected rows only
+
+    Keyword arguments:
+    :param numpy array mask: bool per row
+    :rtype TransactionBatch
+    """
+
+    return TransactionBatch(self.transactiontype,
+                            self.dates[mask],
+                            self.amounts[mask],
+                            (self.accountnames, self.accounts[mask]),
+                            (self.counterpartynames, self.counterparties[mask]),
+                            {name: column[mask] for (name, column) in self.text.items()},
+                            None if self.balances is None else self.balances[mask])
+
+  def selectDates(self, since=None, until=None):
+    """
+    Return batch with transactions between since and until (inclusive)
+
+    Keyword arguments:
+    :param datetime since: first date; None is no limit
+    :param datetime until: last date; None is no limit
+    :rtype TransactionBatch
+    """
+
+    mask = np.ones(len(self), dtype=bool)
+    if since is not None:
+      mask &= self.dates >= np.datetime64(since, "D")
+    if until is not None:
+      mask &= self.dates <= np.datetime64(until, "D")
+    return self.select(mask)
+
+  def transactions(self):
+    """
+    Convert batch to transactions
+
+    :rtype generator of Transaction or Investment
+    """
+
+    dates = self.dates.astype("datetime64[us]").astype(object)
+    text = {name: column.tolist() for (name, column) in self.text.items()}
+    amounts = self.amounts.tolist()
+    balances = None if self.balances is None else self.balances.tolist()
+    accounts = self.accounts.tolist()
+    counterparties = self.counterparties.tolist()
+
+    for i in range(len(self)):
+      iban = self.accountnames[accounts[i]]
+      to_iban = self.counterpartynames[counterparties[i]]
+      amount = amounts[i]
+
+      if self.transactiontype == "Invst":
+        yield Investment(date = dates[i],
+                         iban = iban,
+                         sequence = text["sequence"][i],
+                         isin = text["isin"][i],
+                         price = text["price"][i],
+                         quantity = text["quantity"][i],
+                         amount = amount,
+                         action = text["action"][i],
+                         commission = text["commission"][i],
+                         memo = text["memo"][i])
+      else:
+        yield Transaction(date = dates[i],
+                          iban = iban,
+                          sequence = text["sequence"][i],
+                          to_iban = to_iban,
+                          payee = text["payee"][i],
+                          amount = amount,
+                          balance = None if balances is None else balances[i],
+                          memo = text["memo"][i])
+
+
+def readColumns(csvfile_, bank_, columns):
+  """
+  Read columns of a csv file
+
+  Keyword arguments:
+  :param str csvfile_: Path + Filename to bank csv file
+  :param BankDefinition bank_: definition file of bank
+  :param list of str columns: keys of column numbers in bank definition, eg COL_DATE
+  :return column:list of values
+  :rtype dict
+  """
+
+  getcolumns = operator.itemgetter(*[bank_[column] for column in columns])
+
+  # transpose rows to columns
+  values = list(zip(*map(getcolumns, parsebank.readRows(csvfile_, bank_))))
+  if not values:
+    values = [()] * len(columns)
+
+  return dict(zip(columns, values))
+
+
+def sanitizeColumn(values, lowercase=False):
+  """
+  parsebank.sanitizeString() of a column; every distinct value is sanitized once
+
+  Keyword arguments:
+  :param list of str values:
+  :param bool lowercase: convert to lowercase
+  :rtype list of str
+  """
+
+  sanitized = {value: parsebank.sanitizeString(value, lowercase=lowercase) for value in set(values)}
+  return [sanitized[value] for value in values]
+
+
+def readINGCheckingBatch(csvfile_, bank_):
+  """
+  Columnar version of parsebank.readINGCheckingCSV
+
+  Keyword arguments:
+  :param str csvfile_: Path + Filename to bank csv file
+  :param BankDefinition bank_: definition file of bank
+  :rtype TransactionBatch
+  """
+
+  columns = readColumns(csvfile_, bank_, ["COL_DATE", "COL_IBAN", "COL_AMOUNT", "COL_SIGN", "COL_BALANCE",
+                                          "COL_MEMO1", "COL_MEMO2", "COL_IBANPAYEE", "COL_NAMEPAYEE"])
+
+  amounts = toCents(columns["COL_AMOUNT"])
+
+  # AF or BIJ (deposit or withdrawal)
+  amounts[np.char.lower(np.asarray(columns["COL_SIGN"], dtype=str)) == "af"] *= -1
+
+  # remove leading and trailing spaces; optionally convert to lowercase
+  lowercase = lambda value: parsebank.sanitizeString(value, lowercase=True)
+  (payees, payeecodes) = toCategorical(columns["COL_NAMEPAYEE"], parsebank.sanitizeString)
+  memo1 = sanitizeColumn(columns["COL_MEMO1"])
+  memo2 = sanitizeColumn(columns["COL_MEMO2"])
+
+  return TransactionBatch("Bank",
+                          toDates(columns["COL_DATE"], [bank_['DATEFORMAT1']]),
+                          amounts,
+                          toCategorical(columns["COL_IBAN"], lowercase),
+                          toCategorical(columns["COL_IBANPAYEE"], lowercase),
+                          {"sequence": np.zeros(len(amounts), dtype=int),
+                           "payee": np.array(payees, dtype=object)[payeecodes],
+                           "memo": np.char.add(np.char.add(np.asarray(memo1, dtype=str), "|"), np.asarray(memo2, dtype=str))},
+                          balances = toCents(columns["COL_BALANCE"]))
+
+
+def readDeGiroTransactionsBatch(csvfile_, bank_):
+  """
+  Columnar version of parsebank.readDeGiroTransactionsCSV
+
+  Keyword arguments:
+  :param str csvfile_: Path + Filename to bank csv file
+  :param BankDefinition bank_: definition file of bank
+  :rtype TransactionBatch
+  """
+
+  currencies = ["COL_PRICECURRENCY", "COL_LOCALCURRENCY", "COL_AMOUNTCURRENCY", "COL_COMMISSIONCURRENCY", "COL_TOTALCURRENCY"]
+  columns = readColumns(csvfile_, bank_, ["COL_DATE", "COL_MEMO", "COL_ORDERID", "COL_ISIN", "COL_STOCKMARKET",
+                                          "COL_PRICE", "COL_QUANTITY", "COL_AMOUNT", "COL_COMMISSION", "COL_TOTAL"] + currencies)
+
+  dates = toDates(columns["COL_DATE"], [bank_['DATEFORMAT1'], bank_['DATEFORMAT2']])
+  count = len(dates)
+
+  #  Check whether non-EURO currencies are used
+  for currency in currencies:
+    values = np.asarray(columns[currency], dtype=str)
+    for i in np.nonzero((values != "EUR") & (values != ""))[0]:
+      logger.error(f"Transaction is not in EUR; this is not yet supported! {dates[i]}: {columns['COL_ISIN'][i]}")
+
+  # "Sell"; "Buy"; "ShrsIn"; "ShrsOut" The latter 2 are not implemented
+  action = np.where(toCents(columns["COL_AMOUNT"], decimalcomma=False, rounded=True) > 0, "Sell", "Buy")
+
+  # positive number = BUY
+  # negative number is SELL
+  # Flip signs
+  # DeGiro can calculate total and commission with more than 2 decimals; rounded to cents
+  amounts = -toCents(columns["COL_TOTAL"], decimalcomma=False, rounded=True)
+
+  # Commission; positive number == expense
+  commission = np.asarray(columns["COL_COMMISSION"], dtype=object)
+  present = commission != ""
+  commission[present] = (-toCents(commission[present].astype(str), decimalcomma=False, rounded=True)).tolist()
+
+  orderid = np.asarray(columns["COL_ORDERID"], dtype=str)
+  memo = np.char.add(np.char.add(np.char.add(np.char.add(np.asarray(columns["COL_MEMO"], dtype=str), " @ "),
+                                             np.asarray(columns["COL_STOCKMARKET"], dtype=str)), " SEQ:"), orderid)
+
+  return TransactionBatch("Invst",
+                          dates,
+                          amounts,
+                          ([parsebank.sanitizeString(bank_['CHECKINGACCOUNT'], lowercase=True)], np.zeros(count, dtype=int)),
+                          ([""], np.zeros(count, dtype=int)),
+                          {"sequence": orderid,
+                           "isin": np.asarray(columns["COL_ISIN"], dtype=str),
+                           "price": np.asarray(columns["COL_PRICE"], dtype=str),
+                           "quantity": np.asarray(columns["COL_QUANTITY"], dtype=str),
+                           "action": action,
+                           "commission": commission,
+                           "memo": memo})
+
+
+# csv parser (see bank definition file) --> columnar version
+BATCHPARSERS = {"readINGCheckingCSV": readINGCheckingBatch,
+                "readDeGiroTransactionsCSV": readDeGiroTransactionsBatch}
+
+
+def readColumnar(csvfile_, bank_, since=None, until=None):
+  """
+  Parse csv file column wise, filter on date and pass on transactions
+
+  Keyword arguments:
+  :param str csvfile_: Path + Filename to bank csv file
+  :param BankDefinition bank_: definition file of bank; csvparser must be in BATCHPARSERS
+  :param datetime since: first date; None is no limit
+  :param datetime until: last date; None is no limit
+  :rtype generator of Transaction or Investment
+  """
+
+  # worker processes (csv2qif --jobs) may not have imported numpy yet
+  loadNumpy()
+
+  batch = BATCHPARSERS[bank_.csvparser](csvfile_, bank_)
+  if since is not None or until is not None:
+    batch = batch.selectDates(since, until)
+
+  yield from batch.transactions()
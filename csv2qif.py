@@ -22,11 +22,26 @@ __version__ = "1.0.3"
 
 import os
 import sys
-import quiffen
+import argparse
+import itertools
+from datetime import datetime
+
+# quiffen, numpy (columnar), concurrent.futures (--jobs) and cProfile (--pstats)
+# are imported when needed; startup time matters for per file invocations
 
 # local imports
 import parsebank
+import columnar
+from accounts import BankAccounts
 import categories
+import duplicates
+import incremental
+import ingest
+import profiling
+import qifwriter
+import transfers
+from amount import formatCents
+import log
 from log import logger
 import logging
 # This setLevel determines which messages are passed on to lower handlers
@@ -35,6 +50,19 @@ logger.setLevel(logging.INFO)  # DEBUG, INFO, WARNING, ERROR, CRITICAL
 # Todo fix
 BASEPATH = os.path.dirname(os.path.realpath(__file__))
 
+# Categorization results of previous runs (--cache); stored next to categories.csv
+CATEGORYCACHE = "categories.cache"
+
+# Evaluations, matches and match time per rule of categories.csv (--rule-stats)
+RULESTATS = "categories.stats.json"
+
+# Fingerprints of transactions converted in previous runs (--incremental)
+TRANSACTIONSTATE = "transactions.state"
+TRANSFERSTATE = "transfers.state"
+
+# Time and rows per stage (--profile); set by main() and initWorker()
+profiler = profiling.StageProfiler(enabled=False)
+
 
 
 def close(exit_code):
@@ -46,6 +74,9 @@ def close(exit_code):
    0 = success
   """
   logger.debug(f"INFO:close: exitcode = {exit_code} >>")
+
+  # handle all queued log records before exit
+  log.stop()
   sys.exit(exit_code)
 
 
@@ -58,18 +89,16 @@ def readBankAccounts(bankaccountsfilename):
   Keyword arguments:
   :param str bankaccountsfilename: path + filename to <bankaccounts.def>
   :return dictionary of multiple key:value pairs --> account number:(gnucash account name, priority, qif account)
-  :rtype dict
+  :rtype BankAccounts
   """
 
   # key = id of back account (eg COL_IBAN)
   # value = tupple (GnuCash account name, priority between receiving account and sending account (l_ and r_)
-  definition_dict = {}
+  # priority for account when comparing internal transfers, to prevent double
+  # transfers in GnuCash; order of bankaccounts.def. Prio = 0 is highest priority.
+  definition_dict = BankAccounts()
 
-  # priority for account when comparing
-  # internal transfers, to prevent double
-  # transfers in GnuCash
-  # Prio = 0 is highest priority.
-  prio = 0
+  import quiffen
 
   with open(bankaccountsfilename, newline='', mode='r') as fp:
     for line in fp:
@@ -84,17 +113,46 @@ def readBankAccounts(bankaccountsfilename):
       accountname = parsebank.sanitizeString(accountname)
       accounttype = parsebank.sanitizeString(accounttype)
 
-      definition_dict[iban] = {"gnuaccountname": accountname,
-                               "priority": prio,
-                               "qifaccount": quiffen.Account(accountname,
-                                                             desc='',
-                                                             account_type=accounttype)}
-      prio += 1
+      definition_dict.add(iban, accountname, accounttype,
+                          quiffen.Account(accountname, desc='', account_type=accounttype))
 
   return definition_dict
 
 
-def writeQIF(account_dict_, csvlist, outfile_):
+def toQuiffen(transaction):
+  """
+  Create quiffen transaction for a parsed transaction
+
+  Keyword arguments:
+  :param Transaction transaction: parsed transaction
+  :return quiffen transaction
+  :rtype quiffen.Transaction or quiffen.Investment
+  """
+
+  import quiffen
+
+  if transaction.transactiontype == "Invst":
+    return quiffen.Investment(date = transaction.date,
+                              action = transaction.action,
+                              security = transaction.isin,
+                              price = transaction.price,
+                              quantity = transaction.quantity,
+                              amount = formatCents(transaction.amount),
+                              commission = formatCents(transaction.commission),
+                              to_account = transaction.to_iban,
+                              transfer_amount = transaction.transfer_amount,
+                              memo = transaction.memo)
+
+  return quiffen.Transaction(date = transaction.date,
+                             to_account = transaction.toaccountname,
+                             check_number = transaction.sequence,
+                             payee = transaction.payee,
+                             amount = formatCents(transaction.amount),
+                             category= transaction.category,
+                             memo = transaction.memo)
+
+
+def writeQIF(account_dict_, csvlist, outfile_, stream_=False, native_=False, window_=transfers.WINDOW, transfermatcher_=None):
   """
   Write all transactions to a QIF formatted file
 
@@ -104,140 +162,312 @@ def writeQIF(account_dict_, csvlist, outfile_):
   https://github.com/isaacharrisholt/quiffen/tree/main/quiffen
 
   Keyword arguments:
-  :param dict account_dict_: key:value -->  iban:(gnucash account name, priority, qif account)
-  :param list of dictionaries csvlist: list of dictionaries of parsed transactions
+  :param BankAccounts account_dict_: key:value -->  iban:(gnucash account name, priority, qif account)
+  :param iterable of Transaction csvlist: parsed transactions; list or generator
   :param str outfile_: filename of QIF file
-  :return 0
+  :param bool stream_: write every transaction when it arrives (qifwriter), iso building a quiffen.Qif first
+  :param bool native_: write grouped per account with qifwriter, iso building a quiffen.Qif first
+  :param int window_: maximum number of days between both legs of an internal transfer
+  :param TransferMatcher transfermatcher_: matcher with legs of previous runs (see TRANSFERSTATE); None to create one
+  :return number of transactions written
   :rtype int
   """
 
-  # list of transactions without categories
+  # list of (iban, memo) of transactions without categories
   listNoCategories = []
 
   # counter
   nrofTransactions = 0
   nrofNoCategories = 0
-  nrofDoubleTransactions = 0
 
-  # create qif instance to store accounts and transactions
-  qif = quiffen.Qif()
-
-# definition_dict[(key)] = {"gnuaccountname", "priority", "accounttype", "qifaccount"}
-
-  # Create for every account defined in bankaccounts.def a qif account entry
-  # Somehow it does not deal well with same entry twice (having 2 different account numbers pointing to same gnuaccountname).
-  # Check if account is already created, if so, skip
-  for key in account_dict_:
-    accountname = account_dict_[key]["gnuaccountname"]
-
-    # Entry already exists, skip
-    if accountname in qif._accounts: continue
-    else: qif.add_account(account_dict_[key]["qifaccount"])
+  import quiffen
+
+  # transactions without a category are categorized (categories.csv) as
+  imbalance = quiffen.Category('Expenses:Imbalance-EUR')
+
+  # If you have a transfer from account1 to account2 and
+  # both accounts are a GnuCash account, and you download
+  # statements for both accounts, you will end up with same
+  # transaction twice in GnuCash. Drop the leg of the account
+  # with the lower priority, if the other leg is present.
+  transfermatcher = transfermatcher_
+  if transfermatcher is None:
+    transfermatcher = transfers.TransferMatcher(account_dict_, window_)
+  if stream_:
+    csvlist = transfermatcher.matchStream(csvlist)
+  else:
+    csvlist = transfermatcher.match(csvlist)
+
+  if stream_:
+    # write transactions one by one
+    qifstream = qifwriter.QifStreamWriter(outfile_)
+  elif native_:
+    # same layout as quiffen; accounts in order of bankaccounts.def
+    qifstream = qifwriter.QifWriter(outfile_)
+    for key in account_dict_:
+      qifstream.addAccount(account_dict_[key]["gnuaccountname"], account_dict_[key]["accounttype"])
+  else:
+    # create qif instance to store accounts and transactions
+    qif = quiffen.Qif()
+
+    # definition_dict[(key)] = {"gnuaccountname", "priority", "accounttype", "qifaccount"}
+
+    # Create for every account defined in bankaccounts.def a qif account entry
+    # Somehow it does not deal well with same entry twice (having 2 different account numbers pointing to same gnuaccountname).
+    # Check if account is already created, if so, skip
+    for key in account_dict_:
+      accountname = account_dict_[key]["gnuaccountname"]
+
+      # Entry already exists, skip
+      if accountname in qif._accounts: continue
+      else: qif.add_account(account_dict_[key]["qifaccount"])
 
   for transaction in csvlist:
-    # If you have a transfer from account1 to account2 and
-    # both accounts are a GnuCash account, and you download
-    # statements for both accounts, you will end up with same
-    # transaction twice in GnuCash:
-    #   from account1 to account2 amount is X euros
-    #   from account2 to account 1 amount is -X euros
-    # Based on order (= priority) in bankaccounts.def,
-    # if the accountFrom has a lower priority than accountTo,
-    # transacion will be ignored, as the accountTo download will
-    # add this transaction.
-
-    # see below on priorities....
-    try:
-      iban = transaction['iban']
-      accountFromPrio = account_dict_[iban]["priority"]
-      accountToPrio = None
-    except KeyError:
+    iban = transaction.iban
+    if iban not in account_dict_:
       logger.error(f"account {iban} is not defined in bankaccounts.def")
       close(1)
 
-
     # Process based on header_type. Only bank or invst are implemented
-    header_type = transaction['transactiontype']
+    header_type = transaction.transactiontype
     if header_type == "Bank":
-      tr = quiffen.Transaction(date = transaction['date'],
-                               to_account = transaction['toaccountname'],
-                               check_number = transaction['sequence'],
-                               payee = transaction['payee'],
-                               amount = transaction['amount'],
-                               category= transaction['category'],
-                               memo = transaction['memo'])
-
-      # Determine priority for to account (if it exists) by looking up in account_dict_
-      if len(transaction['to_iban']) > 0:
-        for accountTo in account_dict_:
-          if transaction['toaccountname'] == account_dict_[accountTo]['gnuaccountname']:
-            accountToPrio = account_dict_[accountTo]["priority"]
-
       # print all transactions which don't have a defined category
       # Missing transactions/categories can optionally be added to categories.csv
-      if transaction['category'] == quiffen.Category('Expenses:Imbalance-EUR'):
-        listNoCategories.append(transaction)
+      if transaction.category == imbalance:
         nrofNoCategories += 1
+        # streaming: do not keep a row per transaction; log in order of arrival
+        if stream_:
+          logger.info(f"TRANSACTION without category: {transaction.iban}|{transaction.memo}")
+        else:
+          listNoCategories.append((transaction.iban, transaction.memo))
 
     # Process Invst transactions
     elif header_type == "Invst":
-      tr = quiffen.Investment(date = transaction['date'],
-                              action = transaction['action'],
-                              security = transaction['isin'],
-                              price = transaction['price'],
-                              quantity = transaction['quantity'],
-                              amount = transaction['amount'],
-                              commission = transaction['commission'],
-                              to_account = transaction['to_iban'],
-                              transfer_amount = transaction['transfer_amount'],
-                              memo = transaction['memo'])
+      pass
     else:
       logger.error(f"Header_type {header_type} is not supported or implemented")
       close(0)
 
 
     #logger.debug(f""
-    #            f"PRIO={accountFromPrio},{accountToPrio}; "
-    #            f"IBAN={transaction['iban']}-->{transaction['to_iban']}||"
-    #            f"ACC={transaction['fromaccountname']}-->{transaction['toaccountname']}||"
-    #            f"PAYEE={transaction['payee']}||CAT = {transaction['category']}"
-    #            f"||E={transaction['amount']}||M={transaction['memo']}")
-
-    # Higher prio number means lowes priority
-    if accountToPrio is not None and accountFromPrio > accountToPrio:
-      nrofDoubleTransactions += 1
-      continue
+    #            f"IBAN={transaction.iban}-->{transaction.to_iban}||"
+    #            f"ACC={transaction.fromaccountname}-->{transaction.toaccountname}||"
+    #            f"PAYEE={transaction.payee}||CAT = {transaction.category}"
+    #            f"||E={transaction.amount}||M={transaction.memo}")
 
     # add transaction to account
-    account_dict_[iban]["qifaccount"].add_transaction(tr, header = header_type)
+    if stream_ or native_:
+      qifstream.write(account_dict_[iban]["gnuaccountname"], account_dict_[iban]["accounttype"], header_type, transaction)
+    else:
+      account_dict_[iban]["qifaccount"].add_transaction(toQuiffen(transaction), header = header_type)
     nrofTransactions += 1
 
   # Write qif file
-  qif.to_qif(outfile_)
+  if stream_ or native_:
+    qifstream.close()
+  else:
+    qif.to_qif(outfile_)
+
+  sortedlist = sorted( listNoCategories, key=lambda x: x[1].lower() )
+  for (iban, memo) in sortedlist:
+    logger.info(f"TRANSACTION without category: {iban}|{memo}")
 
-  sortedlist = sorted( listNoCategories, key=lambda x: x['memo'].lower() )
-  for transaction in sortedlist:
-    logger.info(f"TRANSACTION without category: {transaction['iban']}|{transaction['memo']}")
+  transfermatcher.report()
 
-  logger.info(f"Converted {nrofTransactions} transactions to QIF; Skipped {nrofDoubleTransactions} duplicate transactions; {nrofNoCategories} transactions are not categorized")
+  logger.info(f"Converted {nrofTransactions} transactions to QIF; Skipped {transfermatcher.dropped} duplicate transactions; {nrofNoCategories} transactions are not categorized")
 
-  return 0
+  return nrofTransactions
 
 
-def main(listoffiles_, outfile_):
+def selectParser(bankregistry_, file):
+  """
+  Determine which bank and parser matches a csv file
+  Exits when there is no match, or multiple
+
+  Keyword arguments:
+  :param BankRegistry bankregistry_: all bank definitions
+  :param str or CsvFile file: Path + Filename to bank csv file, or csv file read by parser as well
+  :return (bank, parser)
+  :rtype tuple
+  """
+
+  # determine which bank and csvparser matches the csv file
+  banks = bankregistry_.determineBank(file)
+
+  # if determineBank does not find a matching bank, an empty list is returned
+  if len(banks) == 0:
+    logger.error(f"CSV file: {file} is not recognized, exiting.....")
+    close(0)
+
+  # if determineBank finds multiple matching banks, there is a collision
+  if len(banks) > 1:
+    logger.error(f"CSV file: {file} matches multiple bank parsers - change fingerpint, exiting.....")
+    close(0)
+
+  bank = banks[0]
+
+  # check first if parser exists w/o calling it
+  if not hasattr(parsebank, bank.csvparser):
+    logger.error(f"Parser parsebank.{bank.csvparser} defined in {bank.filename} does not exist")
+    close(0)
+
+  return (bank, getattr(parsebank, bank.csvparser))
+
+
+def readTransactions(file, bank, csvparser, columnar_=False, since_=None, until_=None):
+  """
+  Parse a csv file (or chunk); optionally column wise and filtered on date
+
+  Keyword arguments:
+  :param file: Path + Filename to bank csv file, CsvFile or FileChunk
+  :param BankDefinition bank: definition file of bank
+  :param function csvparser: parser of bank
+  :param bool columnar_: use columnar parser of bank, if available (see columnar.BATCHPARSERS)
+  :param datetime since_: skip transactions before this date; None is no limit
+  :param datetime until_: skip transactions after this date; None is no limit
+  :rtype generator of Transaction
+  """
+
+  # columnar parsers filter on date themselves, before transactions are created
+  if columnar_ and bank.csvparser in columnar.BATCHPARSERS:
+    yield from columnar.readColumnar(file, bank, since_, until_)
+    return
+
+  for transaction in csvparser(file, bank):
+    if since_ is not None and transaction.date < since_:
+      continue
+    if until_ is not None and transaction.date > until_:
+      continue
+    yield transaction
+
+
+# State of a worker process (--jobs); (bankregistry, account_dict, category_regex, readoptions, incremental)
+workerstate = None
+
+
+def initWorker(cache_, readoptions_, incremental_=False, profile_=False, rulestats_=False):
+  """
+  Initialize worker process; read definition files once per process
+
+  Keyword arguments:
+  :param bool cache_: reuse categorization results of previous runs (see CATEGORYCACHE)
+  :param dict readoptions_: keyword arguments of readTransactions()
+  :param bool incremental_: return fingerprint keys of transactions (see incremental.fingerprintKey)
+  :param bool profile_: record time per stage (see profiling)
+  :param bool rulestats_: record evaluations, matches and match time per category rule (see RULESTATS)
+  """
+
+  global workerstate
+  global profiler
+
+  # no background logging thread in workers; with the spawn or forkserver start method
+  # log is imported anew, and records still queued at exit of the worker would be lost
+  log.direct()
+
+  profiler = profiling.StageProfiler(enabled=profile_)
+
+  # forked worker processes inherit the read statistics of the main process
+  ingest.takeStatistics()
+
+  category_regex = categories.readCategory(BASEPATH + "/categories.csv")
+  if cache_:
+    category_regex.loadCache(BASEPATH + "/" + CATEGORYCACHE)
+  if rulestats_:
+    category_regex.enableStatistics()
+
+  workerstate = (parsebank.BankRegistry(), readBankAccounts(BASEPATH + "/bankaccounts.def"), category_regex, readoptions_, incremental_)
+
+
+def convertFile(file, chunk=None, bank=None):
+  """
+  Detect bank, parse and categorize one csv file in a worker process
+
+  Keyword arguments:
+  :param str file: Path + Filename to bank csv file
+  :param FileChunk chunk: only parse this part of the file; None is whole file
+  :param BankDefinition bank: bank of csv file, detected by main process; None to detect here
+  :return (list of transactions, natural keys, fingerprint keys or None, category cache results used, (cache hits, cache misses, cache file hits, cache file misses, io statistics, stage records, rule statistics))
+  :rtype tuple
+  """
+
+  (bankregistry, account_dict, category_regex, readoptions, incremental_) = workerstate
+
+  before = category_regex.cacheInfo()
+  storehits = category_regex.storehits
+  storemisses = category_regex.storemisses
+
+  if chunk is None:
+    # read csv file once; for detection of bank and by parser
+    with ingest.CsvFile(file) as csvfile:
+      if bank is None:
+        with profiler.stage("detection", file):
+          (bank, csvparser) = selectParser(bankregistry, csvfile)
+      else:
+        csvparser = getattr(parsebank, bank.csvparser)
+      csvlist = list(profiler.iterate("parsing", file, readTransactions(csvfile, bank, csvparser, **readoptions)))
+  else:
+    # only the chunk is read; bank is detected by main process
+    csvparser = getattr(parsebank, bank.csvparser)
+    csvlist = list(profiler.iterate("parsing", file, readTransactions(chunk, bank, csvparser, **readoptions)))
+
+  # duplicates and fingerprints are based on transactions before categorization
+  naturalkeys = [duplicates.naturalKey(transaction) for transaction in csvlist]
+  keys = [incremental.fingerprintKey(transaction) for transaction in csvlist] if incremental_ else None
+
+  with profiler.stage("categorization", file) as record:
+    categories.determineAccountNames(account_dict, csvlist)
+    categories.determineCategories(csvlist, category_regex)
+    categories.determineAccountNames(account_dict, csvlist)
+    record.rows = len(csvlist)
+
+  after = category_regex.cacheInfo()
+  statistics = (after.hits - before.hits,
+                after.misses - before.misses,
+                category_regex.storehits - storehits,
+                category_regex.storemisses - storemisses,
+                ingest.takeStatistics(),
+                profiler.takeRecords(),
+                category_regex.takeStatistics())
+
+  return (csvlist, naturalkeys, keys, category_regex.takeResults(), statistics)
+
+
+def main(listoffiles_, outfile_, cache_=False, stream_=False, jobs_=1, columnar_=False, since_=None, until_=None, native_=False,
+         incremental_=False, window_=transfers.WINDOW, profile_=False, rulestats_=False):
   """
   main
 
   Keyword arguments:
   :param list of str listoffiles_: Path + Filename to bank csv file(s)
   :param str outfile_: filename of QIF formatted output file
+  :param bool cache_: reuse categorization results of previous runs (see CATEGORYCACHE)
+  :param bool stream_: parse, categorize and write transactions one at a time
+  :param int jobs_: number of csv files processed in parallel
+  :param bool columnar_: parse csv files column wise (requires numpy), if bank supports it
+  :param datetime since_: skip transactions before this date; None is no limit
+  :param datetime until_: skip transactions after this date; None is no limit
+  :param bool native_: write QIF file with qifwriter iso quiffen; same output
+  :param bool incremental_: only convert transactions not converted in previous runs (see TRANSACTIONSTATE)
+  :param int window_: maximum number of days between both legs of an internal transfer
+  :param bool profile_: log wall time, CPU time and rows/sec per stage and csv file
+  :param bool rulestats_: log and write evaluations, matches and match time per category rule (see RULESTATS)
   """
 
+  global profiler
+  profiler = profiling.StageProfiler(enabled=profile_)
+
   for file in listoffiles_:
     logger.debug(f"main: IN={file} OUT={outfile_}")
 
-  # detect bankdefinitionfiles
-  parsebank.queryBankDefFiles()
+  if columnar_ and not columnar.loadNumpy():
+    logger.error("--columnar requires numpy; install numpy or omit --columnar")
+    close(1)
+
+  # options passed on to readTransactions()
+  readoptions = {"columnar_": columnar_, "since_": since_, "until_": until_}
+
+  # read all bankdefinitionfiles
+  bankregistry = parsebank.BankRegistry()
 
   # read which GnuCash accounts exists
   # dictionary of multiple key:value pairs --> account number:(gnucash account name, priority, qif account)
@@ -246,52 +476,172 @@ def main(listoffiles_, outfile_):
   # read category regex; to format payee & categories
   category_regex = categories.readCategory(BASEPATH + "/categories.csv")
 
-  csvlist = []
-  # start processing csv files....
+  # rule statistics bypass the category caches; cache file is neither read nor written
+  if rulestats_:
+    cache_ = False
+
+  # optionally, load categorization results of previous runs
+  if cache_:
+    category_regex.loadCache(BASEPATH + "/" + CATEGORYCACHE)
+
+  # optionally, count evaluations and matches per rule; results are not cached
+  if rulestats_:
+    category_regex.enableStatistics()
+
+  # optionally, load fingerprints of transactions converted in previous runs
+  if incremental_:
+    state = incremental.TransactionState(BASEPATH + "/" + TRANSACTIONSTATE)
+    state.load()
+
+  # transfer legs of previous runs pair with new legs; converted transactions are not seen again
+  transfermatcher = transfers.TransferMatcher(account_dict, window_)
+  if incremental_:
+    transfermatcher.loadState(BASEPATH + "/" + TRANSFERSTATE)
+
+  # remove transactions which are in an earlier csv file as well (overlapping csv files)
+  duplicatefilter = duplicates.DuplicateFilter()
+
+  # number of category cache hits and misses
+  cachehits = 0
+  cachemisses = 0
+
+  if jobs_ > 1:
+    # large csv files are split in chunks, which are parsed in parallel as well
+    # the bank of a large file is detected here, with the same read as splitting;
+    # workers get the bank, and only read their chunk
+    files = []
+    filenumbers = []
+    chunks = []
+    banks = []
+    for (filenumber, file) in enumerate(listoffiles_):
+      filechunks = [None]
+      bank = None
+      if os.path.getsize(file) > parsebank.CHUNKSIZE:
+        with ingest.CsvFile(file) as csvfile:
+          with profiler.stage("detection", file):
+            (bank, csvparser) = selectParser(bankregistry, csvfile)
+          if bank.csvparser in parsebank.CHUNKPARSERS:
+            filechunks = parsebank.splitFile(csvfile, bank, parsebank.CHUNKSIZE)
+
+      files.extend([file] * len(filechunks))
+      filenumbers.extend([filenumber] * len(filechunks))
+      chunks.extend(filechunks)
+      banks.extend([bank] * len(filechunks))
+
+    # detect bank, parse and categorize every csv file (chunk) in a worker process
+    # results are merged in order of listoffiles_; identical to a serial run
+    csvlist = []
+    keys = []
+    import concurrent.futures
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs_, initializer=initWorker, initargs=(cache_, readoptions, incremental_, profile_, rulestats_)) as executor:
+      results = executor.map(convertFile, files, chunks, banks)
+      for (file, filenumber, (filelist, naturalkeys, filekeys, cacheresults, statistics)) in zip(files, filenumbers, results):
+        for (transaction, naturalkey, filekey) in zip(filelist, naturalkeys, filekeys or itertools.repeat(None)):
+          if duplicatefilter.isDuplicate(naturalkey, file, filenumber):
+            continue
+          csvlist.append(transaction)
+          keys.append(filekey)
+        category_regex.mergeResults(cacheresults, statistics[2], statistics[3])
+        ingest.mergeStatistics(statistics[4])
+        profiler.merge(statistics[5])
+        category_regex.mergeStatistics(statistics[6])
+        cachehits += statistics[0]
+        cachemisses += statistics[1]
+
+    # skip transactions converted in previous runs
+    if incremental_:
+      csvlist = list(state.filterNew(csvlist, keys))
+
+  else:
+    # list of (csv file, bank, parser) to be processed
+    csvparsers = []
+    # start processing csv files....
+
+    for file in listoffiles_:
+      # read csv file once; for detection of bank and by parser
+      csvfile = ingest.CsvFile(file)
+
+      # determine which bank and csvparser matches the csv file
+      with profiler.stage("detection", file):
+        (bank, csvparser) = selectParser(bankregistry, csvfile)
+      csvparsers.append((csvfile, bank, csvparser))
 
-  for file in infile:
-    # determine which bank and csvparser matches the csv file
-    (bankdefinitionfile, csvparser) = parsebank.determineBank(file)
+    # read csv's with a bank definition file
+    # parsers are generators; chain them to one stream of transactions
+    transactions = itertools.chain.from_iterable(duplicatefilter.filter(profiler.iterate("parsing", csvfile.filename, readTransactions(csvfile, bank, csvparser, **readoptions)),
+                                                                        csvfile.filename, filenumber)
+                                                 for (filenumber, (csvfile, bank, csvparser)) in enumerate(csvparsers))
+
+    # skip transactions converted in previous runs; before (costly) categorization
+    if incremental_:
+      transactions = state.filterNew(transactions)
+
+    if stream_:
+      # translate IBAN's to GnuCash account names and determine category, one transaction at a time
+      csvlist = profiler.iterate("categorization", None, categories.processTransactions(account_dict, transactions, category_regex))
+    else:
+      csvlist = list(transactions)
 
-    # if determineBank does not find a matching bank, NONE is returned
-    if bankdefinitionfile == "NONE":
-      logger.error(f"CSV file: {file} is not recognized, exiting.....")
-      close(0)
+      with profiler.stage("categorization") as record:
+        # translate IBAN's to GnuCash account names
+        categories.determineAccountNames(account_dict, csvlist)
 
-    # if determineBank does not find a matching bank, NONE is returned
-    if bankdefinitionfile == "DUPLICATE":
-      logger.error(f"CSV file: {file} matches multiple bank parsers - change fingerpint, exiting.....")
-      close(0)
+        # determine the category of the transaction for every transaction in the csv list
+        categories.determineCategories(csvlist, category_regex)
 
-    # read csv's with a bank definition file
-    # return list to store account csv file
+        # translate IBAN's to GnuCash account names; after categories are assigned
+        # A category can be same as accounttoname, hence needs to  be copied back
+        categories.determineAccountNames(account_dict, csvlist)
+        record.rows = len(csvlist)
 
-    # check first if parser exists w/o calling it
-    if hasattr(parsebank, csvparser):
-      getattr(parsebank, csvparser)(file, bankdefinitionfile, csvlist)
-    else:
-      logger.error(f"Parser parsebank.{csvparser} defined in {bankdefinitionfile} does not exist")
-      close(0)
+  # write the QIF file
+  with profiler.stage("writing") as record:
+    record.rows = writeQIF(account_dict, csvlist, outfile_, stream_=stream_, native_=native_, window_=window_, transfermatcher_=transfermatcher)
+  duplicatefilter.report()
 
+  # csv files are parsed; unmap them
+  if jobs_ <= 1:
+    for (csvfile, bank, csvparser) in csvparsers:
+      csvfile.close()
+  ingest.report()
+  profiler.report()
 
-  # translate IBAN's to GnuCash account names
-  categories.determineAccountNames(account_dict, csvlist)
+  # remember converted transactions, once QIF file is written
+  if incremental_:
+    state.save()
+    transfermatcher.saveState(BASEPATH + "/" + TRANSFERSTATE)
 
-  # determine the category of the transaction for every transaction in the csv list
-  categories.determineCategories(csvlist, category_regex)
+  cacheinfo = category_regex.cacheInfo()
+  cachehits += cacheinfo.hits
+  cachemisses += cacheinfo.misses
+  logger.info(f"Category cache: {cachehits} hits; {cachemisses} misses")
 
-  # translate IBAN's to GnuCash account names; after categories are assigned
-  # A category can be same as accounttoname, hence needs to  be copied back
-  categories.determineAccountNames(account_dict, csvlist)
+  if cache_:
+    category_regex.saveCache(BASEPATH + "/" + CATEGORYCACHE)
 
-  # write the QIF file
-  writeQIF(account_dict, csvlist, outfile_)
+  if rulestats_:
+    category_regex.statistics.report(category_regex.rules, BASEPATH + "/" + RULESTATS)
 
   logger.info("main: <<")
   return
 # END def main()
 
 
+def parseDate(date):
+  """
+  Parse date of --since/--until command line option
+
+  Keyword arguments:
+  :param str date: YYYY-MM-DD
+  :rtype datetime
+  """
+
+  try:
+    return datetime.strptime(date, "%Y-%m-%d")
+  except ValueError:
+    raise argparse.ArgumentTypeError(f"invalid date {date}; use YYYY-MM-DD")
+
+
 """
 ------------------------------------------------------------------------------------
  Entry point
@@ -303,16 +653,61 @@ output: file1.qif
 
 - csv2qif.py file1.csv file2.csv file3.csv
 output: out.qif
+
+Options
+- --cache: reuse categorization results of previous runs
+- --stream: parse, categorize and write one transaction at a time; transactions are not kept in memory,
+  only the keys of the duplicate filter and the internal transfer legs (held legs are written at the end)
+- --jobs N: process N csv files in parallel; large csv files are split in chunks
+- --columnar: parse csv files column wise with numpy (ING checking, DeGiro transactions)
+- --since YYYY-MM-DD, --until YYYY-MM-DD: only convert transactions within this date range
+- --native: write QIF file with built-in writer iso quiffen; same output, faster and less memory
+- --incremental: only convert transactions which are not converted in previous runs
+- --transfer-window DAYS: maximum number of days between both legs of an internal transfer
+- --profile: log wall time, CPU time and rows/sec per stage (detection, parsing, categorization, writing) and csv file
+- --rule-stats: log evaluations, matches and match time per rule of categories.csv; all rules are written to categories.stats.json
+- --pstats FILE: run under cProfile and write statistics to FILE (view with python -m pstats FILE)
 """
 if __name__ == '__main__':
   logger.debug("__main__: >>")
+
+  parser = argparse.ArgumentParser(description="Convert bank csv files to a QIF file")
+  parser.add_argument("csvfiles", nargs="*", help="bank csv file(s)")
+  parser.add_argument("--cache", action="store_true",
+                      help=f"reuse categorization results of previous runs, stored in {CATEGORYCACHE}")
+  parser.add_argument("--stream", action="store_true",
+                      help="parse, categorize and write one transaction at a time; accounts are not grouped in QIF file. "
+                           "Memory grows only with duplicate filter keys and internal transfer legs")
+  parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                      help="process N csv files, or chunks of large csv files, in parallel (default 1)")
+  parser.add_argument("--columnar", action="store_true",
+                      help="parse csv files column wise with numpy, where supported by the bank parser")
+  parser.add_argument("--since", type=parseDate, metavar="YYYY-MM-DD",
+                      help="skip transactions before this date")
+  parser.add_argument("--until", type=parseDate, metavar="YYYY-MM-DD",
+                      help="skip transactions after this date")
+  parser.add_argument("--native", action="store_true",
+                      help="write QIF file with built-in writer iso quiffen; same output")
+  parser.add_argument("--incremental", action="store_true",
+                      help=f"only convert transactions not converted in previous runs, stored in {TRANSACTIONSTATE} and {TRANSFERSTATE}")
+  parser.add_argument("--transfer-window", type=int, default=transfers.WINDOW, metavar="DAYS",
+                      help=f"maximum number of days between both legs of an internal transfer (default {transfers.WINDOW})")
+  parser.add_argument("--profile", action="store_true",
+                      help="log wall time, CPU time and rows/sec per stage and csv file")
+  parser.add_argument("--rule-stats", action="store_true",
+                      help=f"log evaluations, matches and match time per rule of categories.csv, and write them to {RULESTATS}; disables category caches")
+  parser.add_argument("--pstats", metavar="FILE",
+                      help="run under cProfile and write statistics to FILE; worker processes (--jobs) are not profiled")
+  args = parser.parse_args()
+
+  # after parsing arguments; --help and invalid arguments do not log (and open syslog)
   logger.info(f"Starting csv2qif version {__version__}")
 
   # list of input csv files
   infile = []
 
   try:
-    nrofArguments = len(sys.argv) - 1
+    nrofArguments = len(args.csvfiles)
 
     # if there are no arguments passed at command line
     if nrofArguments == 0:
@@ -320,7 +715,7 @@ if __name__ == '__main__':
 
     # add csv file to list
     for i in range(nrofArguments):
-      infile.append( sys.argv[i+1] )
+      infile.append( args.csvfiles[i] )
 
       # check if file exists; bail out if one is missing
       if not os.path.isfile( infile[i] ):
@@ -335,8 +730,8 @@ if __name__ == '__main__':
       outfile = "out.qif"
 
   except:
-    logger.info(f"usage {os.path.basename(sys.argv[0])} <file1.csv> <file2.csv>")
-    logger.info(f"usage {os.path.basename(sys.argv[0])} <*.csv>")
+    logger.info(f"usage {os.path.basename(sys.argv[0])} [--cache] [--stream] [--jobs N] [--columnar] [--native] [--incremental] [--transfer-window DAYS] [--profile] [--rule-stats] [--pstats FILE] [--since YYYY-MM-DD] [--until YYYY-MM-DD] <file1.csv> <file2.csv>")
+    logger.info(f"usage {os.path.basename(sys.argv[0])} [--cache] [--stream] [--jobs N] [--columnar] [--native] [--incremental] [--transfer-window DAYS] [--profile] [--rule-stats] [--pstats FILE] [--since YYYY-MM-DD] [--until YYYY-MM-DD] <*.csv>")
 
     # work around to test from IDE or without specifying
     # csv file om commandline
@@ -356,5 +751,20 @@ if __name__ == '__main__':
     #logger.info(f"Use defaults: \nINPUT = {infile} \nOUTPUT = {outfile}")
 
   logger.info(f"Use defaults: \nINPUT = {infile} \nOUTPUT = {outfile}")
-  main(infile, outfile)
+  options = {"cache_": args.cache, "stream_": args.stream, "jobs_": args.jobs,
+             "columnar_": args.columnar, "since_": args.since, "until_": args.until, "native_": args.native,
+             "incremental_": args.incremental, "window_": args.transfer_window, "profile_": args.profile,
+             "rulestats_": args.rule_stats}
+
+  if args.pstats:
+    # profile the whole run; statistics are written, also if main() fails
+    import cProfile
+    pstats = cProfile.Profile()
+    try:
+      pstats.runcall(main, infile, outfile, **options)
+    finally:
+      pstats.dump_stats(args.pstats)
+      logger.info(f"cProfile statistics written to {args.pstats}; view with python -m pstats {args.pstats}")
+  else:
+    main(infile, outfile, **options)
   close(0)
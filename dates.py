@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+
+
+"""
+Description
+-----------
+
+Fast parsing of dates in bank csv files
+
+The DATEFORMAT strings of a bank definition file are compiled once to a
+specialized parser for fixed width layouts (eg %Y%m%d, %Y-%m-%d,
+%d-%m-%Y); other formats, and dates that do not fit the layout, are
+passed to datetime.strptime. Bank csv files contain the same date many
+times; every distinct date string is parsed once.
+
+
+        This program is free software: you can redistribute it and/or modify
+        it under the terms of the GNU General Public License as published by
+        the Free Software Foundation, either version 3 of the License, or
+        (at your option) any later version.
+
+        This program is distributed in the hope that it will be useful,
+        but WITHOUT ANY WARRANTY; without even the implied warranty of
+        MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+        GNU General Public License for more details.
+
+        You should have received a copy of the GNU General Public License
+        along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import functools
+from datetime import datetime
+
+
+# Number of distinct date strings remembered per parser
+CACHESIZE = 8192
+
+# Width of strptime directives supported by compileDateFormat
+WIDTHS = {"%Y": 4, "%m": 2, "%d": 2}
+
+
+def compileDateFormat(dateformat):
+  """
+  Compile a strptime format string to a fixed width parser
+  eg %d-%m-%Y: day is text[0:2], month text[3:5], year text[6:10]
+
+  Keyword arguments:
+  :param str dateformat: strptime format string
+  :return parser; returns None if a date does not fit the layout
+  :rtype function or None if format is not supported (use strptime)
+  """
+
+  fields = {}
+  literals = []
+  position = 0
+  i = 0
+  while i < len(dateformat):
+    if dateformat[i] == "%":
+      directive = dateformat[i:i+2]
+      if directive not in WIDTHS or directive in fields:
+        return None
+      fields[directive] = slice(position, position + WIDTHS[directive])
+      position += WIDTHS[directive]
+      i += 2
+    else:
+      literals.append((position, dateformat[i]))
+      position += 1
+      i += 1
+
+  if len(fields) != len(WIDTHS):
+    return None
+
+  length = position
+  year = fields["%Y"]
+  month = fields["%m"]
+  day = fields["%d"]
+
+  def parse(text):
+    if len(text) != length:
+      return None
+    for (position, literal) in literals:
+      if text[position] != literal:
+        return None
+
+    digits = text[year] + text[month] + text[day]
+    if not (digits.isascii() and digits.isdigit()):
+      return None
+
+    try:
+      return datetime(int(text[year]), int(text[month]), int(text[day]))
+    except ValueError:
+      return None
+
+  return parse
+
+
+class DateParser:
+  """
+  Parse dates with one or more strptime format strings (DATEFORMAT1, DATEFORMAT2, ..)
+  The first format that matches is used; raises ValueError if none matches
+  """
+
+  def __init__(self, *dateformats, cachesize=CACHESIZE):
+    """
+    Keyword arguments:
+    :param str dateformats: strptime format strings
+    :param int cachesize: number of distinct date strings remembered
+    """
+
+    self.dateformats = dateformats
+    self.__parsers = [compileDateFormat(dateformat) for dateformat in dateformats]
+
+    # every distinct date string is parsed once
+    self.parse = functools.lru_cache(maxsize=cachesize)(self.__parse)
+
+  def __parse(self, text):
+    """
+    Parse a date
+
+    Keyword arguments:
+    :param str text: date as in csv file
+    :rtype datetime
+    """
+
+    # detect format by layout
+    for parser in self.__parsers:
+      if parser is not None:
+        date = parser(text)
+        if date is not None:
+          return date
+
+    # eg dates without leading zeros, or formats which are not compiled
+    for dateformat in self.dateformats:
+      try:
+        return datetime.strptime(text, dateformat)
+      except ValueError:
+        continue
+
+    raise ValueError(f"time data {text!r} does not match format(s) {self.dateformats}")
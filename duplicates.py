@@ -0,0 +1,129 @@
+#!/usr/bin/python3
+
+
+"""
+Description
+-----------
+
+Remove duplicate transactions of overlapping csv files
+
+Two exports of the same account with overlapping date ranges contain the
+same transactions. A transaction is a duplicate if an earlier csv file
+contains the same transaction.
+
+Transactions are identified by a natural key:
+- banks with a sequence number (Rabobank COL_SEQUENCE, DeGiro order id):
+  account and sequence number
+- other banks (ING, DeGiro account, Rabobank beleggen):
+  account, date, amount, counter account and memo
+
+Identical transactions within one csv file (eg two coffees on the same
+day, or a DeGiro order executed in parts) are numbered by occurrence;
+only as many are removed as an earlier file contains.
+
+
+        This program is free software: you can redistribute it and/or modify
+        it under the terms of the GNU General Public License as published by
+        the Free Software Foundation, either version 3 of the License, or
+        (at your option) any later version.
+
+        This program is distributed in the hope that it will be useful,
+        but WITHOUT ANY WARRANTY; without even the implied warranty of
+        MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+        GNU General Public License for more details.
+
+        You should have received a copy of the GNU General Public License
+        along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# logging
+import __main__
+import logging
+import os
+
+script=os.path.basename(__main__.__file__)
+script=os.path.splitext(script)[0]
+logger = logging.getLogger(script + "." +  __name__)
+
+
+def naturalKey(transaction):
+  """
+  Natural key of a transaction
+  Use before categorization; categorization can change memo and counter account
+
+  Keyword arguments:
+  :param Transaction transaction: parsed transaction
+  :rtype tuple
+  """
+
+  # sequence number is unique within an account
+  if transaction.sequence not in (0, "", None):
+    return (transaction.transactiontype, transaction.iban, transaction.sequence)
+
+  return (transaction.transactiontype, transaction.iban, transaction.date, transaction.amount,
+          transaction.to_iban, transaction.memo)
+
+
+class DuplicateFilter:
+  """
+  Remove transactions which are already in an earlier csv file
+  """
+
+  def __init__(self):
+    # (natural key, occurrence) of all passed transactions
+    self.__seen = set()
+
+    # file number:(natural key:number of occurrences)
+    self.__occurrences = {}
+
+    # csv file:number of removed duplicates
+    self.dropped = {}
+
+  def isDuplicate(self, key, file, filenumber):
+    """
+    Check whether a transaction is in an earlier csv file
+    Call for every transaction of a csv file, in order
+
+    Keyword arguments:
+    :param tuple key: naturalKey() of transaction
+    :param str file: Path + Filename of csv file; used for reporting
+    :param int filenumber: position of csv file in list of csv files; chunks of a file have the same number
+    :rtype bool
+    """
+
+    occurrences = self.__occurrences.setdefault(filenumber, {})
+    occurrence = occurrences.get(key, 0)
+    occurrences[key] = occurrence + 1
+
+    # within a file, (key, occurrence) is unique; hence seen in an earlier file
+    if (key, occurrence) in self.__seen:
+      self.dropped[file] = self.dropped.get(file, 0) + 1
+      return True
+
+    self.__seen.add((key, occurrence))
+    return False
+
+  def filter(self, transactions, file, filenumber):
+    """
+    Pass on transactions which are not in an earlier csv file
+
+    Keyword arguments:
+    :param iterable of Transaction transactions: transactions of one csv file, in order
+    :param str file: Path + Filename of csv file; used for reporting
+    :param int filenumber: position of csv file in list of csv files
+    :rtype generator of Transaction
+    """
+
+    for transaction in transactions:
+      if not self.isDuplicate(naturalKey(transaction), file, filenumber):
+        yield transaction
+
+  def report(self):
+    """
+    Log number of removed duplicates per csv file
+    """
+
+    for (file, dropped) in self.dropped.items():
+      logger.info(f"Skipped {dropped} transactions of {file}; already in an earlier csv file")
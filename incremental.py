@@ -0,0 +1,170 @@
+#!/usr/bin/python3
+
+
+"""
+Description
+-----------
+
+Incremental conversion: only pass on transactions not seen in previous runs
+
+Every transaction has a fingerprint: a short hash of account, type, date,
+amount, sequence, security and memo. Fingerprints of converted
+transactions are stored in a state file; a transaction whose fingerprint
+is in the state file has been converted before and is skipped.
+
+Identical transactions (eg two coffees on the same day) get a different
+fingerprint by counting occurrences within a run; downloading an
+overlapping date range gives the same occurrences, hence the same
+fingerprints.
+
+The state file is a sequence of fixed size binary fingerprints; new
+fingerprints are appended, the cost of a run grows with new data only.
+
+
+        This program is free software: you can redistribute it and/or modify
+        it under the terms of the GNU General Public License as published by
+        the Free Software Foundation, either version 3 of the License, or
+        (at your option) any later version.
+
+        This program is distributed in the hope that it will be useful,
+        but WITHOUT ANY WARRANTY; without even the implied warranty of
+        MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+        GNU General Public License for more details.
+
+        You should have received a copy of the GNU General Public License
+        along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import hashlib
+
+# logging
+import __main__
+import logging
+import os
+
+script=os.path.basename(__main__.__file__)
+script=os.path.splitext(script)[0]
+logger = logging.getLogger(script + "." +  __name__)
+
+# Size of a fingerprint in bytes; 2^64 fingerprints makes collisions very unlikely
+FINGERPRINTSIZE = 8
+
+
+def fingerprintKey(transaction):
+  """
+  Fields that identify a transaction
+  Use before categorization; categorization can change the memo
+
+  Keyword arguments:
+  :param Transaction transaction: parsed transaction
+  :rtype str
+  """
+
+  return "\x1f".join((transaction.transactiontype,
+                      transaction.iban,
+                      str(transaction.date.toordinal()),
+                      str(transaction.amount),
+                      str(transaction.sequence),
+                      getattr(transaction, "isin", ""),
+                      transaction.memo))
+
+
+class TransactionState:
+  """
+  Fingerprints of transactions converted in previous runs
+  """
+
+  def __init__(self, statefile):
+    """
+    Keyword arguments:
+    :param str statefile: path + filename of state file
+    """
+
+    self.statefile = statefile
+
+    # fingerprints of previous runs
+    self.__seen = set()
+
+    # fingerprints of this run, in order; appended to state file by save()
+    self.__new = []
+
+    # key:number of occurrences in this run
+    self.__occurrences = {}
+
+    # number of transactions skipped
+    self.skipped = 0
+
+    # size of valid part of state file
+    self.__size = 0
+
+  def load(self):
+    """
+    Load fingerprints of previous runs
+    """
+
+    try:
+      with open(self.statefile, mode='rb') as fp:
+        data = fp.read()
+    except FileNotFoundError:
+      logger.debug(f"State file {self.statefile} does not exist")
+      return
+
+    # ignore a partially written last fingerprint
+    self.__size = len(data) - len(data) % FINGERPRINTSIZE
+    self.__seen = {data[i:i + FINGERPRINTSIZE] for i in range(0, self.__size, FINGERPRINTSIZE)}
+    logger.debug(f"Loaded {len(self.__seen)} fingerprints from state file {self.statefile}")
+
+  def fingerprint(self, key):
+    """
+    Fingerprint of a transaction; identical transactions are numbered by occurrence
+
+    Keyword arguments:
+    :param str key: see fingerprintKey()
+    :rtype bytes
+    """
+
+    occurrence = self.__occurrences.get(key, 0)
+    self.__occurrences[key] = occurrence + 1
+
+    return hashlib.blake2b(f"{key}\x1f{occurrence}".encode("utf-8"), digest_size=FINGERPRINTSIZE).digest()
+
+  def filterNew(self, transactions, keys=None):
+    """
+    Pass on transactions which were not converted in previous runs
+
+    Keyword arguments:
+    :param iterable of Transaction transactions: parsed transactions, in order of csv files
+    :param list of str keys: fingerprintKey() per transaction, if transactions are already categorized
+    :rtype generator of Transaction
+    """
+
+    if keys is None:
+      pairs = ((transaction, fingerprintKey(transaction)) for transaction in transactions)
+    else:
+      pairs = zip(transactions, keys)
+
+    for (transaction, key) in pairs:
+      fingerprint = self.fingerprint(key)
+      if fingerprint in self.__seen:
+        self.skipped += 1
+        continue
+
+      self.__seen.add(fingerprint)
+      self.__new.append(fingerprint)
+      yield transaction
+
+  def save(self):
+    """
+    Append fingerprints of this run to the state file
+    Call after the QIF file is written
+    """
+
+    with open(self.statefile, mode='ab') as fp:
+      # remove a partially written last fingerprint
+      fp.truncate(self.__size)
+      fp.write(b"".join(self.__new))
+      self.__size = fp.tell()
+
+    logger.info(f"Incremental: {len(self.__new)} new transactions; {self.skipped} transactions converted in previous runs")
+    self.__new = []
@@ -0,0 +1,251 @@
+#!/usr/bin/python3
+
+
+"""
+Description
+-----------
+
+Read every csv file once
+
+A csv file is opened and memory mapped once; the same mapping is used to
+determine the bank (first HEADERSIZE bytes, see parsebank.BankRegistry)
+and by the parser of the bank (see parsebank.readRows). Content is
+decoded (latin1) while it is parsed, the file is not copied in memory.
+Pages which are parsed are released; memory use does not grow with the
+size of the csv file.
+
+Number of opens and bytes read per csv file are counted, to verify that
+every csv file is read once.
+
+
+        This program is free software: you can redistribute it and/or modify
+        it under the terms of the GNU General Public License as published by
+        the Free Software Foundation, either version 3 of the License, or
+        (at your option) any later version.
+
+        This program is distributed in the hope that it will be useful,
+        but WITHOUT ANY WARRANTY; without even the implied warranty of
+        MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+        GNU General Public License for more details.
+
+        You should have received a copy of the GNU General Public License
+        along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import io
+import mmap
+
+# logging
+import __main__
+import logging
+import os
+
+script=os.path.basename(__main__.__file__)
+script=os.path.splitext(script)[0]
+logger = logging.getLogger(script + "." +  __name__)
+
+# Size of buffer between mapping and decoder
+BUFFERSIZE = 65536
+
+# Parsed pages are released in blocks of at least RELEASESIZE bytes
+RELEASESIZE = 4 * 1024 * 1024
+
+# Path + Filename of csv file:[number of opens, number of bytes read]
+statistics = {}
+
+
+def countRead(filename, opens=0, nbytes=0):
+  """
+  Count opens and bytes read of a csv file
+
+  Keyword arguments:
+  :param str filename: Path + Filename to bank csv file
+  :param int opens: number of opens
+  :param int nbytes: number of bytes read
+  """
+
+  counters = statistics.setdefault(filename, [0, 0])
+  counters[0] += opens
+  counters[1] += nbytes
+
+
+def mergeStatistics(other):
+  """
+  Add statistics of another process (csv2qif --jobs)
+
+  Keyword arguments:
+  :param dict other: statistics of other process
+  """
+
+  for (filename, (opens, nbytes)) in other.items():
+    countRead(filename, opens, nbytes)
+
+
+def takeStatistics():
+  """
+  Return and reset statistics; used by worker processes
+
+  :rtype dict
+  """
+
+  result = dict(statistics)
+  statistics.clear()
+  return result
+
+
+def report():
+  """
+  Log number of opens and bytes read per csv file
+  """
+
+  opens = 0
+  nbytes = 0
+  size = 0
+  for (filename, counters) in statistics.items():
+    filesize = os.path.getsize(filename)
+    logger.debug(f"Read {filename}: {counters[0]} open(s); {counters[1]} of {filesize} bytes")
+    opens += counters[0]
+    nbytes += counters[1]
+    size += filesize
+
+  logger.info(f"Input: {len(statistics)} csv files; {opens} opens; {nbytes} bytes read of {size} bytes")
+
+
+class CsvFile:
+  """
+  Memory mapped csv file; can be passed to determineBank and to a parser instead of a filename
+  Bytes are counted once, even if they are read again (eg header by parser)
+  """
+
+  def __init__(self, filename):
+    """
+    Keyword arguments:
+    :param str filename: Path + Filename to bank csv file
+    """
+
+    self.filename = filename
+
+    with open(filename, mode='rb') as fp:
+      self.size = os.fstat(fp.fileno()).st_size
+
+      # an empty file can not be mapped; mapping stays valid after file is closed
+      self.__mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) if self.size > 0 else None
+
+    countRead(filename, opens=1)
+
+    # offset after last byte read
+    self.__end = 0
+
+    # offset of first page which is not released
+    self.__released = 0
+
+  def __repr__(self):
+    return f"CsvFile({self.filename})"
+
+  def __str__(self):
+    return self.filename
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+  def read(self, start, end):
+    """
+    Read a byte range
+
+    Keyword arguments:
+    :param int start: offset of first byte
+    :param int end: offset after last byte
+    :rtype bytes
+    """
+
+    if self.__mm is None:
+      return b""
+
+    end = min(end, self.size)
+    if end > self.__end:
+      countRead(self.filename, nbytes=end - max(start, self.__end))
+      self.__end = end
+
+    data = self.__mm[start:end]
+
+    # release pages before this range; read sequentially by parser
+    release = start - start % mmap.PAGESIZE
+    if release - self.__released >= RELEASESIZE and hasattr(mmap, "MADV_DONTNEED"):
+      self.__mm.madvise(mmap.MADV_DONTNEED, self.__released, release - self.__released)
+      self.__released = release
+
+    return data
+
+  def find(self, sub, start):
+    """
+    Find bytes, without reading (counting) them; see read()
+
+    Keyword arguments:
+    :param bytes sub: bytes to find
+    :param int start: offset to start searching
+    :return offset of first occurrence; -1 if not found
+    :rtype int
+    """
+
+    if self.__mm is None:
+      return -1
+    return self.__mm.find(sub, start)
+
+  def header(self, size):
+    """
+    Read start of file
+
+    Keyword arguments:
+    :param int size: number of bytes
+    :rtype str
+    """
+
+    return self.read(0, size).decode('latin1')
+
+  def open(self):
+    """
+    Open content as text, like open(filename, newline='', encoding='latin1')
+
+    :rtype io.TextIOWrapper
+    """
+
+    return io.TextIOWrapper(io.BufferedReader(MappedReader(self), buffer_size=BUFFERSIZE), encoding='latin1', newline='')
+
+  def close(self):
+    """
+    Unmap file
+    """
+
+    if self.__mm is not None:
+      self.__mm.close()
+      self.__mm = None
+
+
+class MappedReader(io.RawIOBase):
+  """
+  Binary stream of a CsvFile, from the start of the file
+  Closing the stream does not unmap the file
+  """
+
+  def __init__(self, csvfile):
+    """
+    Keyword arguments:
+    :param CsvFile csvfile: memory mapped csv file
+    """
+
+    super().__init__()
+    self.csvfile = csvfile
+    self.position = 0
+
+  def readable(self):
+    return True
+
+  def readinto(self, buffer):
+    data = self.csvfile.read(self.position, self.position + len(buffer))
+    buffer[:len(data)] = data
+    self.position += len(data)
+    return len(data)
@@ -23,6 +23,16 @@ script=os.path.splitext(script)[0]
 logger = logging.getLogger(script + "." +  __name__)
 ====================================================================
 
+V1.3.0
+  Records are put in a queue; a background thread (QueueListener) passes
+  them on to the console, syslog and file handler. Logging does not wait
+  for socket and file I/O. Call stop() before exit to handle all queued
+  records; this is also done at exit.
+
+V1.2.0
+  Syslog and file handler are created when the first record is emitted;
+  no syslog socket, user lookup or log file for runs which log nothing
+
 V1.1.0
   31-10-2021
   Disable syslog handler for non linux platforms
@@ -48,7 +58,7 @@ V0.1:
 
 """
 
-__version__ = "1.1.0"
+__version__ = "1.3.0"
 __author__  = "Hans IJntema"
 __license__ = "GPLv3"
 
@@ -58,14 +68,11 @@ __license__ = "GPLv3"
 # Logging
 # ------------------------------------------------------------------------------------
 import __main__
+import atexit
 import logging
-from   logging.handlers import SysLogHandler
 import os
 import sys
-import getpass
-
 
-currentuser = getpass.getuser()
 
 script=os.path.basename(__main__.__file__)
 script=os.path.splitext(script)[0]
@@ -76,38 +83,172 @@ logger = logging.getLogger(script)
 logger.setLevel(logging.INFO)  # DEBUG, INFO, WARNING, ERROR, CRITICAL
 logger.propagate = False
 
+
+class LazyHandler(logging.Handler):
+  """
+  Handler which creates the actual handler when the first record is emitted
+  Opening a socket or file (and importing logging.handlers) is deferred until
+  a record of at least this level is logged
+  """
+
+  def __init__(self, factory, level):
+    """
+    Keyword arguments:
+    :param function factory: returns the actual handler; None if it can not be created
+    :param int level: level of actual handler
+    """
+
+    super().__init__(level)
+    self.factory = factory
+    self.handler = None
+    self.created = False
+
+  def emit(self, record):
+    try:
+      if not self.created:
+        self.created = True
+        self.handler = self.factory()
+      if self.handler is not None:
+        self.handler.handle(record)
+    except Exception:
+      self.handleError(record)
+
+  def flush(self):
+    if self.handler is not None:
+      self.handler.flush()
+
+  def close(self):
+    if self.handler is not None:
+      self.handler.close()
+    super().close()
+
+
 # Console stdout
 c_handler = logging.StreamHandler(sys.stdout)
 # This setLevel determines wich messages are processed by this handler (assuming it arrives from global logger
 c_handler.setLevel(logging.DEBUG)
 c_format = logging.Formatter('%(name)s %(levelname)s: FUNCTION:%(funcName)s LINE:%(lineno)d: %(message)s')
 c_handler.setFormatter(c_format)
-logger.addHandler(c_handler)
+handlers = [c_handler]
+
 
 # Syslog
-if sys.platform == "linux":
-  s_handler = logging.handlers.SysLogHandler( address=('/dev/log') )
+def createSysLogHandler():
+  from logging.handlers import SysLogHandler
+
+  s_handler = SysLogHandler( address=('/dev/log') )
   # This setLevel determines wich messages are processed by this handler (assuming it arrives from global logger
   s_handler.setLevel(logging.INFO)
   s_format = logging.Formatter('%(name)s[%(process)d] %(levelname)s: %(asctime)s FUNCTION:%(funcName)s LINE:%(lineno)d: %(message)s', datefmt='%H:%M:%S')
   s_handler.setFormatter(s_format)
-  logger.addHandler(s_handler)
+  return s_handler
+
+if sys.platform == "linux":
+  handlers.append(LazyHandler(createSysLogHandler, logging.INFO))
 
 
 # File
-# Test if /dev/shm is writable otherwise use /tmp
-try:
-  if os.access("/dev/shm", os.W_OK):
-    f_handler = logging.FileHandler(f"/dev/shm/{script}.{currentuser}.log", 'a')
-  else:
-    f_handler = logging.FileHandler(f"/tmp/{script}.{currentuser}.log", 'a')
-
-  f_handler.setLevel(logging.ERROR)
-  f_format = logging.Formatter('%(name)s[%(process)d] %(levelname)s: %(asctime)s FUNCTION:%(funcName)s LINE:%(lineno)d: %(message)s', datefmt='%Y-%m-%d,%H:%M:%S')
-  f_handler.setFormatter(f_format)
-  logger.addHandler(f_handler)
-except:
-  print(f"ERROR: /dev/shm/{script}.log permission denied")
+def createFileHandler():
+  import getpass
+
+  currentuser = getpass.getuser()
+
+  # Test if /dev/shm is writable otherwise use /tmp
+  try:
+    if os.access("/dev/shm", os.W_OK):
+      f_handler = logging.FileHandler(f"/dev/shm/{script}.{currentuser}.log", 'a')
+    else:
+      f_handler = logging.FileHandler(f"/tmp/{script}.{currentuser}.log", 'a')
+
+    f_handler.setLevel(logging.ERROR)
+    f_format = logging.Formatter('%(name)s[%(process)d] %(levelname)s: %(asctime)s FUNCTION:%(funcName)s LINE:%(lineno)d: %(message)s', datefmt='%Y-%m-%d,%H:%M:%S')
+    f_handler.setFormatter(f_format)
+    return f_handler
+  except:
+    print(f"ERROR: /dev/shm/{script}.log permission denied")
+    return None
+
+handlers.append(LazyHandler(createFileHandler, logging.ERROR))
+
+
+# Queue; a background thread passes records on to the handlers above
+listener = None
+
+def createQueueHandler():
+  global listener
+  import queue
+  from logging.handlers import QueueHandler, QueueListener
+
+  # defined here, as logging.handlers is only imported when the first record is logged
+  class RecordQueueHandler(QueueHandler):
+    def prepare(self, record):
+      # merge message and arguments, as arguments may change after logging;
+      # record is not copied, it is not used by another handler
+      record.msg = record.getMessage()
+      record.args = None
+      return record
+
+  records = queue.SimpleQueue()
+  listener = QueueListener(records, *handlers, respect_handler_level=True)
+  listener.start()
+  return RecordQueueHandler(records)
+
+q_handler = LazyHandler(createQueueHandler, logging.DEBUG)
+logger.addHandler(q_handler)
+
+
+def direct():
+  """
+  Pass records on to the handlers in the calling thread, without queue
+  """
+
+  logger.removeHandler(q_handler)
+  for handler in handlers:
+    logger.addHandler(handler)
+
+
+class DirectHandler(logging.Handler):
+  """
+  Pass records on to the handlers in the calling thread
+  Replaces the queue of q_handler once the background thread is stopped
+  """
+
+  def emit(self, record):
+    for handler in handlers:
+      if record.levelno >= handler.level:
+        handler.handle(record)
+
+
+def stop():
+  """
+  Handle all queued records and stop the background thread
+  Records which are logged afterwards are handled directly
+  """
+
+  global listener
+
+  # no record is put in the queue meanwhile; other threads wait for q_handler,
+  # and their records are handled directly after the queued records
+  # q_handler stays; other threads may be iterating over the handlers of logger
+  q_handler.acquire()
+  try:
+    if listener is not None:
+      listener.stop()
+      listener = None
+
+    q_handler.created = True
+    q_handler.handler = DirectHandler()
+  finally:
+    q_handler.release()
+
+  for handler in handlers:
+    handler.flush()
+
+atexit.register(stop)
+
+# threads do not survive fork, and forked worker processes do not call atexit;
+# csv2qif.initWorker() also calls direct(), for other start methods
+os.register_at_fork(after_in_child=direct)
 
 #logger.debug('This is a debug message')
 #logger.info('This is an info message')
@@ -0,0 +1,225 @@
+#!/usr/bin/python3
+
+
+"""
+Description
+-----------
+
+Wall time, CPU time and rows processed per stage (csv2qif --profile)
+
+Stages are detection, parsing, categorization and writing; detection
+and parsing are recorded per csv file. Transactions flow through the
+stages as generators (eg --stream), so stages are nested: writing pulls
+a transaction from categorization, which pulls it from parsing. Time is
+recorded exclusive: the time of a stage does not include the time of
+the stages it pulls from.
+
+When profiling is disabled, stages and generators are passed on as is;
+there is no overhead.
+
+
+        This program is free software: you can redistribute it and/or modify
+        it under the terms of the GNU General Public License as published by
+        the Free Software Foundation, either version 3 of the License, or
+        (at your option) any later version.
+
+        This program is distributed in the hope that it will be useful,
+        but WITHOUT ANY WARRANTY; without even the implied warranty of
+        MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+        GNU General Public License for more details.
+
+        You should have received a copy of the GNU General Public License
+        along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import contextlib
+import time
+
+# logging
+import __main__
+import logging
+import os
+
+script=os.path.basename(__main__.__file__)
+script=os.path.splitext(script)[0]
+logger = logging.getLogger(script + "." +  __name__)
+
+
+class StageRecord:
+  """
+  Exclusive wall time, CPU time and rows of a stage (of a csv file)
+  """
+
+  def __init__(self):
+    self.wall = 0.0
+    self.cpu = 0.0
+    self.rows = 0
+
+  def merge(self, other):
+    """
+    Add another record of same stage; eg of a worker process (csv2qif --jobs)
+    """
+
+    self.wall += other.wall
+    self.cpu += other.cpu
+    self.rows += other.rows
+
+
+class StageProfiler:
+  """
+  Records wall time, CPU time and rows per (stage, csv file)
+  """
+
+  def __init__(self, enabled=True):
+    """
+    Keyword arguments:
+    :param bool enabled: record stages; if False, stage() and iterate() do nothing
+    """
+
+    self.enabled = enabled
+
+    # (stage, csv file):StageRecord, in order of first use
+    self.records = {}
+
+    # time of nested stages, per active stage: [wall, cpu]
+    self.__stack = []
+
+  def record(self, name, file=None):
+    """
+    Return record of a stage
+
+    Keyword arguments:
+    :param str name: name of stage
+    :param str file: Path + Filename to bank csv file; None is all files
+    :rtype StageRecord
+    """
+
+    key = (name, file)
+    if key not in self.records:
+      self.records[key] = StageRecord()
+    return self.records[key]
+
+  def __enter(self):
+    self.__stack.append([0.0, 0.0])
+    return (time.perf_counter(), time.process_time())
+
+  def __exit(self, record, start):
+    wall = time.perf_counter() - start[0]
+    cpu = time.process_time() - start[1]
+    (nestedwall, nestedcpu) = self.__stack.pop()
+
+    record.wall += wall - nestedwall
+    record.cpu += cpu - nestedcpu
+
+    # inclusive time of this stage is nested time of enclosing stage
+    if self.__stack:
+      self.__stack[-1][0] += wall
+      self.__stack[-1][1] += cpu
+
+  @contextlib.contextmanager
+  def stage(self, name, file=None):
+    """
+    Record a stage; set rows of the returned record
+
+    eg: with profiler.stage("write") as record: ...; record.rows = n
+
+    Keyword arguments:
+    :param str name: name of stage
+    :param str file: Path + Filename to bank csv file; None is all files
+    :rtype StageRecord
+    """
+
+    if not self.enabled:
+      yield StageRecord()
+      return
+
+    record = StageRecord()
+    start = self.__enter()
+    try:
+      yield record
+    finally:
+      self.__exit(record, start)
+      self.record(name, file).merge(record)
+
+  def iterate(self, name, file, iterable):
+    """
+    Record time to produce every item of a generator as a stage; every item is a row
+
+    Keyword arguments:
+    :param str name: name of stage
+    :param str file: Path + Filename to bank csv file; None is all files
+    :param iterable iterable: eg parser
+    :rtype generator
+    """
+
+    if not self.enabled:
+      return iterable
+    return self.__iterate(self.record(name, file), iter(iterable))
+
+  def __iterate(self, record, iterator):
+    while True:
+      start = self.__enter()
+      try:
+        item = next(iterator)
+      except StopIteration:
+        return
+      finally:
+        self.__exit(record, start)
+      record.rows += 1
+      yield item
+
+  def merge(self, records):
+    """
+    Add records of a worker process (csv2qif --jobs)
+
+    Keyword arguments:
+    :param dict records: (stage, csv file):StageRecord
+    """
+
+    for (key, record) in records.items():
+      self.record(*key).merge(record)
+
+  def takeRecords(self):
+    """
+    Return and reset records; used by worker processes
+
+    :rtype dict
+    """
+
+    records = self.records
+    self.records = {}
+    return records
+
+  def report(self):
+    """
+    Log wall time, CPU time and rows/sec per stage and csv file, and per stage
+    """
+
+    if not self.enabled:
+      return
+
+    totals = {}
+    for ((name, file), record) in self.records.items():
+      logger.info(f"Profile: {name:<14} {file or 'all files'}: {self.format(record)}")
+      if name not in totals:
+        totals[name] = StageRecord()
+      totals[name].merge(record)
+
+    for (name, record) in totals.items():
+      logger.info(f"Profile: {name:<14} total: {self.format(record)}")
+
+  @staticmethod
+  def format(record):
+    """
+    Format wall time, CPU time, rows and rows/sec of a record
+
+    :rtype str
+    """
+
+    text = f"wall {record.wall:.3f} s; cpu {record.cpu:.3f} s"
+    if record.rows > 0:
+      text += f"; {record.rows} rows"
+      if record.wall > 0:
+        text += f"; {record.rows / record.wall:,.0f} rows/sec"
+    return text
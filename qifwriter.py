@@ -0,0 +1,278 @@
+#!/usr/bin/python3
+
+
+"""
+Description
+-----------
+
+Write transactions to a QIF file while they are being parsed,
+without building a quiffen object graph first.
+
+Records are formatted the same way as quiffen.Qif.to_qif does.
+
+Additional INFO
+https://www.w3.org/2000/10/swap/pim/qif-doc/QIF-doc.htm
+
+
+        This program is free software: you can redistribute it and/or modify
+        it under the terms of the GNU General Public License as published by
+        the Free Software Foundation, either version 3 of the License, or
+        (at your option) any later version.
+
+        This program is distributed in the hope that it will be useful,
+        but WITHOUT ANY WARRANTY; without even the implied warranty of
+        MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+        GNU General Public License for more details.
+
+        You should have received a copy of the GNU General Public License
+        along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# logging
+import __main__
+import logging
+import os
+
+script=os.path.basename(__main__.__file__)
+script=os.path.splitext(script)[0]
+logger = logging.getLogger(script + "." +  __name__)
+
+# local imports
+from amount import formatCents
+
+# Same default as quiffen
+DATEFORMAT = "%d/%m/%Y"
+
+# Write buffer of output file
+BUFFERSIZE = 1024 * 1024
+
+
+def formatAccount(accountname, accounttype):
+  """
+  Format !Account header
+
+  Keyword arguments:
+  :param str accountname: GnuCash account name
+  :param str accounttype: QIF account type (eg Bank, Invst)
+  :rtype str
+  """
+
+  qif_data = "!Account\n"
+  qif_data += f"N{accountname}\n"
+  if accounttype:
+    qif_data += f"T{accounttype}\n"
+  qif_data += "^\n"
+  return qif_data
+
+
+def formatBank(transaction, date_format=DATEFORMAT):
+  """
+  Format a Bank transaction record
+
+  Keyword arguments:
+  :param Transaction transaction: transaction
+  :param str date_format: strftime format of date
+  :rtype str
+  """
+
+  qif_data = f"D{transaction.date.strftime(date_format)}\n"
+
+  if transaction.amount is not None:
+    qif_data += f"T{formatCents(transaction.amount)}\n"
+
+  if transaction.memo:
+    qif_data += f"M{transaction.memo}\n"
+
+  if transaction.payee:
+    qif_data += f"P{transaction.payee}\n"
+
+  if transaction.category:
+    qif_data += f"L{transaction.category.hierarchy}\n"
+
+  if transaction.toaccountname:
+    qif_data += f"L[{transaction.toaccountname}]\n"
+
+  if transaction.sequence is not None:
+    qif_data += f"N{transaction.sequence}\n"
+
+  qif_data += "^\n"
+  return qif_data
+
+
+def formatInvst(transaction, date_format=DATEFORMAT):
+  """
+  Format an Invst (investment) transaction record
+
+  Keyword arguments:
+  :param Investment transaction: transaction
+  :param str date_format: strftime format of date
+  :rtype str
+  """
+
+  qif_data = f"D{transaction.date.strftime(date_format)}\n"
+
+  if transaction.amount is not None:
+    qif_data += f"T{formatCents(transaction.amount)}\n"
+
+  if transaction.memo:
+    qif_data += f"M{transaction.memo}\n"
+
+  if transaction.action:
+    qif_data += f"N{transaction.action}\n"
+
+  if transaction.isin:
+    qif_data += f"Y{transaction.isin}\n"
+
+  if transaction.price is not None:
+    qif_data += f"I{transaction.price}\n"
+
+  if transaction.quantity is not None:
+    qif_data += f"Q{transaction.quantity}\n"
+
+  if transaction.to_iban:
+    qif_data += f"L{transaction.to_iban}\n"
+
+  if transaction.transfer_amount is not None:
+    qif_data += f"${transaction.transfer_amount}\n"
+
+  if transaction.commission is not None:
+    qif_data += f"O{formatCents(transaction.commission)}\n"
+
+  qif_data += "^\n"
+  return qif_data
+
+
+class QifStreamWriter:
+  """
+  Write transactions to a QIF file as they arrive
+
+  An !Account and !Type header is written whenever the account or
+  the type differs from the previous transaction
+  """
+
+  def __init__(self, outfile_, date_format=DATEFORMAT):
+    """
+    Keyword arguments:
+    :param str outfile_: filename of QIF file
+    :param str date_format: strftime format of dates
+    """
+
+    self.date_format = date_format
+    self.__fp = open(outfile_, mode='w', buffering=BUFFERSIZE)
+    self.__account = None
+    self.__header = None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  def write(self, accountname, accounttype, header, transaction):
+    """
+    Write one transaction
+
+    Keyword arguments:
+    :param str accountname: GnuCash account name
+    :param str accounttype: QIF account type of account
+    :param str header: Bank or Invst
+    :param Transaction transaction: transaction
+    """
+
+    if accountname != self.__account:
+      self.__fp.write(formatAccount(accountname, accounttype))
+      self.__account = accountname
+      self.__header = None
+
+    if header != self.__header:
+      self.__fp.write(f"!Type:{header}\n")
+      self.__header = header
+
+    if header == "Invst":
+      self.__fp.write(formatInvst(transaction, self.date_format))
+    else:
+      self.__fp.write(formatBank(transaction, self.date_format))
+
+  def close(self):
+    """
+    Flush and close QIF file
+    """
+
+    self.__fp.close()
+
+
+class QifWriter:
+  """
+  Write transactions to a QIF file, grouped per account and type
+
+  Same layout as quiffen.Qif.to_qif: accounts in order of addAccount(),
+  every account with its !Type sections in order of first use.
+  Transactions are formatted when they arrive; only the formatted
+  records are kept until close()
+  """
+
+  def __init__(self, outfile_, date_format=DATEFORMAT):
+    """
+    Keyword arguments:
+    :param str outfile_: filename of QIF file
+    :param str date_format: strftime format of dates
+    """
+
+    self.outfile = outfile_
+    self.date_format = date_format
+
+    # accountname:(accounttype, {header:list of formatted records})
+    self.__accounts = {}
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  def addAccount(self, accountname, accounttype):
+    """
+    Add an account; an account name is only added once
+
+    Keyword arguments:
+    :param str accountname: GnuCash account name
+    :param str accounttype: QIF account type of account
+    """
+
+    if accountname not in self.__accounts:
+      self.__accounts[accountname] = (accounttype, {})
+
+  def write(self, accountname, accounttype, header, transaction):
+    """
+    Add one transaction
+
+    Keyword arguments:
+    :param str accountname: GnuCash account name
+    :param str accounttype: QIF account type of account; used if account is not yet added
+    :param str header: Bank or Invst
+    :param Transaction transaction: transaction
+    """
+
+    self.addAccount(accountname, accounttype)
+    records = self.__accounts[accountname][1].setdefault(header, [])
+
+    if header == "Invst":
+      records.append(formatInvst(transaction, self.date_format))
+    else:
+      records.append(formatBank(transaction, self.date_format))
+
+  def close(self):
+    """
+    Write QIF file
+    """
+
+    with open(self.outfile, mode='w', buffering=BUFFERSIZE) as fp:
+      for (accountname, (accounttype, headers)) in self.__accounts.items():
+        fp.write(formatAccount(accountname, accounttype))
+        for (header, records) in headers.items():
+          fp.write(f"!Type:{header}\n")
+          fp.writelines(records)
+
+    self.__accounts = {}
@@ -0,0 +1,49 @@
+"""
+Shared fixtures; modules of csv2qif are imported from the repository root
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def tree(tmp_path):
+  """
+  Copy of the repository without state or cache files; csv2qif writes those next to itself
+  """
+
+  for name in os.listdir(ROOT):
+    if name.endswith(".py") or name in ("bankaccounts.def", "categories.csv"):
+      shutil.copy(os.path.join(ROOT, name), tmp_path)
+  for name in ("banks", "csv"):
+    shutil.copytree(os.path.join(ROOT, name), tmp_path / name, symlinks=True)
+  return tmp_path
+
+
+def run(tree, *args):
+  """
+  Run csv2qif.py in tree; fails on a non zero exit code
+  """
+
+  result = subprocess.run([sys.executable, "csv2qif.py", *args], cwd=tree, capture_output=True, text=True)
+  assert result.returncode == 0, result.stderr
+  return result
+
+
+@pytest.fixture(autouse=True)
+def consoleStream():
+  """
+  Tests which import log in process leave the console handler writing to the stdout captured by pytest,
+  which is closed before log.stop() flushes it at exit
+  """
+
+  yield
+  if "log" in sys.modules:
+    sys.modules["log"].c_handler.setStream(sys.__stdout__)
@@ -0,0 +1,94 @@
+"""
+Exact amount parsing; compared with the regex/float based conversion it replaced
+"""
+
+import re
+from decimal import Decimal
+
+import pytest
+
+import amount
+import columnar
+
+
+def convertDecimalComma(amount):
+  """
+  Former parsebank.convertDecimalComma(); reference implementation
+  """
+
+  __amount = amount.replace(".", "", 1)
+  __amount = __amount.replace(",", ".", 1)
+  __amount = re.sub(r"[^\d|.|-]", "", __amount)
+  return __amount
+
+
+AMOUNTS = ["0,00", "-0,00", "1,70", "-1,70", "+1,70", "1,7", "-6", "25.400,05", "-1.234,56",
+           "0,01", "-0,10", "100,00", "12,5%", " 3,14 ", "999.999,99", "1.000.000,00"]
+
+
+@pytest.mark.parametrize("text", AMOUNTS)
+def test_parse_cents_exact(text):
+  # convertDecimalComma removes only the first thousand separator
+  if text.count(".") > 1:
+    expected = Decimal(text.replace(".", "").replace(",", ".").strip(" +%")) * 100
+  else:
+    expected = Decimal(convertDecimalComma(text)) * 100
+  assert amount.parseCents(text) == expected
+
+
+@pytest.mark.parametrize("text", [text for text in AMOUNTS if text.count(".") <= 1] + ["0,06277", "131,27000"])
+def test_parse_decimal_exact(text):
+  assert amount.parseDecimal(text) == Decimal(convertDecimalComma(text))
+
+
+def test_parse_cents_no_float_rounding():
+  # float(1.15) * 100 = 114.99999999999999
+  assert amount.parseCents("1.15", decimalcomma=False) == 115
+  assert amount.parseCents("0,29") == 29
+
+
+@pytest.mark.parametrize("text", ["", "-", "1,234", "1,0001"])
+def test_parse_cents_errors(text):
+  with pytest.raises(ValueError):
+    amount.parseCents(text)
+
+
+@pytest.mark.parametrize("decimalcomma, texts", [
+  (True, ["0,00", "-1,70", "+1,70", "1,7", "-6", "25.400,05", "1.000.000,00", "1,2300"]),
+  (False, ["0.00", "-1.70", "1.7", "-6", "25,400.05", "1.2300"])])
+def test_columnar_equals_parse_cents(decimalcomma, texts):
+  if not columnar.loadNumpy():
+    pytest.skip("numpy is not installed")
+
+  cents = columnar.toCents(texts, decimalcomma=decimalcomma)
+  assert cents.tolist() == [amount.parseCents(text, decimalcomma) for text in texts]
+
+
+@pytest.mark.parametrize("text", ["", "-", "1,234", "1,0001"])
+def test_columnar_errors(text):
+  if not columnar.loadNumpy():
+    pytest.skip("numpy is not installed")
+
+  with pytest.raises(ValueError):
+    amount.parseCents(text)
+  with pytest.raises(ValueError):
+    columnar.toCents(["1,00", text])
+
+
+@pytest.mark.parametrize("text, cents", [("-123.4567", -12346), ("0.125", 12), ("0.135", 14), ("-1.70", -170), ("1,234.5", 123450)])
+def test_round_cents_half_even(text, cents):
+  assert amount.roundCents(text, decimalcomma=False) == cents
+
+
+@pytest.mark.parametrize("text", AMOUNTS + ["+-5", "-+5", "€ 1,00", "1 000,00", ",5", "-,5", "1,", "٣,00", "1,2300", "", "-", "1,234", "1,0001"])
+def test_columnar_parity_parse_cents(text):
+  if not columnar.loadNumpy():
+    pytest.skip("numpy is not installed")
+
+  try:
+    expected = amount.parseCents(text)
+  except ValueError as e:
+    with pytest.raises(ValueError, match=re.escape(str(e))):
+      columnar.toCents(["1,00", text])
+  else:
+    assert columnar.toCents(["1,00", text]).tolist() == [100, expected]
@@ -0,0 +1,85 @@
+"""
+Required literals of category rules; a rule is only tried when its literal occurs
+Cache file of categorization results
+"""
+
+import json
+import os
+
+import pytest
+
+import categories
+from conftest import ROOT, run
+
+
+@pytest.mark.parametrize("regex, literals", [
+  (r"^.*makro.*benzine.*$", ["makro", "benzine"]),
+  (r"^.*makro\.nl.*$", ["makro.nl"]),
+  (r"^.*\d{2}abc.*$", ["abc"]),
+  (r"^.*\x61bc.*$", ["bc"]),
+  (r"^.*abc.*$", ["abc"]),
+  (r"^.*\141bc.*$", ["bc"]),
+  (r"^.*\N{LATIN SMALL LETTER A}bc.*$", ["bc"]),
+  (r"^(ab)\1cd.*$", ["ab", "cd"]),
+])
+def test_extract_literals(regex, literals):
+  assert [literal for literal in categories.extractLiterals(regex) if literal] == literals
+
+
+def test_named_character_is_no_literal():
+  # literals are extracted before lowercasing; \n{digit one} would be a newline and literal {digit one}
+  assert categories.extractLiteral(r"^.*\N{DIGIT ONE}23.*$") == "23"
+  assert categories.extractLiteral(r"^.*Albert Heijn.*$") == "albert heijn"
+
+
+@pytest.mark.parametrize("regex", [r"^.*\x61bc.*$", r"^.*\141bc.*$", r"^.*abc.*$", r"^.*ABC.*$",
+                                   r"^.*\N{LATIN SMALL LETTER A}bc.*$", r"^.*\N{LATIN CAPITAL LETTER A}BC.*$"])
+def test_escaped_character_rule_matches(tmp_path, regex):
+  csvfile = tmp_path / "categories.csv"
+  csvfile.write_text("New Payee,Category,Payee  pattern (regex),Memo pattern (regex)\n"
+                     f"Shop,Expenses:Shop,,{regex}\n", encoding="latin1")
+  matcher = categories.readCategory(str(csvfile))
+
+  (rule, key) = matcher.match("", "xabcx")
+  assert key == "memo"
+  assert rule["category"] == "Expenses:Shop"
+
+
+def savedKeys(cachefile):
+  with open(cachefile, encoding="utf-8") as fp:
+    return [key.split("\x1f")[0] for key in json.load(fp)["results"]]
+
+
+def test_cache_keeps_recently_used_results(tmp_path, monkeypatch):
+  monkeypatch.setattr(categories, "STORESIZE", 2)
+  cachefile = str(tmp_path / "categories.cache")
+
+  matcher = categories.readCategory(ROOT + "/categories.csv")
+  matcher.loadCache(cachefile)
+  for payee in ("a", "b", "c"):
+    matcher.categorize(payee, "", "")
+  matcher.saveCache(cachefile)
+  assert savedKeys(cachefile) == ["b", "c"]
+
+  # result of previous run which is used again is kept
+  matcher = categories.readCategory(ROOT + "/categories.csv")
+  matcher.loadCache(cachefile)
+  for payee in ("c", "d"):
+    matcher.categorize(payee, "", "")
+  matcher.saveCache(cachefile)
+  assert savedKeys(cachefile) == ["c", "d"]
+
+
+def test_cache_not_written_without_new_results(tree):
+  run(tree, "--cache", "csv/INGCHECKING.csv")
+  cachefile = tree / "categories.cache"
+  written = os.stat(cachefile).st_mtime_ns
+
+  # results of previous run only
+  run(tree, "--cache", "csv/INGCHECKING.csv")
+  assert os.stat(cachefile).st_mtime_ns == written
+
+
+def test_rule_stats_without_cache_file(tree):
+  run(tree, "--cache", "--rule-stats", "csv/INGCHECKING.csv")
+  assert not (tree / "categories.cache").exists()
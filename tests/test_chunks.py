@@ -0,0 +1,45 @@
+"""
+Large csv files with --jobs: split in chunks, every file and chunk is opened once
+"""
+
+import pytest
+
+import ingest
+import parsebank
+from conftest import ROOT
+
+HEADER = '"Datum";"Naam / Omschrijving";"Rekening";"Tegenrekening";"Code";"Af Bij";"Bedrag (EUR)";"Mutatiesoort";"Mededelingen";"Saldo na mutatie";"Tag"\n'
+ROW = '"2020{month:02d}{day:02d}";"Winkel {i}";"NL12INGB1234567890";"NL94ABNA0244748977";"BA";"Af";"{i},{cents:02d}";"Betaalautomaat";"Pasvolgnr: 001 Winkel {i}";"1,00";""\n'
+
+
+def convert(monkeypatch, csvfile, outfile, jobs):
+  """
+  Convert in this process; return open and read statistics of csv file
+  """
+
+  pytest.importorskip("quiffen")
+  import csv2qif
+
+  statistics = {}
+  monkeypatch.setattr(ingest, "report", lambda: statistics.update(ingest.takeStatistics()))
+  csv2qif.main([str(csvfile)], str(outfile), jobs_=jobs)
+  return statistics[str(csvfile)]
+
+
+def test_chunks_open_once(monkeypatch, tmp_path):
+  csvfile = tmp_path / "checking.csv"
+  csvfile.write_text(HEADER + "".join(ROW.format(month=1 + i % 12, day=1 + i % 28, i=i, cents=i % 100) for i in range(2000)),
+                     encoding="latin1")
+  monkeypatch.setattr(parsebank, "CHUNKSIZE", 16 * 1024)
+
+  (opens, nbytes) = convert(monkeypatch, csvfile, tmp_path / "serial.qif", 1)
+  assert (opens, nbytes) == (1, csvfile.stat().st_size)
+
+  # one open for detection and splitting; one per chunk
+  chunks = parsebank.splitFile(str(csvfile), parsebank.BankDefinition(ROOT + "/banks/ing-checking.def"), parsebank.CHUNKSIZE)
+  ingest.takeStatistics()
+  assert len(chunks) > 4
+
+  (opens, nbytes) = convert(monkeypatch, csvfile, tmp_path / "chunks.qif", 2)
+  assert opens == 1 + len(chunks)
+  assert (tmp_path / "chunks.qif").read_bytes() == (tmp_path / "serial.qif").read_bytes()
@@ -0,0 +1,75 @@
+"""
+Queued logging: records are handled in order of logging, also when stopping the queue
+Each check runs in its own process; log is process global and stop() can not be undone
+"""
+
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+STOP = """
+import io
+import logging
+import threading
+
+import log
+
+stream = io.StringIO()
+log.c_handler.setStream(stream)
+# debug records are only handled by the console handler
+log.logger.setLevel(logging.DEBUG)
+
+stopped = threading.Event()
+logged = []
+
+def logRecords():
+  i = 0
+  while not stopped.is_set() or i < 1000:
+    log.logger.debug(f"record {i}")
+    logged.append(i)
+    i += 1
+
+thread = threading.Thread(target=logRecords)
+thread.start()
+while len(logged) < 500:
+  pass
+
+# other thread logs via queue, during stop(), and directly
+log.stop()
+stopped.set()
+thread.join()
+
+handled = [int(line.rsplit(" ", 1)[1]) for line in stream.getvalue().splitlines()]
+assert handled == logged, (len(handled), len(logged))
+"""
+
+WORKER = """
+import csv2qif
+import log
+
+# a spawned worker process imports log anew; no fork handler has run
+csv2qif.initWorker(False, {})
+log.logger.warning("worker")
+assert log.q_handler not in log.logger.handlers and log.listener is None
+"""
+
+
+def runScript(tmp_path, script, *args):
+  """
+  Run script in a new interpreter, with the modules of csv2qif importable; fails on a non zero exit code
+  """
+
+  path = tmp_path / "script.py"
+  path.write_text(script)
+  result = subprocess.run([sys.executable, str(path), *args], cwd=ROOT, capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=ROOT))
+  assert result.returncode == 0, result.stderr
+
+
+def test_stop_keeps_order(tmp_path):
+  runScript(tmp_path, STOP)
+
+
+def test_worker_logs_directly(tmp_path):
+  runScript(tmp_path, WORKER)
@@ -0,0 +1,79 @@
+"""
+Bank parsers on small csv files
+"""
+
+import os
+
+import pytest
+
+import columnar
+import parsebank
+from conftest import ROOT
+
+
+def bank(name):
+  return parsebank.BankDefinition(os.path.join(ROOT, "banks", name + ".def"))
+
+
+def test_degiro_account_skips_other_currency_before_parsing(tmp_path):
+  # foreign currency rows can have an empty amount and balance
+  csvfile = tmp_path / "degiro_account.csv"
+  csvfile.write_text("Datum,Tijd,Valutadatum,Product,ISIN,Omschrijving,FX,Mutatie,,Saldo,,Order Id\n"
+                     "31-12-2020,7:52,30-12-2020,,,Valuta Debitering,1.2,USD,,USD,,\n"
+                     "16-11-2020,7:41,13-11-2020,ASML HOLDING,NL0010273215,Dividend,,EUR,\"1,20\",EUR,,\n"
+                     "16-11-2020,7:43,13-11-2020,,,DEGIRO Corporate Action Kosten,,EUR,\"-0,10\",EUR,\"29,34\",\n",
+                     encoding="latin1")
+
+  transactions = list(parsebank.readDeGiroAccountCSV(str(csvfile), bank("degiro_account")))
+
+  assert [(t.amount, t.balance) for t in transactions] == [(120, None), (-10, 2934)]
+
+
+DEGIROTRANSACTIONS = ("Datum,Tijd,Product,ISIN,Beurs,Uitvoeringsplaats,Aantal,Koers,,Lokale waarde,,Waarde,,Wisselkoers,Transactiekosten,,Totaal,,Order ID\n"
+                      "22-12-2020,12:17,VANGUARD FTSE AW,IE00B3RBWM25,EAM,XAMS,14,5.37,EUR,-123.4567,EUR,-123.4567,EUR,,-0.005,EUR,-123.4567,EUR,aaaaaa\n")
+
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_degiro_transactions_total_rounded_to_cents(tmp_path, batch):
+  # total and commission with more than 2 decimals
+  csvfile = tmp_path / "degiro_transactions.csv"
+  csvfile.write_text(DEGIROTRANSACTIONS, encoding="latin1")
+
+  if batch:
+    if not columnar.loadNumpy():
+      pytest.skip("numpy is not installed")
+    transactions = list(columnar.readDeGiroTransactionsBatch(str(csvfile), bank("degiro_transactions")).transactions())
+  else:
+    transactions = list(parsebank.readDeGiroTransactionsCSV(str(csvfile), bank("degiro_transactions")))
+
+  assert [(t.amount, t.commission) for t in transactions] == [(12346, 0)]
+
+
+# Rabobank beleggen truncates empty trailing columns; columns as in banks/rabobank-beleggen.def
+RABOBELEGGEN = ("\ufeffPortefeuille;Titel;Datum;Opdracht;Omschrijving;Aantal/Bedrag €;Koers;Valuta;Valutakosten €;Waarde €;Mutatie-bedrag €;ISIN code;Tijd;Beurs\n"
+                "31234567; ;04-04-2020;Tarieven en services;;0;0,00000;EUR;;0,00;-6,32\n"
+                "31234567;iShares NASDAQ 100;13-03-2020;Koop Internet;;5;67,11000;EUR;;335,55;-341,55;DE000A0F5UF5\n"
+                "31234567;iShares NASDAQ 100;16-03-2020;Koop Internet;;2;60,00000;EUR;;120,00;-125,00;DE000A0F5UF5;16:02:24.215;XETRA\n")
+
+
+def test_rabobank_beleggen_ragged_rows(tmp_path):
+  csvfile = tmp_path / "RABOBELEGGEN.csv"
+  csvfile.write_text(RABOBELEGGEN, encoding="utf-8")
+  content = csvfile.read_bytes()
+  mtime = csvfile.stat().st_mtime_ns
+
+  # short rows are padded up to the ISIN column; longer rows are kept as is
+  rows = list(parsebank.readRows(str(csvfile), bank("rabobank-beleggen"), width=12))
+  assert [len(row) for row in rows] == [12, 12, 14]
+  assert rows[0][10:] == ["-6,32", ""]
+  assert rows[1][10:] == ["-341,55", "DE000A0F5UF5"]
+
+  transactions = list(parsebank.readRabobankBeleggenCSV(str(csvfile), bank("rabobank-beleggen")))
+  assert [(t.isin, t.action, t.quantity, t.amount, t.commission) for t in transactions] == [
+    ("DE000A0F5UF5", "Buy", "5", 34155, 600),
+    ("DE000A0F5UF5", "Buy", "2", 12500, 500)]
+
+  # padding is done while reading; the csv file is not rewritten
+  assert csvfile.read_bytes() == content
+  assert csvfile.stat().st_mtime_ns == mtime
+  assert [path.name for path in tmp_path.iterdir()] == ["RABOBELEGGEN.csv"]
@@ -0,0 +1,31 @@
+"""
+Golden file test: the native QIF writer (--native) writes the same file as quiffen
+"""
+
+import glob
+import os
+
+import pytest
+
+from conftest import ROOT, run
+
+CSVFILES = sorted(os.path.relpath(file, ROOT) for file in glob.glob(os.path.join(ROOT, "csv", "*.csv")))
+
+
+def convert(tree, csvfiles, *options):
+  """
+  Convert csv files; return content of QIF file
+  """
+
+  run(tree, *options, *csvfiles)
+  qiffile = os.path.splitext(csvfiles[0])[0] + ".qif" if len(csvfiles) == 1 else "out.qif"
+  return (tree / qiffile).read_bytes()
+
+
+@pytest.mark.parametrize("csvfiles", [[file] for file in CSVFILES] + [CSVFILES], ids=[os.path.basename(file) for file in CSVFILES] + ["all"])
+def test_native_equals_quiffen(tree, csvfiles):
+  pytest.importorskip("quiffen")
+
+  golden = convert(tree, csvfiles)
+  assert b"!Type:" in golden
+  assert convert(tree, csvfiles, "--native") == golden
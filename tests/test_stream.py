@@ -0,0 +1,61 @@
+"""
+Streaming (--stream): memory use does not grow with the number of transactions
+"""
+
+import logging
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import ROOT
+
+
+def transactions(rows, category):
+  """
+  Uncategorized bank transactions; no internal transfers
+  """
+
+  from transaction import Transaction
+
+  start = datetime(2020, 1, 1)
+  for i in range(rows):
+    transaction = Transaction(start + timedelta(days=i % 3650), "nl12ingb1234567890", -100 - i,
+                              f"Onbekende winkel {i:08d}", payee=f"Winkel {i:08d}", category=category)
+    transaction.fromaccountname = "Asset:Bank:ING"
+    transaction.toaccountname = "Expenses:Imbalance-EUR"
+    yield transaction
+
+
+def peak(tmp_path, rows):
+  """
+  Peak memory of writing rows transactions with --stream
+  """
+
+  quiffen = pytest.importorskip("quiffen")
+  import csv2qif
+  import log
+
+  account_dict = csv2qif.readBankAccounts(ROOT + "/bankaccounts.def")
+  imbalance = quiffen.Category("Expenses:Imbalance-EUR")
+
+  # records are not queued; only memory of the conversion is measured
+  level = log.logger.level
+  log.logger.setLevel(logging.WARNING)
+  try:
+    tracemalloc.start()
+    csv2qif.writeQIF(account_dict, transactions(rows, imbalance), str(tmp_path / "out.qif"), stream_=True)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+  finally:
+    log.logger.setLevel(level)
+  return peak
+
+
+def test_stream_memory_flat(tmp_path):
+  # first run imports and initializes everything
+  peak(tmp_path, 100)
+
+  small = peak(tmp_path, 2000)
+  large = peak(tmp_path, 20000)
+  assert large - small < 64 * 1024, (small, large)
@@ -0,0 +1,66 @@
+"""
+Internal transfers with --incremental: both legs downloaded in different runs
+"""
+
+import json
+
+import pytest
+
+from conftest import run
+
+CHECKINGHEADER = '"Datum";"Naam / Omschrijving";"Rekening";"Tegenrekening";"Code";"Af Bij";"Bedrag (EUR)";"Mutatiesoort";"Mededelingen";"Saldo na mutatie";"Tag"\n'
+
+# both legs of a 100,00 transfer from checking to savings account
+CHECKING = (CHECKINGHEADER +
+            '"20200520";"Naar Oranje spaarrekening";"NL12INGB1234567890";"H 123-45678";"OV";"Af";"100,00";"Overschrijving";"Naar Oranje spaarrekening H 123-45678";"0,00";""\n')
+SAVING = ('"Datum";"Omschrijving";"Rekening";"Rekening naam";"Tegenrekening";"Af Bij";"Bedrag";"Valuta";"Mutatiesoort";"Mededelingen";"Saldo na mutatie"\n'
+          '"2020-05-20";"Overboeking van betaalrekening NL12INGB1234567890";"H 123-45678";"Oranje Spaarrekening";"NL12INGB1234567890";"Bij";"100,00";"EUR";"Inleg";"";"100,00"\n')
+
+
+def transfers(qiffile):
+  """
+  Number of legs of the 100,00 transfer in a QIF file
+  """
+
+  with open(qiffile, encoding="utf-8") as fp:
+    return sum(line.strip() in ("T100.00", "T-100.00") for line in fp)
+
+
+@pytest.mark.parametrize("options", [[], ["--stream"], ["--native"], ["--jobs", "2"]])
+@pytest.mark.parametrize("first", ["saving", "checking"])
+def test_incremental_transfer_converted_once(tree, first, options):
+  (tree / "checking.csv").write_text(CHECKING, encoding="utf-8")
+  (tree / "saving.csv").write_text(SAVING, encoding="utf-8")
+
+  # first run: one leg, without counterpart
+  run(tree, "--incremental", *options, f"{first}.csv")
+  assert transfers(tree / f"{first}.qif") == 1
+
+  # second run: both legs; the transfer is converted already
+  run(tree, "--incremental", *options, "saving.csv", "checking.csv")
+  assert transfers(tree / "out.qif") == 0
+
+  # third run: nothing new
+  run(tree, "--incremental", *options, "saving.csv", "checking.csv")
+  assert transfers(tree / "out.qif") == 0
+
+
+def test_transfer_paired_in_one_run(tree):
+  (tree / "checking.csv").write_text(CHECKING, encoding="utf-8")
+  run(tree, "--incremental", "csv/INGSAVING.csv", "checking.csv")
+  assert transfers(tree / "out.qif") == 1
+
+
+def test_expired_leg_dropped_from_state(tree):
+  (tree / "saving.csv").write_text(SAVING, encoding="utf-8")
+  run(tree, "--incremental", "saving.csv")
+  with open(tree / "transfers.state", encoding="utf-8") as fp:
+    assert len(json.load(fp)) == 1
+
+  # newer transaction, more than --transfer-window days later; the leg can not pair anymore
+  (tree / "checking.csv").write_text(CHECKINGHEADER +
+                                     '"20200601";"Kosten OranjePakket";"NL12INGB1234567890";"";"DV";"Af";"1,70";"Diversen";"";"0,00";""\n',
+                                     encoding="utf-8")
+  run(tree, "--incremental", "--transfer-window", "5", "checking.csv")
+  with open(tree / "transfers.state", encoding="utf-8") as fp:
+    assert json.load(fp) == []
@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+
+
+"""
+Description
+-----------
+
+Parsed transactions, as passed from the bank parsers (parsebank.py) via
+categorization (categories.py) to the QIF writer (csv2qif.py).
+
+Classes use __slots__; no per instance dictionary is allocated, which
+matters when converting many years of transactions.
+
+
+        This program is free software: you can redistribute it and/or modify
+        it under the terms of the GNU General Public License as published by
+        the Free Software Foundation, either version 3 of the License, or
+        (at your option) any later version.
+
+        This program is distributed in the hope that it will be useful,
+        but WITHOUT ANY WARRANTY; without even the implied warranty of
+        MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+        GNU General Public License for more details.
+
+        You should have received a copy of the GNU General Public License
+        along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+class Transaction:
+  """
+  Bank transaction (QIF !Type:Bank)
+  """
+
+  __slots__ = ("date", "iban", "sequence", "to_iban", "payee", "amount", "balance", "memo", "category",
+               "fromaccountname", "toaccountname")
+
+  # QIF header of transaction
+  transactiontype = "Bank"
+
+  def __init__(self, date, iban, amount, memo, sequence=0, to_iban="", payee="", balance=None, category=""):
+    """
+    Keyword arguments:
+    :param datetime date: date of transaction
+    :param str iban: account number of account (typically IBAN); lowercase
+    :param int amount: amount in cents (see amount.py)
+    :param str memo: description
+    :param sequence: sequence number of transaction within account
+    :param str to_iban: account number of other account; lowercase
+    :param str payee: name of other party
+    :param int balance: balance after transaction in cents; None if unknown
+    :param quiffen.Category category: "" if not (yet) categorized
+    """
+
+    self.date = date
+    self.iban = iban
+    self.sequence = sequence
+    self.to_iban = to_iban
+    self.payee = payee
+    self.amount = amount
+    self.balance = balance
+    self.memo = memo
+    self.category = category
+
+    # GnuCash account names; see categories.determineAccountName()
+    self.fromaccountname = ""
+    self.toaccountname = ""
+
+  def __repr__(self):
+    fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__fields())
+    return f"{self.__class__.__name__}({fields})"
+
+  def __fields(self):
+    """
+    Names of all slots, including those of subclasses
+    """
+
+    for cls in type(self).__mro__:
+      yield from getattr(cls, "__slots__", ())
+
+
+class Investment(Transaction):
+  """
+  Investment transaction (QIF !Type:Invst); buy or sell of a security
+  """
+
+  __slots__ = ("isin", "price", "quantity", "action", "commission", "transfer_amount")
+
+  # QIF header of transaction
+  transactiontype = "Invst"
+
+  def __init__(self, date, iban, amount, memo, isin, price, quantity, action, commission,
+               sequence=0, transfer_amount=""):
+    """
+    Keyword arguments:
+    :param datetime date: date of transaction
+    :param str iban: account number of investment account; lowercase
+    :param int amount: total amount in cents, including commission
+    :param str memo: description
+    :param str isin: security
+    :param str price: price of security
+    :param str quantity: number of securities bought/sold
+    :param str action: Buy or Sell
+    :param int commission: commission in cents; "" if there is no commission
+    :param sequence: order id
+    :param str transfer_amount: amount transferred from/to linked account
+    """
+
+    super().__init__(date, iban, amount, memo, sequence=sequence)
+
+    self.isin = isin
+    self.price = price
+    self.quantity = quantity
+    self.action = action
+    self.commission = commission
+    self.transfer_amount = transfer_amount
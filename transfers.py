@@ -0,0 +1,378 @@
+#!/usr/bin/python3
+
+
+"""
+Description
+-----------
+
+Pair both legs of internal transfers
+
+If you have a transfer from account1 to account2 and both accounts are a
+GnuCash account, and you download statements for both accounts, you will
+end up with same transaction twice in GnuCash:
+  from account1 to account2 amount is -X euros
+  from account2 to account1 amount is X euros
+
+Based on order (= priority) in bankaccounts.def, the leg of the account
+with the lower priority is dropped, but only if the leg of the other
+account is present, within WINDOW days. A leg without counterpart is
+kept, and reported.
+
+Legs are indexed by (account pair, absolute amount); every leg is
+matched against the few legs with the same key.
+
+With --incremental, legs converted in a previous run are not seen again;
+legs converted without counterpart are stored in a state file, and a new
+leg pairing with such a leg is dropped, whichever account it belongs to.
+Stored legs more than WINDOW days before the newest transaction are
+dropped from the state file; no later leg can pair with them.
+
+
+        This program is free software: you can redistribute it and/or modify
+        it under the terms of the GNU General Public License as published by
+        the Free Software Foundation, either version 3 of the License, or
+        (at your option) any later version.
+
+        This program is distributed in the hope that it will be useful,
+        but WITHOUT ANY WARRANTY; without even the implied warranty of
+        MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+        GNU General Public License for more details.
+
+        You should have received a copy of the GNU General Public License
+        along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+# logging
+import __main__
+import logging
+import os
+import json
+from datetime import datetime, timedelta
+
+script=os.path.basename(__main__.__file__)
+script=os.path.splitext(script)[0]
+logger = logging.getLogger(script + "." +  __name__)
+
+# local imports
+from amount import formatCents
+
+# Maximum number of days between both legs of a transfer
+WINDOW = 5
+
+
+class Leg:
+  """
+  Fields of a transfer leg needed for pairing
+  Unpaired kept legs, and legs of previous runs (see TransferMatcher.loadState),
+  are indexed as Leg; the transaction itself is not kept in memory
+  """
+
+  __slots__ = ("date", "fromaccountname", "toaccountname", "amount", "memo")
+
+  def __init__(self, date, fromaccountname, toaccountname, amount, memo):
+    """
+    Keyword arguments:
+    :param datetime date: date of transaction
+    :param str fromaccountname: GnuCash account name of the account of the leg
+    :param str toaccountname: GnuCash account name of the other account
+    :param int amount: amount in cents
+    :param str memo: description
+    """
+
+    self.date = date
+    self.fromaccountname = fromaccountname
+    self.toaccountname = toaccountname
+    self.amount = amount
+    self.memo = memo
+
+
+class TransferMatcher:
+  """
+  Drop the lower priority leg of internal transfers when the other leg is present
+
+  Legs of the higher priority account are always kept ("kept legs");
+  legs of the lower priority account ("held legs") are dropped when a
+  kept leg in the opposite direction, with the same amount, is found
+  within the date window. Every kept leg pairs with at most one held leg.
+
+  Legs without counterpart of previous runs (see loadState) pair first;
+  the new leg, kept or held, is dropped as its counterpart is converted.
+  """
+
+  def __init__(self, account_dict_, window=WINDOW):
+    """
+    Keyword arguments:
+    :param BankAccounts account_dict_: key:value -->  iban:(gnucash account name, priority, qif account)
+    :param int window: maximum number of days between both legs
+    """
+
+    self.account_dict = account_dict_
+    self.window = window
+
+    # (account pair, absolute amount):list of unpaired kept legs
+    self.__kept = {}
+
+    # held legs without counterpart (yet)
+    self.__held = []
+
+    # (account pair, absolute amount):list of legs without counterpart of previous runs
+    self.__previous = {}
+
+    # number of dropped legs; of which paired with legs of previous runs
+    self.dropped = 0
+    self.previous = 0
+
+    # date of newest transaction; legs more than window days older can not pair anymore
+    self.newest = None
+
+  def leg(self, transaction):
+    """
+    Classify a transaction
+
+    Keyword arguments:
+    :param Transaction transaction: transaction with account names (see categories.determineAccountName)
+    :return "kept", "held" or None if transaction is not an internal transfer
+    :rtype str
+    """
+
+    if transaction.transactiontype != "Bank" or len(transaction.to_iban) == 0:
+      return None
+
+    fromname = transaction.fromaccountname
+    toname = transaction.toaccountname
+    if fromname == toname:
+      return None
+
+    toprio = self.account_dict.priority(toname)
+    if toprio is None:
+      return None
+
+    account = self.account_dict.get(transaction.iban)
+    if account is None:
+      return None
+
+    # Higher prio number means lower priority
+    fromprio = account["priority"]
+    return "held" if fromprio > toprio else "kept"
+
+  @staticmethod
+  def key(transaction):
+    """
+    Index key of a leg; same for both legs of a transfer
+    """
+
+    return (min(transaction.fromaccountname, transaction.toaccountname),
+            max(transaction.fromaccountname, transaction.toaccountname),
+            abs(transaction.amount))
+
+  def addKept(self, transaction):
+    """
+    Index a kept leg
+    """
+
+    leg = Leg(transaction.date, transaction.fromaccountname, transaction.toaccountname, transaction.amount, transaction.memo)
+    self.__kept.setdefault(self.key(leg), []).append(leg)
+
+  def pair(self, transaction, legs=None):
+    """
+    Find and remove the closest unpaired kept leg of a held leg
+
+    Keyword arguments:
+    :param Transaction transaction: held leg
+    :param dict legs: index to search; default the kept legs
+    :return kept leg; None if there is no counterpart
+    :rtype Leg
+    """
+
+    if legs is None:
+      legs = self.__kept
+    candidates = legs.get(self.key(transaction), [])
+
+    best = None
+    for (i, candidate) in enumerate(candidates):
+      # opposite direction and sign
+      if candidate.fromaccountname != transaction.toaccountname or candidate.amount != -transaction.amount:
+        continue
+
+      days = abs((candidate.date - transaction.date).days)
+      if days <= self.window and (best is None or days < best[0]):
+        best = (days, i)
+
+    if best is None:
+      return None
+    return candidates.pop(best[1])
+
+  def advance(self, transaction):
+    """
+    Keep track of the date of the newest transaction
+
+    Keyword arguments:
+    :param Transaction transaction: any transaction
+    """
+
+    if self.newest is None or transaction.date > self.newest:
+      self.newest = transaction.date
+
+  def pairPrevious(self, transaction):
+    """
+    Find and remove the closest leg of previous runs of a new leg
+
+    Keyword arguments:
+    :param Transaction transaction: kept or held leg
+    :return True if the counterpart is converted in a previous run
+    :rtype bool
+    """
+
+    if self.pair(transaction, self.__previous) is None:
+      return False
+
+    self.previous += 1
+    return True
+
+  def match(self, csvlist):
+    """
+    Remove the held legs which have a counterpart; order is kept
+
+    Keyword arguments:
+    :param list of Transaction csvlist: all transactions
+    :rtype list of Transaction
+    """
+
+    held = []
+    dropped = set()
+    for transaction in csvlist:
+      self.advance(transaction)
+      leg = self.leg(transaction)
+      if leg is None:
+        continue
+
+      if self.pairPrevious(transaction):
+        dropped.add(id(transaction))
+      elif leg == "kept":
+        self.addKept(transaction)
+      else:
+        held.append(transaction)
+
+    # held legs in order of date; the earliest transfer pairs first
+    held.sort(key=lambda transaction: transaction.date)
+    for transaction in held:
+      if self.pair(transaction) is None:
+        self.__held.append(transaction)
+      else:
+        dropped.add(id(transaction))
+
+    self.dropped += len(dropped)
+    return [transaction for transaction in csvlist if id(transaction) not in dropped]
+
+  def matchStream(self, transactions):
+    """
+    Streaming version of match()
+    Held legs are passed on at the end, when all kept legs are known;
+    csv files are not in order of date, a kept leg can be in any file.
+    Memory use grows with the number of transfer legs only: held legs,
+    and unpaired kept legs as Leg
+
+    Keyword arguments:
+    :param iterable of Transaction transactions: all transactions
+    :rtype generator of Transaction
+    """
+
+    held = []
+    for transaction in transactions:
+      self.advance(transaction)
+      leg = self.leg(transaction)
+      if leg is not None and self.pairPrevious(transaction):
+        self.dropped += 1
+        continue
+
+      if leg == "held":
+        held.append(transaction)
+        continue
+
+      if leg == "kept":
+        self.addKept(transaction)
+      yield transaction
+
+    held.sort(key=lambda transaction: transaction.date)
+    for transaction in held:
+      if self.pair(transaction) is None:
+        self.__held.append(transaction)
+        yield transaction
+      else:
+        self.dropped += 1
+
+  def report(self):
+    """
+    Log legs without counterpart
+    Held legs are converted, as the other account is not (completely) downloaded
+    """
+
+    for transaction in self.__held:
+      logger.info(f"TRANSFER without counterpart: {transaction.date:%Y-%m-%d} "
+                  f"{transaction.fromaccountname} -> {transaction.toaccountname} "
+                  f"{formatCents(transaction.amount)}|{transaction.memo}")
+
+    unpaired = sum(len(legs) for legs in self.__kept.values())
+    logger.info(f"Transfers: {self.dropped} paired ({self.previous} with previous runs); {len(self.__held)} without counterpart in "
+                f"lower priority account; {unpaired} without counterpart in higher priority account")
+
+  def loadState(self, statefile):
+    """
+    Load legs without counterpart converted in previous runs
+
+    Keyword arguments:
+    :param str statefile: path + filename of state file
+    """
+
+    self.__previous = {}
+
+    try:
+      with open(statefile, mode='r', encoding='utf-8') as fp:
+        legs = json.load(fp)
+    except FileNotFoundError:
+      logger.debug(f"State file {statefile} does not exist")
+      return
+    except (OSError, ValueError) as e:
+      logger.warning(f"State file {statefile} can not be read, ignored: {e}")
+      return
+
+    for (ordinal, fromaccountname, toaccountname, amount, memo) in legs:
+      leg = Leg(datetime.fromordinal(ordinal), fromaccountname, toaccountname, amount, memo)
+      self.__previous.setdefault(self.key(leg), []).append(leg)
+
+    logger.debug(f"Loaded {len(legs)} transfer legs without counterpart from state file {statefile}")
+
+  def saveState(self, statefile):
+    """
+    Save legs without counterpart for next runs; of previous runs and this run
+    Legs more than window days before the newest transaction are dropped;
+    no leg of a later run can pair with them
+    Call once the QIF file is written
+
+    Keyword arguments:
+    :param str statefile: path + filename of state file
+    """
+
+    legs = [leg for index in (self.__previous, self.__kept) for legs in index.values() for leg in legs]
+    legs.extend(self.__held)
+    legs.sort(key=lambda leg: leg.date)
+
+    # newest transaction of this run, or newest leg of previous runs
+    newest = self.newest
+    if len(legs) > 0 and (newest is None or legs[-1].date > newest):
+      newest = legs[-1].date
+
+    if newest is not None:
+      cutoff = newest - timedelta(days=self.window)
+      expired = sum(leg.date < cutoff for leg in legs)
+      legs = [leg for leg in legs if leg.date >= cutoff]
+      logger.debug(f"{expired} transfer legs without counterpart older than {cutoff:%Y-%m-%d} dropped from state file {statefile}")
+
+    # write to temporary file first; never leave a truncated state file
+    try:
+      with open(statefile + ".tmp", mode='w', encoding='utf-8') as fp:
+        json.dump([(leg.date.toordinal(), leg.fromaccountname, leg.toaccountname, leg.amount, leg.memo) for leg in legs], fp)
+      os.replace(statefile + ".tmp", statefile)
+    except OSError as e:
+      logger.warning(f"State file {statefile} can not be written: {e}")